@@ -1,9 +1,12 @@
+import time
+START_TIME = time.perf_counter()  # 进程启动计时（冷启动到首帧）
+
 import sys
 import os
 import pygame
-import time
 from src.control.RPSController import RPSController
 from src.control.game import RPSGame
+from src.solve.config import PredictorConfig
 
 
 def init_dataset_path(filename: str) -> str:
@@ -51,13 +54,27 @@ def main():
     # === 1. 主程序自定义变量 ===
     dataset_name = "/solve1/jsq.json"   # 数据集文件
     mode = "1"                          # 训练模式
+    predictor_config = None             # 预测器配置文件，例如 "./configs/latency.json"，None 为默认配置
 
     # === 2. 主函数中完成目录和文件初始化 ===
     dataset_name = init_dataset_path(dataset_name)
 
-    # === 3. 初始化控制器与游戏 ===
-    controller = RPSController(filename=dataset_name, mode=mode)
+    # 预测器配置：窗口长度、网络大小、训练参数与设备
+    config = PredictorConfig.load(predictor_config) \
+        if predictor_config else PredictorConfig()
+
+    # === 3. 初始化游戏与控制器 ===
+    # 先显示首帧，预测器（及 torch 等依赖）在后台线程中加载
     game = RPSGame()
+    game.draw_interface()
+    print(f"冷启动到首帧耗时: {(time.perf_counter() - START_TIME) * 1000:.0f} ms")
+
+    # 对局记录由后台线程批量写入（攒满 20 局或等待 1 秒），界面线程不等待磁盘
+    controller = RPSController(filename=dataset_name, mode=mode,
+                               background_training=True, lazy_load=True,
+                               save_batch_size=20, flush_interval_ms=1000,
+                               predictor_options={"config": config})
+    controller.preload_processor()
 
     print(f"系统已启动 → 数据集: {dataset_name}, 模式: {mode}")
     print("游戏窗口已打开，使用鼠标选择出拳。Ctrl+C 可强制退出。\n")
@@ -85,8 +102,11 @@ def main():
 
     except KeyboardInterrupt:
         print("\n收到 Ctrl+C，程序已退出。")
-        pygame.quit()
         sys.exit()
+    finally:
+        # Ctrl+C 与关闭窗口（SystemExit）都要写完缓冲区中的对局记录
+        controller.close()
+        pygame.quit()
 
 
 if __name__ == "__main__":
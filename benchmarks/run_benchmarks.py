@@ -0,0 +1,324 @@
+"""
+预测器基准测试
+
+每个（模式, 数据来源）组合在独立的子进程中运行，按与游戏相同的协议逐局调用
+compute_choice / update_with_new_data，记录：
+- 启动耗时（导入模块并创建预测器；数据集来源另测带历史数据的启动耗时）
+- 每局预测与更新延迟（p50 / p90 / p99 / 平均，微秒）
+- 进程峰值内存（RSS）
+- 电脑胜率
+
+数据来源为固定随机种子的脚本化对手（src/control/opponents.py），或逐局回放的已记录数据集。
+结果写入 JSON 文件，可用 --compare 与之前的结果逐项对比。
+
+用法（在仓库根目录运行）:
+    python benchmarks/run_benchmarks.py --modes 4 5 6 --rounds 2000
+    python benchmarks/run_benchmarks.py --output new.json --compare old.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from src.control.opponents import OPPONENTS, create_opponent
+from src.solve.registry import available_modes
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，峰值内存记为 None
+    resource = None
+
+
+DEFAULT_DATASETS = ["rps_data.json", "/solve1/jsq.json"]
+
+# --compare 时对比的指标
+COMPARED_METRICS = ["startup_seconds", "predict_p50_us", "predict_p99_us",
+                    "update_p50_us", "update_p99_us", "peak_rss_mb",
+                    "computer_win_rate"]
+
+
+def peak_rss_mb():
+    """当前进程的峰值 RSS（MB），平台不支持时为 None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(peak * scale / 2 ** 20, 2)
+
+
+def summarize_latencies(samples, prefix):
+    """延迟样本（秒）→ 分位数与平均值（微秒）"""
+    if not samples:
+        return {}
+    micros = np.asarray(samples) * 1e6
+    p50, p90, p99 = np.percentile(micros, [50, 90, 99])
+    return {f"{prefix}_p50_us": round(float(p50), 2),
+            f"{prefix}_p90_us": round(float(p90), 2),
+            f"{prefix}_p99_us": round(float(p99), 2),
+            f"{prefix}_mean_us": round(float(micros.mean()), 2)}
+
+
+def seed_everything(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    if "torch" in sys.modules:
+        sys.modules["torch"].manual_seed(seed)
+
+
+def prepare_dataset(name, workdir):
+    """
+    把已记录的数据集复制到临时目录，读取其中的用户动作
+
+    基准测试在临时目录中运行，预测器生成的日志、检查点等不会写入仓库。
+
+    Returns:
+        list: 用户动作序列
+    """
+    from src.control.storage import GameLogStore
+
+    source = os.path.join(ROOT, "./dataset" + name)
+    target = os.path.join(workdir, "./dataset" + name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.copyfile(source, target)
+
+    os.chdir(workdir)
+    # 首次打开会把旧版 JSON 导入日志，这一次性的开销不计入启动耗时
+    store = GameLogStore(name)
+    return [record["user_choice"] for record in store.iter_records()
+            if record.get("user_choice") in ("rock", "scissors", "paper")]
+
+
+def run_case(case):
+    """
+    在当前进程中运行一个基准用例
+
+    Args:
+        case (dict): mode, kind ("opponent" 或 "dataset"), source, rounds, seed
+
+    Returns:
+        dict: 测量结果
+    """
+    from src.control.RPSController import determine_winner
+    from src.solve.registry import create_predictor
+
+    mode, kind, source = case["mode"], case["kind"], case["source"]
+    result = dict(case)
+    result["baseline_rss_mb"] = peak_rss_mb()
+
+    workdir = tempfile.mkdtemp(prefix="rps-bench-")
+    try:
+        os.chdir(workdir)
+        moves = prepare_dataset(source, workdir) if kind == "dataset" else None
+        seed_everything(case["seed"])
+
+        # 启动：导入模块并创建不带历史数据的预测器
+        start = time.perf_counter()
+        predictor = create_predictor(mode, None, verbose=False,
+                                     background=False)
+        result["startup_seconds"] = round(time.perf_counter() - start, 4)
+        result["processor_type"] = predictor.__class__.__name__
+
+        if kind == "dataset":
+            # 带历史数据的启动（模块已导入，只计加载与训练）
+            start = time.perf_counter()
+            loaded = create_predictor(mode, source, verbose=False,
+                                      background=False)
+            result["history_startup_seconds"] = round(
+                time.perf_counter() - start, 4)
+            result["history_games"] = len(moves)
+            if hasattr(loaded, "close"):
+                loaded.close()
+            player = None
+            rounds = len(moves)
+        else:
+            player = create_opponent(source, seed=case["seed"])
+            rounds = case["rounds"]
+        seed_everything(case["seed"])
+
+        update = getattr(predictor, "update_with_new_data", None)
+        predict_times, update_times = [], []
+        wins = {"computer_win": 0, "user_win": 0, "draw": 0}
+        for index in range(rounds):
+            user_choice = moves[index] if player is None else player.next_move()
+
+            start = time.perf_counter()
+            computer_choice = predictor.compute_choice(user_choice)
+            middle = time.perf_counter()
+            if update is not None:
+                update()
+            end = time.perf_counter()
+
+            predict_times.append(middle - start)
+            update_times.append(end - middle)
+            wins[determine_winner(user_choice, computer_choice)] += 1
+            if player is not None:
+                player.observe(user_choice, computer_choice)
+
+        if hasattr(predictor, "close"):
+            predictor.close()
+
+        result["rounds"] = rounds
+        result.update(summarize_latencies(predict_times, "predict"))
+        result.update(summarize_latencies(update_times, "update"))
+        for name, count in wins.items():
+            result[f"{name}_rate"] = round(count / rounds * 100, 2) \
+                if rounds else 0
+        result["peak_rss_mb"] = peak_rss_mb()
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+
+def run_isolated(case, timeout):
+    """在独立子进程中运行用例，峰值内存与启动耗时互不影响"""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        output = f.name
+    try:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker",
+             json.dumps(case), "--worker-output", output],
+            cwd=ROOT, capture_output=True, text=True, timeout=timeout)
+        if completed.returncode != 0:
+            error = (completed.stderr or completed.stdout).strip()
+            return dict(case, error=error.splitlines()[-1] if error else
+                        f"退出码 {completed.returncode}")
+        with open(output, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except subprocess.TimeoutExpired:
+        return dict(case, error=f"超时（{timeout} 秒）")
+    finally:
+        os.remove(output)
+
+
+def environment():
+    """运行环境信息，便于区分不同机器与提交的结果"""
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "timestamp": datetime.now().isoformat()
+    }
+    try:
+        info["commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        info["commit"] = None
+    try:
+        import torch
+        info["torch"] = torch.__version__
+    except ImportError:
+        info["torch"] = None
+    return info
+
+
+def compare(results, baseline_path):
+    """逐项打印与之前结果的差异"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(item["mode"], item["kind"], item["source"]): item
+                for item in baseline.get("results", [])}
+
+    print(f"\n与 {baseline_path} (提交 {baseline.get('environment', {}).get('commit')}) 对比:")
+    for item in results:
+        old = previous.get((item["mode"], item["kind"], item["source"]))
+        if old is None or "error" in item or "error" in old:
+            continue
+        changes = []
+        for metric in COMPARED_METRICS:
+            new_value, old_value = item.get(metric), old.get(metric)
+            if new_value is None or old_value is None:
+                continue
+            if metric.endswith("_rate"):
+                changes.append(f"{metric} {new_value - old_value:+.2f}")
+            elif old_value:
+                changes.append(
+                    f"{metric} {(new_value - old_value) / old_value * 100:+.1f}%")
+        print(f"  模式{item['mode']} {item['source']:<16} " + ", ".join(changes))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="预测器基准测试：延迟、峰值内存、启动耗时与胜率")
+    parser.add_argument("--modes", nargs="+", default=available_modes(),
+                        help="要测试的预测器模式，默认全部")
+    parser.add_argument("--opponents", nargs="+", default=list(OPPONENTS),
+                        help=f"脚本化对手: {', '.join(OPPONENTS)}")
+    parser.add_argument("--datasets", nargs="*", default=DEFAULT_DATASETS,
+                        help="逐局回放的已记录数据集（相对 ./dataset 的文件名称）")
+    parser.add_argument("--rounds", type=int, default=1000,
+                        help="每个脚本化对手的局数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--timeout", type=float, default=1800,
+                        help="每个用例的超时时间（秒）")
+    parser.add_argument("--output", default=os.path.join(
+        ROOT, "benchmarks", "results.json"), help="结果文件路径")
+    parser.add_argument("--compare", default=None,
+                        help="与之前的结果文件对比")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--worker-output", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        result = run_case(json.loads(args.worker))
+        with open(args.worker_output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False)
+        return
+
+    cases = []
+    for mode in args.modes:
+        cases.extend({"mode": mode, "kind": "opponent", "source": opponent,
+                      "rounds": args.rounds, "seed": args.seed}
+                     for opponent in args.opponents)
+        cases.extend({"mode": mode, "kind": "dataset", "source": dataset,
+                      "rounds": None, "seed": args.seed}
+                     for dataset in args.datasets
+                     if os.path.exists(os.path.join(ROOT, "./dataset" + dataset)))
+
+    results = []
+    for case in cases:
+        result = run_isolated(case, args.timeout)
+        results.append(result)
+        if "error" in result:
+            print(f"模式{case['mode']} {case['source']:<16} 失败: {result['error']}")
+        else:
+            print(f"模式{result['mode']} {result['source']:<16} "
+                  f"局数={result['rounds']:<6} "
+                  f"启动={result['startup_seconds']:.3f}s "
+                  f"预测p50={result.get('predict_p50_us', 0):.1f}us "
+                  f"p99={result.get('predict_p99_us', 0):.1f}us "
+                  f"更新p50={result.get('update_p50_us', 0):.1f}us "
+                  f"峰值内存={result['peak_rss_mb']}MB "
+                  f"电脑胜率={result['computer_win_rate']:.2f}%")
+
+    report = {"environment": environment(),
+              "config": {"rounds": args.rounds, "seed": args.seed},
+              "results": results}
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+    print(f"\n结果已写入: {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
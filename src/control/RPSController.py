@@ -1,99 +1,189 @@
-import json
-import os
 from datetime import datetime
+import json
 import random
+import threading
+
+from src.control.instrumentation import Instrumentation
+from src.control.logs import get_logger
+from src.control.statistics import GameStatistics
+from src.control.storage import GameLogStore, MemoryLogStore, WriteBehindWriter
+from src.solve.random_predictor import RandomPredictor
+from src.solve.registry import available_modes, create_predictor, describe_mode
+
+
+logger = get_logger("controller")
+
+
+def determine_winner(user_choice, computer_choice):
+    """
+    判断游戏胜负
+
+    Args:
+        user_choice (str): 用户选择
+        computer_choice (str): 电脑选择
+
+    Returns:
+        str: "user_win", "computer_win", 或 "draw"
+    """
+    if user_choice == computer_choice:
+        return "draw"
+    elif (user_choice == "rock" and computer_choice == "scissors") or \
+         (user_choice == "scissors" and computer_choice == "paper") or \
+         (user_choice == "paper" and computer_choice == "rock"):
+        return "user_win"
+    else:
+        return "computer_win"
 
 
 class RPSController:
-    def __init__(self, filename="rps_dataset.json", mode="1"):
+    def __init__(self, filename="rps_dataset.json", mode="1",
+                 background_training=False, verbose=True, save_batch_size=1,
+                 lazy_load=False, stats_window=100, checkpoint_interval=100,
+                 flush_interval_ms=None, instrument=False,
+                 predictor_options=None):
         """
         初始化石头剪刀布游戏控制类
 
         Args:
-            filename (str): 数据集文件名称
+            filename (str): 数据集文件名称，None 表示只在内存中统计、不落盘
             mode (str): 使用的运算方法 ["1", "2", "3"]
+            background_training (bool): 预测器是否在后台线程中训练
+            verbose (bool): 是否输出每局的处理信息（DEBUG 级日志，见 src/control/logs.py）
+            save_batch_size (int): 累积多少条记录后批量写入一次数据集
+            lazy_load (bool): 是否延迟到第一次使用时才加载运算类（及其依赖）
+            stats_window (int): 滚动统计的局数
+            checkpoint_interval (int): 每写入多少局保存一次统计检查点
+            flush_interval_ms (float): 设置时由后台线程写入数据集，记录最多等待这么久（毫秒）
+                或攒满 save_batch_size 条后写入；None 表示在调用线程中同步批量写入
+            instrument (bool): 是否记录各阶段耗时与计数（见 get_processor_info / export_metrics）
+            predictor_options (dict): 传给预测器的额外选项，例如 {"window": 5, "hidden_size": 64}
         """
         self.filename = filename
         self.mode = mode
+        self.background_training = background_training
+        self.verbose = verbose
+        self.save_batch_size = max(1, save_batch_size)
+        self.stats_window = stats_window
+        self.checkpoint_interval = max(1, checkpoint_interval)
+        self.flush_interval_ms = flush_interval_ms
+        self.predictor_options = dict(predictor_options or {})
+        self.pending_records = []
         self.current_user_choice = None
         self.current_computer_choice = None
         self.current_result = None
         self.timestamp = None
-        self.processor = None
+        self._processor = None
+        self._processor_lock = threading.Lock()
+        # 各阶段耗时与计数，关闭时几乎没有开销
+        self.instrumentation = Instrumentation(enabled=instrument)
 
         # 初始化数据集文件
-        self._init_dataset_file()
+        with self.instrumentation.stage("dataset_load"):
+            self._init_dataset_file()
         # 加载运算类
-        self._load_processor()
+        if not lazy_load:
+            self._load_processor()
+
+    @property
+    def processor(self):
+        """当前运算类，未加载时在此处加载"""
+        if self._processor is None:
+            with self._processor_lock:
+                if self._processor is None:
+                    self._load_processor()
+        return self._processor
+
+    @processor.setter
+    def processor(self, value):
+        self._processor = value
+
+    def preload_processor(self):
+        """在后台线程中加载运算类，首次出拳前不阻塞界面"""
+        thread = threading.Thread(target=lambda: self.processor,
+                                  name="rps-processor-loader", daemon=True)
+        thread.start()
+        return thread
 
     def _init_dataset_file(self):
-        """初始化数据集文件"""
-        if not os.path.exists(self.filename):
-            initial_data = {
-                "metadata": {
-                    "created_date": datetime.now().isoformat(),
-                    "total_games": 0,
-                    "computer_wins": 0,
-                    "user_wins": 0,
-                    "draws": 0,
-                    "last_updated": datetime.now().isoformat(),
-                    "version": "1.0"
-                },
-                "game_records": []
-            }
-            self._save_dataset(initial_data)
-            print(f"已创建新的数据集文件: {self.filename}")
+        """初始化数据集存储（追加写入日志 + 元数据旁路文件）"""
+        if self.filename is None:
+            self.store = MemoryLogStore()
+        else:
+            self.store = GameLogStore(self.filename)
+        self._init_statistics()
+
+        # 后台写入线程（write-behind），每次写入后更新已落盘的统计并保存检查点
+        self.writer = None
+        if self.flush_interval_ms is not None:
+            self.writer = WriteBehindWriter(
+                self.store, batch_size=self.save_batch_size,
+                interval_ms=self.flush_interval_ms,
+                on_flush=self._records_written)
+
+    def _init_statistics(self):
+        """
+        从检查点恢复增量统计（检查点缺失或过期时从日志重建一次）
+
+        维护两份统计：statistics 包含已保存（含尚未写入日志）的全部对局，供
+        method3_get_statistics 读取；persisted_statistics 只包含已写入日志的对局，
+        检查点由它保存，因此检查点的局数总是与日志一致。
+        """
+        self.stats_path = None
+        if self.filename is not None:
+            self.stats_path = self.store.sidecar_path(".stats.json")
+        self.persisted_statistics = GameStatistics.restore(
+            self.store, self.stats_path, window=self.stats_window)
+        self.statistics = self.persisted_statistics.copy()
+        self.checkpointed_games = self.persisted_statistics.total
+        # 已落盘的统计可能在后台写入线程中更新并保存
+        self.statistics_lock = threading.Lock()
+
+    def _records_written(self, records):
+        """记录写入日志后调用：更新已落盘的统计，并按需保存检查点"""
+        with self.statistics_lock:
+            self.persisted_statistics.record_all(records)
+        self._checkpoint_statistics()
+
+    def _checkpoint_statistics(self, force=False):
+        """每写入 checkpoint_interval 局（或强制）保存一次已落盘统计的检查点"""
+        if self.stats_path is None:
+            return
+        with self.statistics_lock:
+            statistics = self.persisted_statistics
+            games = statistics.total
+            if games != self.store.metadata["total_games"]:
+                # 日志被其他进程追加过，检查点与日志对不上；下次启动时从日志补齐
+                return
+            if force or games - self.checkpointed_games >= self.checkpoint_interval:
+                try:
+                    statistics.save(self.stats_path)
+                    self.checkpointed_games = games
+                except OSError as e:
+                    logger.error("保存统计检查点失败: %s", e)
 
     def _load_processor(self):
         """根据模式加载对应的运算类"""
+        self.instrumentation.count("processor_loads")
         try:
-            if self.mode == "1":
-                # 使用新的简化版预测器
-                from src.solve.solve1 import SimpleRPSPredictor
-                self.processor = SimpleRPSPredictor(self.filename)
-                print("已加载简化版神经网络预测器 (模式1)")
-
-            else:
-                raise ImportError("模式不存在")
+            # 只在选中模式时导入对应模块
+            with self.instrumentation.stage("processor_load"):
+                self.processor = create_predictor(
+                    self.mode, self.filename, verbose=self.verbose,
+                    background=self.background_training,
+                    **self.predictor_options)
+            if self.verbose:
+                logger.info("已加载%s (模式%s)", describe_mode(self.mode),
+                            self.mode)
 
         except ImportError as e:
-            print(f"加载运算类失败: {e}")
+            logger.warning("加载运算类失败: %s", e)
             # 使用随机策略作为备用
-            self.processor = RandomPredictor()
+            self.processor = RandomPredictor(verbose=self.verbose)
 
     def _load_dataset(self):
-        """加载数据集文件"""
-        try:
-            with open("./dataset"+self.filename, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            print(f"加载数据集失败: {e}")
-            return self._create_empty_dataset()
-
-    def _create_empty_dataset(self):
-        """创建空的数据集结构"""
-        return {
-            "metadata": {
-                "created_date": datetime.now().isoformat(),
-                "total_games": 0,
-                "computer_wins": 0,
-                "user_wins": 0,
-                "draws": 0,
-                "last_updated": datetime.now().isoformat(),
-                "version": "1.0"
-            },
-            "game_records": []
-        }
-
-    def _save_dataset(self, data):
-        """保存数据集到文件"""
-        try:
-            with open("./dataset"+self.filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            return True
-        except Exception as e:
-            print(f"保存数据集失败: {e}")
-            return False
+        """加载数据集（旧版 JSON 结构，需要读取全部记录）"""
+        self.flush()
+        return self.store.to_legacy()
 
     def method1_process_game(self, user_choice):
         """
@@ -105,22 +195,29 @@ class RPSController:
         Returns:
             dict: 包含电脑选择和当前结果的字典
         """
+        instrumentation = self.instrumentation
+        instrumentation.count("rounds")
+
         # 验证用户输入
-        valid_choices = ["rock", "scissors", "paper"]
-        if user_choice not in valid_choices:
-            raise ValueError(f"无效的选择: {user_choice}。请使用: {valid_choices}")
+        with instrumentation.stage("validate"):
+            valid_choices = ["rock", "scissors", "paper"]
+            if user_choice not in valid_choices:
+                instrumentation.count("invalid_choices")
+                raise ValueError(f"无效的选择: {user_choice}。请使用: {valid_choices}")
 
-        # 设置当前用户选择
-        self.current_user_choice = user_choice
-        self.timestamp = datetime.now().isoformat()
+            # 设置当前用户选择
+            self.current_user_choice = user_choice
+            self.timestamp = datetime.now().isoformat()
 
         # 调用运算类获取电脑选择
-        computer_choice = self.processor.compute_choice(user_choice)
+        with instrumentation.stage("predict"):
+            computer_choice = self.processor.compute_choice(user_choice)
         self.current_computer_choice = computer_choice
 
         # 判断游戏结果
-        self.current_result = self._determine_winner(
-            user_choice, computer_choice)
+        with instrumentation.stage("winner"):
+            self.current_result = self._determine_winner(
+                user_choice, computer_choice)
 
         # 返回当前游戏状态
         game_result = {
@@ -130,8 +227,9 @@ class RPSController:
             "timestamp": self.timestamp
         }
 
-        print(
-            f"游戏结果: 用户={user_choice}, 电脑={computer_choice}, 结果={self.current_result}")
+        if self.verbose:
+            logger.debug("游戏结果: 用户=%s, 电脑=%s, 结果=%s",
+                         user_choice, computer_choice, self.current_result)
         return game_result
 
     def _determine_winner(self, user_choice, computer_choice):
@@ -145,14 +243,7 @@ class RPSController:
         Returns:
             str: "user_win", "computer_win", 或 "draw"
         """
-        if user_choice == computer_choice:
-            return "draw"
-        elif (user_choice == "rock" and computer_choice == "scissors") or \
-             (user_choice == "scissors" and computer_choice == "paper") or \
-             (user_choice == "paper" and computer_choice == "rock"):
-            return "user_win"
-        else:
-            return "computer_win"
+        return determine_winner(user_choice, computer_choice)
 
     def method2_save_to_dataset(self):
         """
@@ -162,46 +253,71 @@ class RPSController:
             bool: 保存是否成功
         """
         if not all([self.current_user_choice, self.current_computer_choice, self.current_result]):
-            print("没有完整的游戏记录可保存")
+            if self.verbose:
+                logger.warning("没有完整的游戏记录可保存")
             return False
 
-        # 加载现有数据
-        data = self._load_dataset()
-
         # 创建新记录
         new_record = {
             "user_choice": self.current_user_choice,
             "computer_choice": self.current_computer_choice,
             "result": self.current_result,
-            "timestamp": self.timestamp
+            "timestamp": self.timestamp,
+            "mode": self.mode
         }
 
-        # 添加到记录列表
-        data["game_records"].append(new_record)
-
-        # 更新元数据
-        data["metadata"]["total_games"] += 1
-        if self.current_result == "computer_win":
-            data["metadata"]["computer_wins"] += 1
-        elif self.current_result == "user_win":
-            data["metadata"]["user_wins"] += 1
-        else:
-            data["metadata"]["draws"] += 1
-
-        data["metadata"]["last_updated"] = datetime.now().isoformat()
-
-        # 保存数据
-        success = self._save_dataset(data)
+        instrumentation = self.instrumentation
+        success = True
+        with instrumentation.stage("save"):
+            if self.writer is not None:
+                # 交给后台写入线程，不阻塞界面
+                self.writer.append(new_record)
+            else:
+                # 追加到待写入队列，攒够一批后写入日志（同时更新元数据计数）
+                self.pending_records.append(new_record)
+                if len(self.pending_records) >= self.save_batch_size:
+                    success = self.flush()
+        instrumentation.count("saved_records")
+        # 记录已交给存储（写入失败的记录留在队列中重试），计入统计
+        with instrumentation.stage("statistics"):
+            self.statistics.record(self.current_result, self.timestamp,
+                                   self.mode)
 
         if success:
-            print(f"游戏记录已保存到 {self.filename}")
+            if self.verbose:
+                logger.debug("游戏记录已保存到 %s", self.filename)
             # 通知运算类更新（如果有更新方法）
             if hasattr(self.processor, 'update_with_new_data'):
-                self.processor.update_with_new_data()
-                print("已通知预测器更新模型")
+                with instrumentation.stage("update"):
+                    self.processor.update_with_new_data()
+                if self.verbose:
+                    logger.debug("已通知预测器更新模型")
 
         return success
 
+    def flush(self):
+        """
+        将待写入的记录批量写入数据集
+
+        Returns:
+            bool: 写入是否成功
+        """
+        if self.writer is not None:
+            return self.writer.flush()
+        if not self.pending_records:
+            return True
+        try:
+            with self.instrumentation.stage("flush"):
+                self.store.append_many(self.pending_records)
+        except Exception as e:
+            self.instrumentation.count("flush_errors")
+            logger.error("保存数据集失败: %s", e)
+            return False
+        self.instrumentation.count("flushes")
+        records, self.pending_records = self.pending_records, []
+        self._records_written(records)
+        return True
+
     def method3_get_statistics(self):
         """
         方法3：获取游戏统计数据
@@ -209,12 +325,13 @@ class RPSController:
         Returns:
             dict: 包含各种统计数据的字典
         """
-        data = self._load_dataset()
-        metadata = data["metadata"]
-        total_games = metadata["total_games"]
-        computer_wins = metadata["computer_wins"]
-        user_wins = metadata["user_wins"]
-        draws = metadata["draws"]
+        # 计数来自内存中增量维护的统计，不需要写入或读取数据集
+        metadata = self.store.metadata
+        statistics = self.statistics
+        total_games = statistics.total
+        computer_wins = statistics.counts["computer_win"]
+        user_wins = statistics.counts["user_win"]
+        draws = statistics.counts["draw"]
 
         # 计算胜率
         computer_win_rate = (computer_wins / total_games *
@@ -223,14 +340,16 @@ class RPSController:
                          100) if total_games > 0 else 0
         draw_rate = (draws / total_games * 100) if total_games > 0 else 0
 
-        # 获取处理器信息
-        processor_info = "未知"
-        if hasattr(self.processor, 'get_model_info'):
-            processor_info = self.processor.get_model_info()
-        elif hasattr(self.processor, '__class__'):
-            processor_info = self.processor.__class__.__name__
+        # 获取处理器信息（未加载时不触发加载）
+        processor = self._processor
+        if processor is None:
+            processor_info = describe_mode(self.mode)
+        elif hasattr(processor, 'get_model_info'):
+            processor_info = processor.get_model_info()
+        else:
+            processor_info = processor.__class__.__name__
 
-        statistics = {
+        result = {
             "total_games": total_games,
             "computer_wins": computer_wins,
             "user_wins": user_wins,
@@ -242,10 +361,11 @@ class RPSController:
             "processor_mode": self.mode,
             "processor_type": processor_info,
             "created_date": metadata["created_date"],
-            "last_updated": metadata["last_updated"]
+            "last_updated": statistics.last_timestamp or metadata["last_updated"]
         }
+        result.update(statistics.summary())
 
-        return statistics
+        return result
 
     def change_mode(self, new_mode):
         """
@@ -257,15 +377,32 @@ class RPSController:
         Returns:
             bool: 是否成功更改模式
         """
-        if new_mode not in ["1", "2", "3"]:
-            print(f"无效的模式: {new_mode}")
+        if new_mode not in available_modes():
+            logger.warning("无效的模式: %s", new_mode)
             return False
 
         self.mode = new_mode
+        self._close_processor()
         self._load_processor()
-        print(f"已切换到模式 {new_mode}")
+        if self.verbose:
+            logger.info("已切换到模式 %s", new_mode)
         return True
 
+    def _close_processor(self):
+        """释放当前运算类占用的资源（例如后台训练线程）"""
+        if hasattr(self._processor, 'close'):
+            self._processor.close()
+        self._processor = None
+
+    def close(self):
+        """关闭控制器：写入剩余记录与统计检查点，并释放运算类"""
+        if self.writer is not None:
+            self.writer.close()
+        else:
+            self.flush()
+        self._checkpoint_statistics(force=True)
+        self._close_processor()
+
     def get_processor_info(self):
         """
         获取当前处理器的详细信息
@@ -298,20 +435,29 @@ class RPSController:
             except Exception as e:
                 info["recent_sequence"] = f"获取序列失败: {e}"
 
-        return info
+        if self.writer is not None:
+            info["writer"] = dict(self.writer.stats, pending=len(self.writer))
+        if self.instrumentation.enabled:
+            info["instrumentation"] = self.instrumentation.to_dict()
 
+        return info
 
-class RandomPredictor:
-    """随机策略预测器（模式3）"""
+    def export_metrics(self, format="json"):
+        """
+        导出各阶段耗时直方图与计数
 
-    def __init__(self, data_filename=None):
-        self.actions = ["rock", "scissors", "paper"]
+        Args:
+            format (str): "json" 或 "prometheus"
 
-    def compute_choice(self, user_choice):
-        """随机选择"""
-        choice = random.choice(self.actions)
-        print(f"随机策略选择: {choice}")
-        return choice
+        Returns:
+            str: 对应格式的文本
+        """
+        if format == "prometheus":
+            return self.instrumentation.to_prometheus()
+        if format == "json":
+            return json.dumps(self.instrumentation.to_dict(),
+                              ensure_ascii=False, indent=2)
+        raise ValueError(f"不支持的格式: {format}")
 
 
 # 使用示例
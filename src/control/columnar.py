@@ -0,0 +1,433 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from src.control.logs import get_logger
+from src.control.storage import (
+    RESULT_COUNTERS, GameLogStore, create_empty_metadata)
+
+
+logger = get_logger("columnar")
+
+# 动作与结果编码：一局打包为一个字节 user*9 + computer*3 + result
+ACTIONS = ["rock", "scissors", "paper"]
+RESULTS = ["draw", "user_win", "computer_win"]
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+RESULT_CODES = {result: code for code, result in enumerate(RESULTS)}
+
+# 缺失或无法解析的时间戳（与 numpy.datetime64 的 NaT 相同）
+MISSING_TIME = np.iinfo(np.int64).min
+
+# 记录中的预测器模式（"1".."255"）按数值存为一个字节，0 表示记录没有 mode 字段
+MISSING_MODE = 0
+
+# 打包字节 → 各字段的查表（不合法的记录打包为 INVALID_MOVE）
+INVALID_MOVE = 255
+_CODES = np.arange(27)
+USER_CODES = _CODES // 9
+COMPUTER_CODES = _CODES // 3 % 3
+RESULT_OF = _CODES % 3
+
+# 任意字节 → 用户/电脑动作编码（int8，不合法的字节为 -1），用于整块解码
+USER_OF_BYTE = np.full(256, -1, dtype=np.int8)
+USER_OF_BYTE[:27] = USER_CODES
+COMPUTER_OF_BYTE = np.full(256, -1, dtype=np.int8)
+COMPUTER_OF_BYTE[:27] = COMPUTER_CODES
+
+
+def pack_move(user_choice, computer_choice, result):
+    """
+    把一局的双方动作与结果打包为一个字节
+
+    Returns:
+        int: 0..26，记录不合法时为 INVALID_MOVE
+    """
+    try:
+        return (ACTION_CODES[user_choice] * 9 + ACTION_CODES[computer_choice] * 3
+                + RESULT_CODES[result])
+    except KeyError:
+        return INVALID_MOVE
+
+
+def encode_timestamps(timestamps):
+    """
+    ISO 时间戳字符串 → int64 微秒（按无时区的本地时间，自 1970-01-01 起）
+
+    整体交给 NumPy 向量化解析，个别无法解析的值逐条回退，仍失败记为 MISSING_TIME。
+    """
+    try:
+        return np.array(timestamps, dtype="datetime64[us]").astype(np.int64)
+    except ValueError:
+        encoded = np.empty(len(timestamps), dtype=np.int64)
+        for index, timestamp in enumerate(timestamps):
+            try:
+                encoded[index] = np.datetime64(timestamp, "us").astype(np.int64)
+            except (ValueError, TypeError):
+                encoded[index] = MISSING_TIME
+        return encoded
+
+
+def decode_timestamps(times):
+    """
+    int64 微秒 → ISO 时间戳字符串（与 datetime.isoformat 格式一致），缺失值为 None
+    """
+    times = np.asarray(times, dtype=np.int64)
+    strings = np.datetime_as_string(times.astype("datetime64[us]"), unit="us")
+    strings = strings.astype(object)
+    # datetime.isoformat 在微秒为 0 时省略小数部分
+    whole = (times % 1_000_000 == 0) & (times != MISSING_TIME)
+    strings[whole] = [value[:-7] for value in strings[whole]]
+    strings[times == MISSING_TIME] = None
+    return strings
+
+
+def encode_modes(modes):
+    """
+    记录中的模式 → uint8 数组
+
+    缺失的模式记为 MISSING_MODE；不是 "1".."255" 的模式无法保存，同样记为缺失并记录警告。
+    """
+    encoded = np.zeros(len(modes), dtype=np.uint8)
+    unsupported = set()
+    for index, mode in enumerate(modes):
+        if mode is None:
+            continue
+        text = str(mode)
+        if text.isdigit() and str(int(text)) == text and 1 <= int(text) <= 255:
+            encoded[index] = int(text)
+        else:
+            unsupported.add(text)
+    if unsupported:
+        logger.warning("列式格式无法保存这些模式，导出时将缺少 mode 字段: %s",
+                       ", ".join(sorted(unsupported)))
+    return encoded
+
+
+def pack_records(records):
+    """
+    JSON 对局记录 → 列式数组
+
+    Args:
+        records (list): 包含 user_choice, computer_choice, result, timestamp
+            （以及可选的 mode）的记录
+
+    Returns:
+        tuple: (moves uint8 数组, times int64 数组, modes uint8 数组)
+    """
+    moves = np.fromiter(
+        (pack_move(record.get("user_choice"), record.get("computer_choice"),
+                   record.get("result")) for record in records),
+        dtype=np.uint8, count=len(records))
+    times = encode_timestamps([record.get("timestamp") for record in records])
+    modes = encode_modes([record.get("mode") for record in records])
+    return moves, times, modes
+
+
+def unpack_records(moves, times, modes=None):
+    """
+    列式数组 → JSON 对局记录（与 GameLogStore / 旧版数据集中的记录结构一致）
+
+    Args:
+        modes (ndarray): 模式列，None 表示全部缺失；模式缺失的记录不含 mode 字段
+
+    Returns:
+        list: 对局记录列表（跳过不合法的打包字节）
+    """
+    moves = np.asarray(moves)
+    valid = moves < 27
+    moves = moves[valid]
+    timestamps = decode_timestamps(np.asarray(times)[valid])
+    users = np.array(ACTIONS, dtype=object)[USER_CODES[moves]]
+    computers = np.array(ACTIONS, dtype=object)[COMPUTER_CODES[moves]]
+    results = np.array(RESULTS, dtype=object)[RESULT_OF[moves]]
+    records = [{"user_choice": user, "computer_choice": computer,
+                "result": result, "timestamp": timestamp}
+               for user, computer, result, timestamp
+               in zip(users, computers, results, timestamps)]
+    if modes is not None:
+        for record, mode in zip(records, np.asarray(modes)[valid].tolist()):
+            if mode != MISSING_MODE:
+                record["mode"] = str(mode)
+    return records
+
+
+def summarize(moves):
+    """
+    由打包字节直接计算元数据中的统计计数（向量化）
+
+    Returns:
+        dict: total_games, computer_wins, user_wins, draws
+    """
+    moves = np.asarray(moves)
+    # 先按 256 种字节计数，再把合法的 27 种按结果合并，避免逐局查表
+    counts = np.bincount(RESULT_OF, weights=np.bincount(
+        moves, minlength=256)[:27], minlength=3).astype(np.int64)
+    summary = {"total_games": int(len(moves))}
+    for code, result in enumerate(RESULTS):
+        summary[RESULT_COUNTERS[result]] = int(counts[code])
+    return summary
+
+
+class ColumnarHistory:
+    """
+    列式紧凑对局历史
+
+    三个并行的定长列文件，只追加写入：
+    - ./dataset/<name>.moves.u8：每局 1 字节（user*9 + computer*3 + result）
+    - ./dataset/<name>.times.i64：每局 8 字节的时间戳（int64 微秒，小端）
+    - ./dataset/<name>.modes.u8：每局 1 字节的预测器模式（0 表示缺失）
+    每局共 10 字节；读取时 moves 与 times 按较短者对齐，写入中途退出留下的残缺尾部被忽略。
+    模式列在旧版本写入的数据中可能较短或不存在，超出部分视为缺失。
+    """
+
+    def __init__(self, filename, base_dir="./dataset"):
+        """
+        Args:
+            filename (str): 数据集文件名称，例如 "/solve1/jsq.json"
+            base_dir (str): 数据集根目录
+        """
+        self.filename = filename
+        root, _ = os.path.splitext(base_dir + filename)
+        self.moves_path = root + ".moves.u8"
+        self.times_path = root + ".times.i64"
+        self.modes_path = root + ".modes.u8"
+
+        dir_path = os.path.dirname(self.moves_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+
+    def exists(self):
+        return os.path.exists(self.moves_path)
+
+    def __len__(self):
+        if not self.exists():
+            return 0
+        return min(os.path.getsize(self.moves_path),
+                   os.path.getsize(self.times_path) // 8)
+
+    def mode_count(self):
+        """模式列中的局数（旧版本写入的数据没有模式列时为 0）"""
+        if not os.path.exists(self.modes_path):
+            return 0
+        return os.path.getsize(self.modes_path)
+
+    def append_arrays(self, moves, times, modes=None):
+        """追加列式数组（modes 为 None 表示模式缺失）"""
+        moves = np.ascontiguousarray(moves, dtype=np.uint8)
+        times = np.ascontiguousarray(times, dtype="<i8")
+        if modes is None:
+            modes = np.zeros(len(moves), dtype=np.uint8)
+        modes = np.ascontiguousarray(modes, dtype=np.uint8)
+        # 先补齐上次中途退出留下的残缺尾部，保证各列对齐；
+        # 较短的模式列先用“缺失”补足到已有局数
+        count = len(self)
+        self._truncate(count)
+        padding = count - self.mode_count()
+        with open(self.moves_path, 'ab') as f:
+            f.write(moves.tobytes())
+        with open(self.times_path, 'ab') as f:
+            f.write(times.tobytes())
+        with open(self.modes_path, 'ab') as f:
+            if padding > 0:
+                f.write(bytes(padding))
+            f.write(modes.tobytes())
+
+    def append_many(self, records):
+        """追加 JSON 对局记录"""
+        if records:
+            self.append_arrays(*pack_records(records))
+
+    def _truncate(self, count):
+        for path, width in ((self.moves_path, 1), (self.times_path, 8)):
+            if os.path.exists(path) and os.path.getsize(path) != count * width:
+                with open(path, 'r+b') as f:
+                    f.truncate(count * width)
+        if self.mode_count() > count:
+            with open(self.modes_path, 'r+b') as f:
+                f.truncate(count)
+
+    def load_modes(self, start=0, stop=None):
+        """读入 [start, stop) 范围内的模式（默认到全部局数），模式列较短时补为 MISSING_MODE"""
+        stop = len(self) if stop is None else stop
+        modes = np.zeros(max(0, stop - start), dtype=np.uint8)
+        stored = min(stop, self.mode_count()) - start
+        if stored > 0:
+            modes[:stored] = np.fromfile(self.modes_path, dtype=np.uint8,
+                                         count=stored, offset=start)
+        return modes
+
+    def load(self):
+        """
+        一次性读入两列（10M 局约 90MB，读取为毫秒到几十毫秒级）
+
+        Returns:
+            tuple: (moves uint8 数组, times int64 数组)
+        """
+        count = len(self)
+        if count == 0:
+            return np.empty(0, dtype=np.uint8), np.empty(0, dtype=np.int64)
+        moves = np.fromfile(self.moves_path, dtype=np.uint8, count=count)
+        times = np.fromfile(self.times_path, dtype="<i8", count=count)
+        return moves, times
+
+    def open(self):
+        """
+        以内存映射方式打开（只映射，不读取）
+
+        Returns:
+            MappedHistory: 只读视图
+        """
+        return MappedHistory(self)
+
+    def to_records(self):
+        """读取为 JSON 对局记录"""
+        moves, times = self.load()
+        return unpack_records(moves, times, self.load_modes(0, len(moves)))
+
+    def to_legacy(self, metadata=None):
+        """
+        导出为旧版 JSON 数据集结构
+
+        Args:
+            metadata (dict): 元数据（例如 created_date），None 时新建，计数按列重新计算
+        """
+        moves, times = self.load()
+        metadata = dict(metadata or create_empty_metadata())
+        metadata.pop("log_bytes", None)
+        metadata.update(summarize(moves))
+        return {"metadata": metadata,
+                "game_records": unpack_records(
+                    moves, times, self.load_modes(0, len(moves)))}
+
+
+class MappedHistory:
+    """
+    列式历史的内存映射只读视图
+
+    打开时只映射文件、不读取数据：推理取最近 K 局是零拷贝视图，
+    训练按块解码，任何时候都不需要把全部历史变成 Python 对象。
+    视图是打开那一刻的快照，之后追加的局需要重新打开才能看到。
+    """
+
+    def __init__(self, columns):
+        """
+        Args:
+            columns (ColumnarHistory): 列式历史
+        """
+        self.columns = columns
+        self.count = len(columns)
+        if self.count:
+            self.moves = np.memmap(columns.moves_path, dtype=np.uint8,
+                                   mode='r', shape=(self.count,))
+            self.times = np.memmap(columns.times_path, dtype="<i8",
+                                   mode='r', shape=(self.count,))
+        else:
+            self.moves = np.empty(0, dtype=np.uint8)
+            self.times = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return self.count
+
+    def tail(self, k):
+        """
+        最近 k 局的打包字节与时间戳（零拷贝视图）
+
+        Returns:
+            tuple: (moves, times)
+        """
+        start = max(0, self.count - k)
+        return self.moves[start:], self.times[start:]
+
+    def user_codes(self, start=0, stop=None):
+        """解码 [start, stop) 范围内的用户动作编码（int8，跳过不合法的记录）"""
+        codes = USER_OF_BYTE[self.moves[start:stop]]
+        return codes[codes >= 0]
+
+    def computer_codes(self, start=0, stop=None):
+        """解码 [start, stop) 范围内的电脑动作编码（int8，跳过不合法的记录）"""
+        codes = COMPUTER_OF_BYTE[self.moves[start:stop]]
+        return codes[codes >= 0]
+
+    def count_valid(self, start=0, stop=None):
+        """[start, stop) 范围内合法记录的局数"""
+        return int(np.count_nonzero(self.moves[start:stop] < 27))
+
+    def iter_user_codes(self, start=0, chunk_size=1 << 20):
+        """从 start 开始按块解码用户动作编码，每块最多 chunk_size 局"""
+        for offset in range(start, self.count, chunk_size):
+            yield self.user_codes(offset, offset + chunk_size)
+
+    def tail_records(self, k):
+        """最近 k 局的 JSON 对局记录"""
+        moves, times = self.tail(k)
+        modes = self.columns.load_modes(self.count - len(moves), self.count)
+        return unpack_records(moves, times, modes)
+
+
+def convert_to_columnar(filename, base_dir="./dataset", chunk_size=100000):
+    """
+    把数据集（JSONL 日志，首次打开时自动导入旧版 JSON）转换为列式历史
+
+    Returns:
+        ColumnarHistory: 新写入的列式历史
+    """
+    store = GameLogStore(filename, base_dir=base_dir)
+    history = ColumnarHistory(filename, base_dir=base_dir)
+    history._truncate(0)
+
+    chunk = []
+    for record in store.iter_records():
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            history.append_many(chunk)
+            chunk = []
+    history.append_many(chunk)
+    return history
+
+
+def convert_to_json(filename, path=None, base_dir="./dataset"):
+    """
+    把列式历史导出为旧版 JSON 数据集文件
+
+    Returns:
+        str: 写入的文件路径
+    """
+    history = ColumnarHistory(filename, base_dir=base_dir)
+    path = path or base_dir + filename
+
+    # 保留原数据集的创建时间等元数据（统计计数按列重新计算）
+    metadata = None
+    meta_path = os.path.splitext(base_dir + filename)[0] + ".meta.json"
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+
+    dir_path = os.path.dirname(path)
+    if dir_path:
+        os.makedirs(dir_path, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(history.to_legacy(metadata), f, ensure_ascii=False, indent=2)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JSON 数据集与列式紧凑格式互相转换")
+    parser.add_argument("direction", choices=["to-columnar", "to-json"],
+                        help="转换方向")
+    parser.add_argument("dataset", help="数据集文件名称，例如 /solve1/jsq.json")
+    parser.add_argument("--output", default=None,
+                        help="to-json 时的输出路径，默认写回 ./dataset<dataset>")
+    args = parser.parse_args(argv)
+
+    if args.direction == "to-columnar":
+        history = convert_to_columnar(args.dataset)
+        print(f"已写入 {len(history)} 局: {history.moves_path}, {history.times_path}")
+    else:
+        path = convert_to_json(args.dataset, args.output)
+        print(f"已导出: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import argparse
+import json
+import sys
+
+from src.control.RPSController import RPSController
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="查看石头剪刀布数据集统计（不加载预测器及其依赖）")
+    parser.add_argument("dataset", help="数据集文件名称，例如 /solve1/jsq.json")
+    parser.add_argument("--mode", default="1", help="显示为哪个模式的统计")
+    parser.add_argument("--tail", type=int, default=0,
+                        help="同时显示最近 N 条对局记录")
+    args = parser.parse_args(argv)
+
+    controller = RPSController(filename=args.dataset, mode=args.mode,
+                               verbose=False, lazy_load=True)
+    statistics = controller.method3_get_statistics()
+    print(json.dumps(statistics, ensure_ascii=False, indent=2))
+
+    if args.tail > 0:
+        # 只映射列式历史的尾部，不解析整个日志
+        records = controller.store.open_history().tail_records(args.tail)
+        for record in records:
+            print(json.dumps(record, ensure_ascii=False))
+
+    # 统计工具不应导入 torch
+    if "torch" in sys.modules:
+        print("警告: 统计过程中导入了 torch")
+
+
+if __name__ == "__main__":
+    main()
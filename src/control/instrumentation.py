@@ -0,0 +1,221 @@
+import bisect
+import cProfile
+import io
+import pstats
+import time
+
+
+# 直方图桶的上界（秒）：1 微秒起按 2 倍递增，约到 16 秒
+BUCKET_BOUNDS = [1e-6 * 2 ** index for index in range(25)]
+
+
+class LatencyHistogram:
+    """
+    固定对数桶的耗时直方图
+
+    记录一次耗时为 O(log 桶数)，内存固定；分位数按桶上界估计。
+    """
+
+    def __init__(self, bounds=BUCKET_BOUNDS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)  # 最后一个桶为 +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.buckets[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """分位数的估计值（秒）：累计计数达到 q 的桶的上界"""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.buckets):
+            cumulative += count
+            if cumulative >= target:
+                return self.bounds[index] if index < len(self.bounds) \
+                    else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_us": round(self.total / self.count * 1e6, 2)
+            if self.count else 0.0,
+            "p50_us": round(self.quantile(0.5) * 1e6, 2),
+            "p90_us": round(self.quantile(0.9) * 1e6, 2),
+            "p99_us": round(self.quantile(0.99) * 1e6, 2),
+            "max_us": round(self.max * 1e6, 2)
+        }
+
+
+class _Stage:
+    """一个阶段的计时上下文（同一阶段不在多个线程中同时计时）"""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _NullStage:
+    """关闭计时时使用的空上下文"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+
+class Instrumentation:
+    """
+    热路径计时与计数
+
+    用法：
+        with instrumentation.stage("predict"):
+            ...
+        instrumentation.count("rounds")
+    关闭时 stage() 返回共享的空上下文、count() 直接返回，每次调用只剩一次属性判断。
+    结果可通过 to_dict() 以 JSON 输出，或 to_prometheus() 以 Prometheus 文本格式输出。
+    """
+
+    def __init__(self, enabled=False):
+        """
+        Args:
+            enabled (bool): 是否记录计时与计数
+        """
+        self.enabled = enabled
+        self.histograms = {}
+        self.stages = {}
+        self.counters = {}
+        self.profiler = None
+
+    def stage(self, name):
+        """
+        阶段计时上下文
+
+        Args:
+            name (str): 阶段名称，例如 "predict"
+        """
+        if not self.enabled:
+            return NULL_STAGE
+        stage = self.stages.get(name)
+        if stage is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+            stage = self.stages[name] = _Stage(histogram)
+        return stage
+
+    def observe(self, name, seconds):
+        """直接记录一次耗时（例如在其他线程中测得的）"""
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+            self.stages[name] = _Stage(histogram)
+        histogram.observe(seconds)
+
+    def count(self, name, value=1):
+        """计数器加 value"""
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def reset(self):
+        """清空全部计时与计数"""
+        self.histograms = {}
+        self.stages = {}
+        self.counters = {}
+
+    def start_profile(self):
+        """开始 cProfile 采集（与计时开关无关）"""
+        if self.profiler is None:
+            self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def stop_profile(self, path=None, limit=20, sort="cumulative"):
+        """
+        停止 cProfile 采集
+
+        Args:
+            path (str): 保存原始统计数据的路径（可用 snakeviz 等工具查看），None 表示不保存
+            limit (int): 返回的文本中列出的函数数
+            sort (str): 排序字段
+
+        Returns:
+            str: 耗时最多的函数列表
+        """
+        if self.profiler is None:
+            return ""
+        self.profiler.disable()
+        if path is not None:
+            self.profiler.dump_stats(path)
+        output = io.StringIO()
+        pstats.Stats(self.profiler, stream=output).sort_stats(sort) \
+            .print_stats(limit)
+        self.profiler = None
+        return output.getvalue()
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: enabled, stages（各阶段计数与耗时分位数）, counters
+        """
+        return {
+            "enabled": self.enabled,
+            "stages": {name: histogram.to_dict() for name, histogram
+                       in sorted(self.histograms.items())},
+            "counters": dict(sorted(self.counters.items()))
+        }
+
+    def to_prometheus(self, prefix="rps"):
+        """
+        Prometheus 文本格式（阶段耗时为 histogram，计数器为 counter）
+
+        Returns:
+            str: 可直接由 /metrics 之类的接口返回的文本
+        """
+        lines = []
+        if self.histograms:
+            metric = f"{prefix}_stage_duration_seconds"
+            lines.append(f"# HELP {metric} 各阶段耗时")
+            lines.append(f"# TYPE {metric} histogram")
+            for name, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.bounds, histogram.buckets):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{stage="{name}",le="{bound:.6g}"}} '
+                                 f'{cumulative}')
+                lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} '
+                             f'{histogram.count}')
+                lines.append(f'{metric}_sum{{stage="{name}"}} {histogram.total:.9g}')
+                lines.append(f'{metric}_count{{stage="{name}"}} {histogram.count}')
+        if self.counters:
+            metric = f"{prefix}_events_total"
+            lines.append(f"# HELP {metric} 事件计数")
+            lines.append(f"# TYPE {metric} counter")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f'{metric}{{event="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
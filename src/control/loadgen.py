@@ -0,0 +1,115 @@
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from src.control.opponents import OPPONENTS, create_opponent
+from src.control.server import add_manager_arguments, create_server
+
+
+async def run_client(host, port, player_id, opponent, rounds, seed,
+                     latencies):
+    """
+    一个模拟客户端：建立一条连接，由脚本化对手连续出拳 rounds 局
+
+    Returns:
+        int: 出错的请求数
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    player = create_opponent(opponent, seed=seed)
+    errors = 0
+    try:
+        for _ in range(rounds):
+            user_choice = player.next_move()
+            request = {"op": "play", "player": player_id, "choice": user_choice}
+            start = time.perf_counter()
+            writer.write(json.dumps(request).encode("utf-8") + b"\n")
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - start)
+
+            if not response.get("ok"):
+                errors += 1
+                continue
+            player.observe(user_choice, response["result"]["computer_choice"])
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return errors
+
+
+async def run_load(host, port, clients=32, rounds=200, opponent="markov",
+                   seed=0, prefix="load"):
+    """
+    并发运行多个模拟客户端并统计吞吐与延迟
+
+    Returns:
+        dict: 总局数、每秒局数、延迟分位数（毫秒）与错误数
+    """
+    latencies = []
+    start = time.perf_counter()
+    errors = await asyncio.gather(*[
+        run_client(host, port, f"{prefix}{index}", opponent, rounds,
+                   seed + index, latencies)
+        for index in range(clients)])
+    elapsed = time.perf_counter() - start
+
+    total = len(latencies)
+    p50, p90, p99 = (np.percentile(latencies, [50, 90, 99]) * 1000
+                     if total else (0.0, 0.0, 0.0))
+    return {
+        "clients": clients,
+        "rounds": total,
+        "elapsed_seconds": round(elapsed, 3),
+        "rounds_per_sec": round(total / elapsed, 1) if elapsed > 0 else None,
+        "p50_ms": round(float(p50), 3),
+        "p90_ms": round(float(p90), 3),
+        "p99_ms": round(float(p99), 3),
+        "errors": sum(errors)
+    }
+
+
+async def main_async(args):
+    server = None
+    port = args.port
+    if args.serve:
+        # 在同一进程中启动服务（随机端口），便于直接评估某个配置
+        server = create_server(args)
+        port = await server.start(args.host, 0)
+
+    try:
+        result = await run_load(args.host, port, clients=args.clients,
+                                rounds=args.rounds, opponent=args.opponent,
+                                seed=args.seed)
+        if server is not None:
+            result["server"] = await asyncio.get_running_loop().run_in_executor(
+                None, server.manager.memory_report)
+    finally:
+        if server is not None:
+            await server.close()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="石头剪刀布服务压测：模拟 N 个并发客户端，统计吞吐与延迟分位数")
+    parser.add_argument("--host", default="127.0.0.1", help="服务地址")
+    parser.add_argument("--port", type=int, default=8765, help="服务端口")
+    parser.add_argument("--clients", type=int, default=32, help="并发客户端数")
+    parser.add_argument("--rounds", type=int, default=200, help="每个客户端的局数")
+    parser.add_argument("--opponent", default="markov",
+                        help=f"客户端出拳策略: {', '.join(OPPONENTS)}")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--serve", action="store_true",
+                        help="在本进程中启动服务后再压测（使用下列服务参数）")
+    add_manager_arguments(parser)
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(main_async(args))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import logging
+import sys
+from collections import deque
+
+
+# 所有组件日志器的公共前缀，例如 "rps.controller"、"rps.ngram"
+ROOT_LOGGER = "rps"
+
+LEVELS = {"DEBUG": logging.DEBUG, "INFO": logging.INFO,
+          "WARNING": logging.WARNING, "ERROR": logging.ERROR,
+          "OFF": logging.CRITICAL + 1}
+
+_root = logging.getLogger(ROOT_LOGGER)
+_root.propagate = False
+
+# 默认与原先的 print 输出一致：只输出消息本身，写到标准输出
+_console = logging.StreamHandler(sys.stdout)
+_console.setFormatter(logging.Formatter("%(message)s"))
+_root.addHandler(_console)
+_root.setLevel(logging.DEBUG)
+
+_ring = None
+
+
+def get_logger(component):
+    """
+    组件日志器
+
+    每局的预测与保存信息为 DEBUG，加载与训练进度为 INFO，失败为 WARNING / ERROR。
+    消息使用 % 占位符，只有在确实输出时才格式化。
+
+    Args:
+        component (str): 组件名称，例如 "controller"、"ngram"
+    """
+    return logging.getLogger(f"{ROOT_LOGGER}.{component}")
+
+
+def _level(value):
+    if isinstance(value, int):
+        return value
+    return LEVELS[str(value).upper()]
+
+
+class RingBufferHandler(logging.Handler):
+    """
+    只在内存中保留最近 capacity 条日志的处理器
+
+    不做任何 I/O，也不在记录时格式化；调试时用 lines() 取出最近的每局轨迹。
+    """
+
+    def __init__(self, capacity=1000, level=logging.DEBUG):
+        super().__init__(level)
+        self.records = deque(maxlen=capacity)
+        self.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def lines(self, limit=None):
+        """格式化最近的 limit 条日志（None 表示全部）"""
+        records = list(self.records)
+        if limit is not None:
+            records = records[-limit:]
+        return [self.format(record) for record in records]
+
+    def clear(self):
+        self.records.clear()
+
+
+def configure_logging(console_level="DEBUG", levels=None, ring_buffer=0):
+    """
+    配置日志输出
+
+    Args:
+        console_level (str): 输出到标准输出的最低级别，"OFF" 表示不输出
+        levels (dict): 各组件的级别，例如 {"neural": "INFO", "controller": "OFF"}
+        ring_buffer (int): 大于 0 时在内存中保留最近这么多条日志（含 DEBUG）
+
+    Returns:
+        RingBufferHandler: 内存缓冲处理器，未启用时为 None
+    """
+    global _ring
+
+    console_level = _level(console_level)
+    _console.setLevel(console_level)
+    if console_level > logging.CRITICAL:
+        _root.removeHandler(_console)
+    elif _console not in _root.handlers:
+        _root.addHandler(_console)
+
+    if _ring is not None:
+        _root.removeHandler(_ring)
+        _ring = None
+    if ring_buffer > 0:
+        _ring = RingBufferHandler(ring_buffer)
+        _root.addHandler(_ring)
+
+    # 根日志器的级别取各处理器中最低的，全部关闭时日志调用在级别判断处直接返回
+    active = [handler.level for handler in _root.handlers]
+    _root.setLevel(min(active) if active else LEVELS["OFF"])
+
+    for component, level in (levels or {}).items():
+        get_logger(component).setLevel(_level(level))
+    return _ring
+
+
+def ring_buffer():
+    """当前的内存缓冲处理器（未启用时为 None）"""
+    return _ring
@@ -0,0 +1,149 @@
+import random
+
+
+ACTIONS = ["rock", "scissors", "paper"]
+
+# 能赢某个动作的动作
+WINNING_ACTIONS = {
+    "rock": "paper",
+    "scissors": "rock",
+    "paper": "scissors"
+}
+
+
+class ScriptedOpponent:
+    """
+    脚本化对手（模拟用户）基类
+
+    next_move() 给出本局用户动作，observe() 接收本局双方动作，用于更新对手状态。
+    reactive 为 False 的对手不依赖电脑的动作，整段动作序列可以预先生成。
+    """
+
+    name = "base"
+    reactive = False
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.last_user = None
+        self.last_computer = None
+
+    def next_move(self):
+        raise NotImplementedError
+
+    def observe(self, user_choice, computer_choice):
+        """记录本局双方动作"""
+        self.last_user = user_choice
+        self.last_computer = computer_choice
+
+
+class RandomOpponent(ScriptedOpponent):
+    """均匀随机出拳"""
+
+    name = "random"
+
+    def next_move(self):
+        return self.rng.choice(ACTIONS)
+
+
+class CyclicOpponent(ScriptedOpponent):
+    """按固定序列循环出拳"""
+
+    name = "cyclic"
+
+    def __init__(self, seed=None, sequence=("rock", "scissors", "paper")):
+        super().__init__(seed)
+        self.sequence = list(sequence)
+        self.position = 0
+
+    def next_move(self):
+        move = self.sequence[self.position]
+        self.position = (self.position + 1) % len(self.sequence)
+        return move
+
+
+class BiasedOpponent(ScriptedOpponent):
+    """按固定概率分布出拳"""
+
+    name = "biased"
+
+    def __init__(self, seed=None, weights=(0.5, 0.3, 0.2)):
+        super().__init__(seed)
+        self.weights = list(weights)
+
+    def next_move(self):
+        return self.rng.choices(ACTIONS, weights=self.weights)[0]
+
+
+class MarkovOpponent(ScriptedOpponent):
+    """一阶马尔可夫链：本局动作只依赖上一局用户动作"""
+
+    name = "markov"
+
+    def __init__(self, seed=None, transitions=None, stickiness=0.6):
+        """
+        Args:
+            transitions (dict): {上一动作: [下一动作为 rock/scissors/paper 的概率]}，
+                                为空时随机生成一个转移矩阵
+            stickiness (float): 随机生成时，每行中随机选定的优势动作概率
+        """
+        super().__init__(seed)
+        if transitions is None:
+            transitions = {}
+            for action in ACTIONS:
+                row = [(1 - stickiness) / 2] * 3
+                row[self.rng.randrange(3)] = stickiness
+                transitions[action] = row
+        self.transitions = transitions
+
+    def next_move(self):
+        if self.last_user is None:
+            return self.rng.choice(ACTIONS)
+        return self.rng.choices(ACTIONS,
+                                weights=self.transitions[self.last_user])[0]
+
+
+class CopyLastOpponent(ScriptedOpponent):
+    """重复电脑上一局的动作"""
+
+    name = "copy-last"
+    reactive = True
+
+    def next_move(self):
+        if self.last_computer is None:
+            return self.rng.choice(ACTIONS)
+        return self.last_computer
+
+
+class BeatLastOpponent(ScriptedOpponent):
+    """出能赢电脑上一局动作的拳"""
+
+    name = "beat-last"
+    reactive = True
+
+    def next_move(self):
+        if self.last_computer is None:
+            return self.rng.choice(ACTIONS)
+        return WINNING_ACTIONS[self.last_computer]
+
+
+OPPONENTS = {
+    opponent.name: opponent
+    for opponent in (RandomOpponent, CyclicOpponent, BiasedOpponent,
+                     MarkovOpponent, CopyLastOpponent, BeatLastOpponent)
+}
+
+
+def create_opponent(name, seed=None, **kwargs):
+    """
+    按名称创建脚本化对手
+
+    Args:
+        name (str): 对手名称，见 OPPONENTS
+        seed (int): 随机种子
+
+    Returns:
+        ScriptedOpponent: 对手实例
+    """
+    if name not in OPPONENTS:
+        raise ValueError(f"未知的对手策略: {name}。可选: {list(OPPONENTS)}")
+    return OPPONENTS[name](seed=seed, **kwargs)
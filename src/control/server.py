@@ -0,0 +1,178 @@
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from src.control.logs import get_logger
+from src.control.sessions import SessionManager
+from src.solve.config import PredictorConfig
+
+
+logger = get_logger("server")
+
+
+class GameServer:
+    """
+    石头剪刀布网络服务（asyncio，按行分隔的 JSON 请求/响应）
+
+    每行一个请求，服务端按顺序对每行返回一行响应：
+        {"op": "play", "player": "p1", "choice": "rock"}
+            → {"ok": true, "result": {"user_choice": ..., "computer_choice": ..., "result": ..., "timestamp": ...}}
+        {"op": "stats", "player": "p1"}  → {"ok": true, "result": {...玩家统计...}}
+        {"op": "info"}                   → {"ok": true, "result": {...会话内存与批处理统计...}}
+        {"op": "ping"}                   → {"ok": true, "result": "pong"}
+    请求中的 "id" 字段会原样带回。出错时返回 {"ok": false, "error": "..."}，
+    连接保持打开；请求本身不合法以外的错误（磁盘、批处理等）同时记录日志。
+    预测与存储都是阻塞调用，交给线程池执行，事件循环只负责网络读写。
+    """
+
+    def __init__(self, manager, workers=8):
+        """
+        Args:
+            manager (SessionManager): 多玩家会话管理器
+            workers (int): 执行阻塞调用的线程数
+        """
+        self.manager = manager
+        self.executor = ThreadPoolExecutor(max_workers=workers,
+                                           thread_name_prefix="rps-server")
+        self.server = None
+        self.connections = 0
+        self.requests = 0
+
+    async def start(self, host="127.0.0.1", port=8765):
+        """开始监听，返回实际监听的端口（port 为 0 时由系统分配）"""
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def _handle(self, reader, writer):
+        """处理一个客户端连接上的全部请求"""
+        self.connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await self._dispatch(line)
+                writer.write(json.dumps(response, ensure_ascii=False)
+                             .encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _dispatch(self, line):
+        """解析并执行一个请求（任何异常都转换为错误响应）"""
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise TypeError(f"请求必须是 JSON 对象: {line.strip()[:80]!r}")
+            request_id = request.get("id")
+            op = request.get("op")
+            loop = asyncio.get_running_loop()
+
+            if op == "play":
+                result = await loop.run_in_executor(
+                    self.executor, self.manager.play,
+                    str(request["player"]), request["choice"])
+            elif op == "stats":
+                result = await loop.run_in_executor(
+                    self.executor, self.manager.get_statistics,
+                    str(request["player"]))
+            elif op == "info":
+                result = await loop.run_in_executor(
+                    self.executor, self.manager.memory_report)
+            elif op == "ping":
+                result = "pong"
+            else:
+                raise ValueError(f"未知的请求类型: {op}")
+
+            self.requests += 1
+            response = {"ok": True, "result": result}
+        except KeyError as e:
+            response = {"ok": False, "error": f"缺少字段: {e.args[0]}"}
+        except (ValueError, TypeError) as e:
+            # 请求本身不合法（含 JSON 解析错误），只返回给客户端
+            response = {"ok": False, "error": str(e)}
+        except Exception as e:
+            # 服务端错误（写盘失败、批处理器已关闭等）：记录日志，连接保持打开
+            logger.exception("处理请求失败: %s", line.strip()[:200])
+            response = {"ok": False,
+                        "error": f"{e.__class__.__name__}: {e}"}
+
+        if request_id is not None:
+            response["id"] = request_id
+        return response
+
+    async def close(self):
+        """停止监听，等待线程池中的调用结束并保存全部会话"""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.executor.shutdown)
+        await loop.run_in_executor(None, self.manager.close)
+
+
+def add_manager_arguments(parser):
+    """添加会话管理器相关的命令行参数"""
+    parser.add_argument("--mode", default="4", help="预测器模式")
+    parser.add_argument("--subdir", default="/sessions",
+                        help="会话数据集子目录（相对 ./dataset）")
+    parser.add_argument("--max-sessions", type=int, default=1024,
+                        help="内存中最多保留的会话数")
+    parser.add_argument("--save-batch-size", type=int, default=50,
+                        help="每个会话累积多少条记录后写入一次")
+    parser.add_argument("--batch-window-ms", type=float, default=None,
+                        help="神经网络模式的微批推理窗口（毫秒）")
+    parser.add_argument("--max-batch", type=int, default=64,
+                        help="微批推理每批最多的请求数")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="执行阻塞调用的线程数")
+    PredictorConfig.add_arguments(parser)
+
+
+def create_server(args):
+    """根据命令行参数创建服务"""
+    manager = SessionManager(mode=args.mode, subdir=args.subdir,
+                             max_sessions=args.max_sessions,
+                             save_batch_size=args.save_batch_size,
+                             batch_window_ms=args.batch_window_ms,
+                             max_batch=args.max_batch,
+                             predictor_options={
+                                 "config": PredictorConfig.from_args(args)})
+    return GameServer(manager, workers=args.workers)
+
+
+async def run(args):
+    server = create_server(args)
+    port = await server.start(args.host, args.port)
+    print(f"石头剪刀布服务已启动: {args.host}:{port} (模式{args.mode})")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+        print("服务已关闭，会话已保存")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="石头剪刀布网络服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    add_manager_arguments(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
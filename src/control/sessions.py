@@ -0,0 +1,549 @@
+import json
+import os
+import random
+import re
+import sys
+import threading
+import types
+from array import array
+from collections import OrderedDict, deque
+from datetime import datetime
+
+import numpy as np
+
+from src.control.RPSController import determine_winner
+from src.control.logs import get_logger
+from src.control.storage import GameLogStore
+from src.solve.batching import MicroBatcher
+from src.solve.features import ACTION_TO_CODE, ACTIONS
+from src.solve.registry import create_predictor, load_predictor_class
+
+
+logger = get_logger("sessions")
+
+# 能赢某动作编码的动作
+WINNING_ACTIONS = ["paper", "rock", "scissors"]
+
+# deep_sizeof 视为共享代码、不计入会话内存的类型
+SHARED_CODE_TYPES = (type, types.ModuleType, types.FunctionType,
+                     types.MethodType, types.BuiltinFunctionType)
+
+# 会话 ID 只允许作为文件名安全的字符
+PLAYER_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# 会话状态旁路文件的后缀与格式版本
+SESSION_STATE_SUFFIX = ".session.npz"
+SESSION_STATE_VERSION = 1
+
+
+def pack_state(state, arrays):
+    """
+    把预测器状态拆为 JSON 结构与 NumPy 数组
+
+    数组放入 arrays，在 JSON 结构中以 {"__array__": 名称} 引用。
+
+    Raises:
+        TypeError: 状态中含有既不是数组也不能写成 JSON 的值
+    """
+    if isinstance(state, np.ndarray):
+        name = f"a{len(arrays)}"
+        arrays[name] = state
+        return {"__array__": name}
+    if isinstance(state, np.generic):
+        return state.item()
+    if isinstance(state, dict):
+        return {str(key): pack_state(value, arrays)
+                for key, value in state.items()}
+    if isinstance(state, (list, tuple)):
+        return [pack_state(item, arrays) for item in state]
+    if state is None or isinstance(state, (str, int, float, bool)):
+        return state
+    raise TypeError(f"无法保存的会话状态类型: {type(state).__name__}")
+
+
+def unpack_state(packed, arrays):
+    """pack_state 的逆操作"""
+    if isinstance(packed, dict):
+        if set(packed) == {"__array__"}:
+            return arrays[packed["__array__"]]
+        return {key: unpack_state(value, arrays)
+                for key, value in packed.items()}
+    if isinstance(packed, list):
+        return [unpack_state(item, arrays) for item in packed]
+    return packed
+
+
+def save_session_state(path, payload):
+    """
+    原子地写入会话状态（.npz：JSON 元数据 + NumPy 数组，读取时不需要 pickle）
+
+    写入失败时删除临时文件并抛出异常，原有的状态文件保持不变。
+    """
+    arrays = {}
+    meta = json.dumps(pack_state(payload, arrays), ensure_ascii=False)
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, __meta__=np.array(meta), **arrays)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_session_state(path):
+    """读取 save_session_state 写入的会话状态（禁止 pickle，不执行任何代码）"""
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files
+                  if name != "__meta__"}
+        meta = json.loads(str(data["__meta__"]))
+    return unpack_state(meta, arrays)
+
+
+def deep_sizeof(obj, seen=None):
+    """
+    估算对象及其引用的全部对象占用的字节数
+
+    NumPy 数组按数据缓冲区计算（视图不重复计算），array 与 bytes 按缓冲区计算，
+    类、模块、函数与解释器缓存的小整数由全体共享，不计入。
+
+    Args:
+        obj (object): 要测量的对象
+        seen (set): 已计入（或需要排除）的对象 id
+
+    Returns:
+        int: 字节数
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or isinstance(obj, SHARED_CODE_TYPES):
+        return 0
+    if type(obj) is int and -5 <= obj <= 256:
+        # CPython 缓存的小整数由所有对象共享
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, np.ndarray):
+        return size if obj.base is None else size + deep_sizeof(obj.base, seen)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, array)):
+        return size
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen)
+                    for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+
+    if hasattr(obj, "__dict__"):
+        size += deep_sizeof(obj.__dict__, seen)
+    for slot in getattr(type(obj), "__slots__", ()):
+        if hasattr(obj, slot):
+            size += deep_sizeof(getattr(obj, slot), seen)
+    return size
+
+
+class SharedModelSession:
+    """
+    共享神经网络模型的会话预测器
+
+    会话只保存最近 window 个动作编码（默认 10 字节），预测与训练都交给所有会话共用的模型，
+    每局的 (最近 window 个动作, 本局动作) 作为样本加入共享模型的在线学习。
+    提供 batcher 时，预测请求交给微批调度器，与其他会话的请求合并为一次前向计算。
+    """
+
+    __slots__ = ("model", "codes", "batcher")
+
+    def __init__(self, model, codes=b"", batcher=None):
+        self.model = model
+        self.codes = bytes(codes[-model.window:])
+        self.batcher = batcher
+
+    def compute_choice(self, user_choice):
+        code = ACTION_TO_CODE[user_choice]
+        if self.batcher is not None:
+            predicted = self.batcher.predict(self.codes)
+        else:
+            predicted = self.model.predict_context(self.codes)
+        self.model.add_sample(self.codes, code)
+        self.codes = (self.codes + bytes((code,)))[-self.model.window:]
+        if predicted < 0:
+            return random.choice(ACTIONS)
+        return WINNING_ACTIONS[predicted]
+
+    def update_with_new_data(self):
+        self.model.update_with_new_data()
+
+    def get_recent_sequence(self):
+        return [ACTIONS[code] for code in self.codes]
+
+
+class PlayerSession:
+    """单个玩家的会话：预测器状态、数据集存储与待写入记录"""
+
+    __slots__ = ("player_id", "predictor", "store", "pending", "lock",
+                 "closed")
+
+    def __init__(self, player_id, predictor, store):
+        self.player_id = player_id
+        self.predictor = predictor
+        self.store = store
+        self.pending = []
+        self.lock = threading.Lock()
+        self.closed = False
+
+
+class SessionManager:
+    """
+    多玩家会话管理器：一个进程同时服务大量玩家
+
+    每个玩家拥有独立的预测器状态与数据集（./dataset<subdir>/<player_id>.jsonl）。
+    内存中最多保留 max_sessions 个会话，按最近使用（LRU）淘汰：
+    淘汰时写入剩余记录，并把预测器的 get_state() 保存到数据集旁的 .session.npz
+    （JSON 与 NumPy 数组，不使用 pickle），再次访问时用 set_state() 恢复；
+    旁路文件与日志不一致或无法恢复时从日志重建。
+    神经网络模式（1、2）的所有会话共用一个模型，会话本身只保存最近 window 个动作，
+    共享模型的状态在 close() 时保存到会话目录下的 shared-model.<类名>.npz，下次启动时恢复；
+    设置 batch_window_ms 时，并发会话的预测请求经微批调度器合并为批量前向计算。
+    """
+
+    def __init__(self, mode="4", subdir="/sessions", max_sessions=1024,
+                 save_batch_size=50, background_training=True,
+                 predictor_options=None, base_dir="./dataset",
+                 batch_window_ms=None, max_batch=64):
+        """
+        Args:
+            mode (str): 预测器模式
+            subdir (str): 会话数据集所在的子目录（相对 base_dir）
+            max_sessions (int): 内存中最多保留的会话数
+            save_batch_size (int): 每个会话累积多少条记录后写入一次
+            background_training (bool): 共享模型是否在后台线程中训练
+            predictor_options (dict): 传给每个会话预测器的额外选项
+            base_dir (str): 数据集根目录
+            batch_window_ms (float): 共享模型微批推理的窗口（毫秒），None 表示逐个推理
+            max_batch (int): 微批推理每批最多的请求数
+        """
+        self.mode = mode
+        self.subdir = subdir.rstrip("/")
+        self.max_sessions = max(1, max_sessions)
+        self.save_batch_size = max(1, save_batch_size)
+        self.predictor_options = dict(predictor_options or {})
+        self.base_dir = base_dir
+
+        self.sessions = OrderedDict()
+        # 正在打开或淘汰的玩家 → 完成时触发的事件；期间同一玩家的请求等待，
+        # 否则新会话会在淘汰写入前读取日志，两个存储对象交错写入同一日志
+        self.reserved = {}
+        self.lock = threading.Lock()
+        self.stats = {"created": 0, "restored": 0, "rebuilt": 0, "evicted": 0}
+
+        # 支持 predict_context 的预测器（神经网络）在所有会话间共享，
+        # 状态保存在会话目录下（玩家 ID 不含 "."，不会与会话文件重名）
+        self.shared_model = None
+        self.shared_state_path = None
+        predictor_class = load_predictor_class(mode)
+        if hasattr(predictor_class, "predict_context"):
+            self.shared_model = create_predictor(
+                mode, None, verbose=False, background=background_training,
+                **self.predictor_options)
+            self.shared_state_path = (f"{base_dir}{self.subdir}/shared-model."
+                                      f"{predictor_class.__name__}.npz")
+            self._load_shared_model()
+
+        self.batcher = None
+        if self.shared_model is not None and batch_window_ms is not None:
+            self.batcher = MicroBatcher(self.shared_model.predict_contexts,
+                                        window_ms=batch_window_ms,
+                                        max_batch=max_batch)
+
+    def _load_shared_model(self):
+        """从上次关闭时保存的状态恢复共享模型（不存在或不兼容时从头学习）"""
+        if not os.path.exists(self.shared_state_path):
+            return
+        try:
+            payload = load_session_state(self.shared_state_path)
+            if payload.get("version") != SESSION_STATE_VERSION or \
+                    payload.get("mode") != self.mode:
+                logger.warning("共享模型状态版本或模式不一致，已忽略: %s",
+                               self.shared_state_path)
+                return
+            self.shared_model.set_state(payload["state"])
+            logger.info("已恢复共享模型: %s", self.shared_state_path)
+        except Exception as e:
+            logger.warning("恢复共享模型失败，将从头学习: %s", e)
+
+    def _save_shared_model(self):
+        """保存共享模型的状态（关闭时调用）"""
+        try:
+            os.makedirs(os.path.dirname(self.shared_state_path), exist_ok=True)
+            save_session_state(self.shared_state_path, {
+                "version": SESSION_STATE_VERSION,
+                "mode": self.mode,
+                "state": self.shared_model.get_state()})
+        except Exception as e:
+            logger.error("保存共享模型失败: %s", e)
+
+    def _session_filename(self, player_id):
+        if not PLAYER_ID_PATTERN.match(player_id):
+            raise ValueError(f"无效的玩家 ID: {player_id}")
+        return f"{self.subdir}/{player_id}.json"
+
+    def _open_session(self, player_id):
+        """创建会话：优先从旁路文件恢复预测器状态，否则从日志重建"""
+        filename = self._session_filename(player_id)
+        store = GameLogStore(filename, base_dir=self.base_dir)
+        games = store.metadata["total_games"]
+
+        state = None
+        state_path = store.sidecar_path(SESSION_STATE_SUFFIX)
+        if os.path.exists(state_path):
+            try:
+                payload = load_session_state(state_path)
+                if payload.get("version") == SESSION_STATE_VERSION and \
+                        payload.get("games") == games and \
+                        payload.get("mode") == self.mode:
+                    state = payload["state"]
+            except Exception as e:
+                logger.warning("读取会话状态失败，将从日志重建: %s", e)
+
+        predictor = None
+        if self.shared_model is not None:
+            if state is not None:
+                codes = state["codes"].tobytes()
+            else:
+                window = self.shared_model.window
+                codes = store.open_history().user_codes()[-window:].tobytes()
+            predictor = SharedModelSession(self.shared_model, codes,
+                                           self.batcher)
+        elif state is not None:
+            # 不加载历史数据，直接恢复保存的状态
+            try:
+                predictor = create_predictor(self.mode, None, verbose=False,
+                                             base_dir=self.base_dir,
+                                             **self.predictor_options)
+                predictor.set_state(state)
+            except Exception as e:
+                logger.warning("恢复会话状态失败，将从日志重建: %s", e)
+                self._close_predictor(predictor)
+                predictor = state = None
+        if predictor is None:
+            predictor = create_predictor(self.mode, filename, verbose=False,
+                                         base_dir=self.base_dir,
+                                         **self.predictor_options)
+
+        if os.path.exists(state_path):
+            self.stats["restored" if state is not None else "rebuilt"] += 1
+        else:
+            self.stats["created"] += 1
+        return PlayerSession(player_id, predictor, store)
+
+    def get_session(self, player_id):
+        """获取（必要时创建或恢复）玩家会话，并标记为最近使用"""
+        while True:
+            with self.lock:
+                session = self.sessions.get(player_id)
+                if session is not None:
+                    self.sessions.move_to_end(player_id)
+                    return session
+                event = self.reserved.get(player_id)
+                if event is None:
+                    self.reserved[player_id] = threading.Event()
+                    break
+            # 其他线程正在打开或淘汰该会话，等它完成后重新查找
+            event.wait()
+
+        try:
+            session = self._open_session(player_id)
+        except BaseException:
+            self._release(player_id)
+            raise
+        with self.lock:
+            self.sessions[player_id] = session
+            self.reserved.pop(player_id).set()
+            victims = []
+            while len(self.sessions) > self.max_sessions:
+                victim = self.sessions.popitem(last=False)[1]
+                self.reserved[victim.player_id] = threading.Event()
+                victims.append(victim)
+        self._spill_reserved(victims)
+        return session
+
+    def _release(self, player_id):
+        """结束对玩家的占用，唤醒等待的请求"""
+        with self.lock:
+            self.reserved.pop(player_id).set()
+
+    def _spill_reserved(self, sessions):
+        """淘汰已从会话表移出并已占用的会话，完成后解除占用"""
+        for session in sessions:
+            try:
+                self._spill(session)
+            finally:
+                self._release(session.player_id)
+
+    def play(self, player_id, user_choice):
+        """
+        为玩家处理一局游戏并保存记录
+
+        Args:
+            player_id (str): 玩家 ID
+            user_choice (str): 用户选择
+
+        Returns:
+            dict: 本局记录（用户选择、电脑选择、结果、时间戳）
+        """
+        if user_choice not in ACTION_TO_CODE:
+            raise ValueError(f"无效的选择: {user_choice}。请使用: {ACTIONS}")
+
+        while True:
+            session = self.get_session(player_id)
+            with session.lock:
+                # 会话可能在获取后被淘汰，此时重新打开
+                if session.closed:
+                    continue
+                computer_choice = session.predictor.compute_choice(user_choice)
+                record = {
+                    "user_choice": user_choice,
+                    "computer_choice": computer_choice,
+                    "result": determine_winner(user_choice, computer_choice),
+                    "timestamp": datetime.now().isoformat()
+                }
+                session.pending.append(record)
+                if len(session.pending) >= self.save_batch_size:
+                    self._flush(session)
+                if hasattr(session.predictor, 'update_with_new_data'):
+                    session.predictor.update_with_new_data()
+                return record
+
+    def _flush(self, session):
+        """写入会话的待写入记录（调用方持有 session.lock）"""
+        if session.pending:
+            session.store.append_many(session.pending)
+            session.pending = []
+
+    def _spill(self, session):
+        """淘汰会话：写入剩余记录并把预测器状态保存到磁盘"""
+        with session.lock:
+            if session.closed:
+                return
+            session.closed = True
+            self._flush(session)
+
+            predictor = session.predictor
+            state_path = session.store.sidecar_path(SESSION_STATE_SUFFIX)
+            try:
+                if isinstance(predictor, SharedModelSession):
+                    state = {"codes": np.frombuffer(predictor.codes,
+                                                    dtype=np.uint8).copy()}
+                else:
+                    state = predictor.get_state()
+                save_session_state(state_path, {
+                    "version": SESSION_STATE_VERSION,
+                    "mode": self.mode,
+                    "games": session.store.metadata["total_games"],
+                    "state": state})
+            except Exception as e:
+                logger.error("保存会话状态失败: %s", e)
+                # 过期的状态文件与日志不一致，下次会被忽略；这里直接删除
+                if os.path.exists(state_path):
+                    os.remove(state_path)
+            if not isinstance(predictor, SharedModelSession):
+                self._close_predictor(predictor)
+        self.stats["evicted"] += 1
+
+    @staticmethod
+    def _close_predictor(predictor):
+        """关闭会话独占的预测器（停止后台训练线程等）"""
+        close = getattr(predictor, "close", None)
+        if close is not None:
+            close()
+
+    def evict(self, player_id):
+        """立即淘汰一个会话"""
+        with self.lock:
+            session = self.sessions.pop(player_id, None)
+            if session is not None:
+                self.reserved[player_id] = threading.Event()
+        if session is not None:
+            self._spill_reserved([session])
+
+    def get_statistics(self, player_id):
+        """
+        获取玩家的统计数据
+
+        Returns:
+            dict: 总局数、各结果局数与胜率
+        """
+        session = self.get_session(player_id)
+        with session.lock:
+            self._flush(session)
+            metadata = dict(session.store.metadata)
+        total_games = metadata["total_games"]
+
+        def rate(count):
+            return round(count / total_games * 100, 2) if total_games > 0 else 0
+
+        return {
+            "player_id": player_id,
+            "total_games": total_games,
+            "computer_wins": metadata["computer_wins"],
+            "user_wins": metadata["user_wins"],
+            "draws": metadata["draws"],
+            "computer_win_rate": rate(metadata["computer_wins"]),
+            "user_win_rate": rate(metadata["user_wins"]),
+            "draw_rate": rate(metadata["draws"]),
+            "processor_mode": self.mode,
+            "last_updated": metadata["last_updated"]
+        }
+
+    def session_bytes(self, player_id):
+        """
+        测量一个会话占用的内存（不含共享模型）
+
+        Returns:
+            dict: predictor_bytes 为预测器状态，session_bytes 为整个会话
+                  （含存储对象的元数据与待写入记录）
+        """
+        return self._measure(self.get_session(player_id))
+
+    def _measure(self, session):
+        shared = {id(self.shared_model), id(self.batcher)}
+        predictor_bytes = deep_sizeof(session.predictor, set(shared))
+        return {
+            "predictor_bytes": predictor_bytes,
+            "session_bytes": deep_sizeof(session, shared)
+        }
+
+    def memory_report(self):
+        """所有在内存中的会话的数量与平均内存占用"""
+        with self.lock:
+            sessions = list(self.sessions.values())
+        sizes = [self._measure(session) for session in sessions]
+        count = len(sizes)
+        return {
+            "sessions": count,
+            "mean_predictor_bytes": sum(size["predictor_bytes"]
+                                        for size in sizes) / count if count else 0,
+            "mean_session_bytes": sum(size["session_bytes"]
+                                      for size in sizes) / count if count else 0,
+            "shared_model": self.shared_model.__class__.__name__
+            if self.shared_model is not None else None,
+            "batching": self.batcher.get_stats()
+            if self.batcher is not None else None,
+            **self.stats
+        }
+
+    def close(self):
+        """淘汰全部会话，保存并关闭共享模型"""
+        with self.lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+            for session in sessions:
+                self.reserved[session.player_id] = threading.Event()
+        self._spill_reserved(sessions)
+        if self.batcher is not None:
+            self.batcher.close()
+        if self.shared_model is not None:
+            self._save_shared_model()
+            if hasattr(self.shared_model, "close"):
+                self.shared_model.close()
@@ -0,0 +1,178 @@
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+from src.control.RPSController import RPSController
+from src.control.logs import configure_logging
+from src.control.opponents import ACTIONS, OPPONENTS, create_opponent
+from src.solve.config import PredictorConfig
+
+
+def _simulate_vectorized(processor, player, rounds, seed):
+    """
+    向量化模拟：预先生成对手动作序列，由预测器的 batch_predict 一次给出全部预测
+
+    只适用于非反应式对手与提供 batch_predict 的预测器，结果不写入数据集。
+
+    Returns:
+        tuple: (电脑胜局数, 用户胜局数, 平局数)
+    """
+    user = np.empty(rounds, dtype=np.int64)
+    for index in range(rounds):
+        move = player.next_move()
+        # 非反应式对手只依赖自己的历史动作，电脑动作记为 None
+        player.observe(move, None)
+        user[index] = ACTIONS.index(move)
+    predicted = processor.batch_predict(user)
+
+    # 编码 rock=0, scissors=1, paper=2 下，(x + 2) % 3 能赢 x
+    rng = np.random.default_rng(seed)
+    computer = np.where(predicted >= 0, (predicted + 2) % 3,
+                        rng.integers(0, 3, size=rounds))
+    computer_wins = int(np.count_nonzero(computer == (user + 2) % 3))
+    user_wins = int(np.count_nonzero(user == (computer + 2) % 3))
+    return computer_wins, user_wins, rounds - computer_wins - user_wins
+
+
+def simulate(mode="1", opponent="random", rounds=1000, seed=0,
+             dataset=None, save_batch_size=1000, background_training=False,
+             vectorized=False, verbose=False, predictor_options=None,
+             instrument=False):
+    """
+    无界面批量模拟：预测器模式对战脚本化对手
+
+    不依赖 pygame，不打印每局信息，数据集写入按批进行。
+
+    Args:
+        mode (str): 预测器模式
+        opponent (str): 对手策略名称，见 opponents.OPPONENTS
+        rounds (int): 模拟局数
+        seed (int): 随机种子（对手与随机备用策略）
+        dataset (str): 数据集文件名称，None 表示不落盘
+        save_batch_size (int): 每批写入的记录数
+        background_training (bool): 预测器是否在后台线程中训练
+        vectorized (bool): 条件允许时（预测器支持 batch_predict、对手非反应式、
+                           不落盘）整段向量化模拟
+        verbose (bool): 是否记录每局的日志（输出位置由 logs.configure_logging 决定）
+        predictor_options (dict): 传给预测器的额外选项（例如窗口长度、隐藏层大小）
+        instrument (bool): 是否记录各阶段耗时，结果中以 stages 返回
+
+    Returns:
+        dict: 模拟结果，包含胜率与每秒局数
+    """
+    random.seed(seed)
+    player = create_opponent(opponent, seed=seed)
+
+    start = time.perf_counter()
+    controller = RPSController(filename=dataset, mode=mode,
+                               background_training=background_training,
+                               verbose=verbose, save_batch_size=save_batch_size,
+                               predictor_options=predictor_options,
+                               instrument=instrument)
+    startup_seconds = time.perf_counter() - start
+
+    processor = controller.processor
+    vectorized = (vectorized and dataset is None and not player.reactive
+                  and hasattr(processor, "batch_predict"))
+
+    start = time.perf_counter()
+    if vectorized:
+        computer_wins, user_wins, draws = _simulate_vectorized(
+            processor, player, rounds, seed)
+    else:
+        for _ in range(rounds):
+            user_choice = player.next_move()
+            result = controller.method1_process_game(user_choice)
+            controller.method2_save_to_dataset()
+            player.observe(user_choice, result["computer_choice"])
+        controller.flush()
+    elapsed = time.perf_counter() - start
+
+    if vectorized:
+        stats = {
+            "computer_win_rate": round(computer_wins / rounds * 100, 2),
+            "user_win_rate": round(user_wins / rounds * 100, 2),
+            "draw_rate": round(draws / rounds * 100, 2)
+        } if rounds > 0 else {"computer_win_rate": 0, "user_win_rate": 0,
+                              "draw_rate": 0}
+    else:
+        stats = controller.method3_get_statistics()
+    controller.close()
+
+    result = {
+        "mode": mode,
+        "processor_type": processor.__class__.__name__,
+        "opponent": opponent,
+        "rounds": rounds,
+        "seed": seed,
+        "vectorized": vectorized,
+        "startup_seconds": round(startup_seconds, 4),
+        "elapsed_seconds": round(elapsed, 4),
+        "rounds_per_sec": round(rounds / elapsed, 1) if elapsed > 0 else None,
+        "computer_win_rate": stats["computer_win_rate"],
+        "user_win_rate": stats["user_win_rate"],
+        "draw_rate": stats["draw_rate"]
+    }
+    if instrument:
+        result["stages"] = controller.instrumentation.to_dict()["stages"]
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="石头剪刀布无界面批量模拟（预测器 vs 脚本化对手）")
+    parser.add_argument("--mode", default="1", help="预测器模式")
+    parser.add_argument("--opponent", default="all",
+                        help=f"对手策略: {', '.join(OPPONENTS)} 或 all")
+    parser.add_argument("--rounds", type=int, default=1000, help="每个对手的局数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--dataset", default=None,
+                        help="数据集文件名称（例如 /sim/run.json），默认不落盘")
+    parser.add_argument("--save-batch-size", type=int, default=1000,
+                        help="每批写入的记录数")
+    parser.add_argument("--background", action="store_true",
+                        help="预测器在后台线程中训练")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="预测器与对手支持时整段向量化模拟（不落盘）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 行输出结果")
+    parser.add_argument("--log-level", default="WARNING",
+                        help="输出到终端的日志级别: DEBUG, INFO, WARNING, ERROR, OFF")
+    parser.add_argument("--trace", type=int, default=0,
+                        help="在内存中保留最近 N 条每局日志，每个对手结束后输出（不影响终端日志级别）")
+    PredictorConfig.add_arguments(parser)
+    args = parser.parse_args(argv)
+    config = PredictorConfig.from_args(args)
+
+    ring = configure_logging(console_level=args.log_level,
+                             ring_buffer=args.trace)
+    verbose = args.trace > 0 or args.log_level.upper() == "DEBUG"
+
+    opponents = list(OPPONENTS) if args.opponent == "all" else [args.opponent]
+    for name in opponents:
+        result = simulate(mode=args.mode, opponent=name, rounds=args.rounds,
+                          seed=args.seed, dataset=args.dataset,
+                          save_batch_size=args.save_batch_size,
+                          background_training=args.background,
+                          vectorized=args.vectorized, verbose=verbose,
+                          predictor_options={"config": config})
+        if args.json:
+            print(json.dumps(result, ensure_ascii=False))
+        else:
+            print(f"模式={result['mode']} 对手={name:<10} "
+                  f"局数={result['rounds']} "
+                  f"电脑胜率={result['computer_win_rate']:6.2f}% "
+                  f"用户胜率={result['user_win_rate']:6.2f}% "
+                  f"平局={result['draw_rate']:6.2f}% "
+                  f"速度={result['rounds_per_sec']} 局/秒")
+        if ring is not None:
+            print(f"最近 {len(ring.records)} 条每局日志:")
+            for line in ring.lines():
+                print(f"  {line}")
+            ring.clear()
+
+
+if __name__ == "__main__":
+    main()
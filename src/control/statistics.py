@@ -0,0 +1,187 @@
+import copy
+import itertools
+import json
+import os
+from collections import deque
+
+from src.control.logs import get_logger
+from src.control.storage import RESULT_COUNTERS
+
+
+logger = get_logger("statistics")
+
+
+def empty_counts():
+    """各对局结果的计数（键为 "computer_win", "user_win", "draw"）"""
+    return dict.fromkeys(RESULT_COUNTERS, 0)
+
+
+def describe_counts(counts):
+    """
+    由结果计数计算局数与胜率（百分比，保留两位小数）
+
+    Returns:
+        dict: games, computer_win_rate, user_win_rate, draw_rate
+    """
+    games = sum(counts.values())
+    description = {"games": games}
+    for result, counter in RESULT_COUNTERS.items():
+        rate = counts[result] / games * 100 if games > 0 else 0
+        description[counter[:-1] + "_rate"] = round(rate, 2)
+    return description
+
+
+class GameStatistics:
+    """
+    增量维护的对局统计
+
+    每局 O(1) 更新：总计数、最近 window 局的滚动计数、按小时与按模式的计数。
+    读取胜率不需要访问磁盘；只有检查点（./dataset/<name>.stats.json）会定期写入，
+    启动时从检查点恢复并补上检查点之后新增的日志记录，检查点缺失或与日志不一致时
+    从日志完整重建一次。
+    """
+
+    def __init__(self, window=100, hours=24):
+        """
+        Args:
+            window (int): 滚动统计的局数
+            hours (int): 统计结果中展示最近多少个小时
+        """
+        self.window = window
+        self.hours = hours
+        self.total = 0
+        self.counts = empty_counts()
+        self.recent = deque(maxlen=window)
+        self.recent_counts = empty_counts()
+        self.per_hour = {}  # "YYYY-MM-DDTHH" → 结果计数
+        self.per_mode = {}  # 模式 → 结果计数
+        self.last_timestamp = None
+
+    def record(self, result, timestamp=None, mode=None):
+        """
+        记录一局结果
+
+        Args:
+            result (str): "user_win", "computer_win" 或 "draw"
+            timestamp (str): ISO 格式时间戳
+            mode (str): 产生这一局的预测器模式，未知时为 None
+        """
+        # 不合法的记录也计入 total，使 total 与日志中的记录数一致
+        self.total += 1
+        if result not in self.counts:
+            return
+        self.counts[result] += 1
+
+        if len(self.recent) == self.recent.maxlen:
+            self.recent_counts[self.recent[0]] -= 1
+        self.recent.append(result)
+        self.recent_counts[result] += 1
+
+        if timestamp:
+            hour = self.per_hour.get(timestamp[:13])
+            if hour is None:
+                hour = self.per_hour[timestamp[:13]] = empty_counts()
+            hour[result] += 1
+            self.last_timestamp = timestamp
+
+        mode = "unknown" if mode is None else str(mode)
+        counts = self.per_mode.get(mode)
+        if counts is None:
+            counts = self.per_mode[mode] = empty_counts()
+        counts[result] += 1
+
+    def record_all(self, records):
+        """依次记录多条日志记录（字典，含 result、timestamp、mode）"""
+        for record in records:
+            self.record(record.get("result"), record.get("timestamp"),
+                        record.get("mode"))
+
+    def copy(self):
+        """独立的副本（之后各自更新，互不影响）"""
+        return copy.deepcopy(self)
+
+    def summary(self):
+        """
+        滚动窗口、按模式与最近若干小时的胜率
+
+        Returns:
+            dict: recent, per_mode, per_hour
+        """
+        recent = describe_counts(self.recent_counts)
+        recent["window"] = self.window
+        hours = sorted(self.per_hour)[-self.hours:]
+        return {
+            "recent": recent,
+            "per_mode": {mode: describe_counts(counts)
+                         for mode, counts in sorted(self.per_mode.items())},
+            "per_hour": {hour: describe_counts(self.per_hour[hour])
+                         for hour in hours}
+        }
+
+    def to_dict(self):
+        return {
+            "total": self.total,
+            "counts": self.counts,
+            "recent": list(self.recent),
+            "per_hour": self.per_hour,
+            "per_mode": self.per_mode,
+            "last_timestamp": self.last_timestamp
+        }
+
+    @classmethod
+    def from_dict(cls, data, window=100, hours=24):
+        stats = cls(window=window, hours=hours)
+        stats.total = data["total"]
+        stats.counts.update(data["counts"])
+        for result in data["recent"][-window:]:
+            stats.recent.append(result)
+            stats.recent_counts[result] += 1
+        stats.per_hour = data["per_hour"]
+        stats.per_mode = data["per_mode"]
+        stats.last_timestamp = data["last_timestamp"]
+        return stats
+
+    def save(self, path):
+        """原子地写入检查点（先写临时文件再替换）"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def restore(cls, store, path=None, window=100, hours=24):
+        """
+        从检查点恢复统计，并与日志对齐
+
+        Args:
+            store: GameLogStore 或 MemoryLogStore
+            path (str): 检查点路径，None 表示不使用检查点
+            window (int): 滚动统计的局数
+            hours (int): 统计结果中展示最近多少个小时
+
+        Returns:
+            GameStatistics: 与日志一致的统计
+        """
+        stats = None
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    stats = cls.from_dict(json.load(f), window, hours)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning("读取统计检查点失败，将从日志重建: %s", e)
+
+        total = store.metadata["total_games"]
+        if stats is not None and stats.total > total:
+            # 检查点比日志新（例如数据集被替换），不可用
+            stats = None
+        if stats is None:
+            stats = cls(window=window, hours=hours)
+        if stats.total == total:
+            return stats
+
+        # 只重放检查点之后的记录（没有检查点时即完整重建一次）
+        stats.record_all(itertools.islice(store.iter_records(), stats.total,
+                                          None))
+        if path is not None:
+            stats.save(path)
+        return stats
@@ -0,0 +1,487 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from src.control.logs import get_logger
+
+
+logger = get_logger("storage")
+
+
+# 对局结果 → 元数据计数字段
+RESULT_COUNTERS = {
+    "computer_win": "computer_wins",
+    "user_win": "user_wins",
+    "draw": "draws"
+}
+
+
+def create_empty_metadata():
+    """创建空的元数据结构（与旧版 JSON 数据集的 metadata 字段一致）"""
+    now = datetime.now().isoformat()
+    return {
+        "created_date": now,
+        "total_games": 0,
+        "computer_wins": 0,
+        "user_wins": 0,
+        "draws": 0,
+        "last_updated": now,
+        "version": "1.0"
+    }
+
+
+class GameLogStore:
+    """
+    追加写入的对局记录存储
+
+    对局记录逐行追加到 JSONL 日志（./dataset/<name>.jsonl），
+    统计计数保存在一个很小的元数据旁路文件（./dataset/<name>.meta.json）中。
+    每次保存只追加一行并重写旁路文件，开销与历史记录数量无关。
+    首次打开时会自动导入旧版 JSON 数据集（./dataset/<name>.json）中的 game_records。
+    """
+
+    def __init__(self, filename, base_dir="./dataset"):
+        """
+        Args:
+            filename (str): 数据集文件名称，例如 "/solve1/jsq.json"
+            base_dir (str): 数据集根目录
+        """
+        self.filename = filename
+        self.base_dir = base_dir
+        self.json_path = base_dir + filename
+        root, _ = os.path.splitext(self.json_path)
+        self.root = root
+        self.log_path = root + ".jsonl"
+        self.meta_path = root + ".meta.json"
+        self.metadata = None
+        self._columns = None
+
+        self._open()
+
+    def _open(self):
+        """打开存储：必要时创建日志文件或导入旧版数据集，并校验元数据"""
+        dir_path = os.path.dirname(self.log_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+
+        if not os.path.exists(self.log_path):
+            if os.path.exists(self.json_path):
+                self._import_legacy()
+            else:
+                open(self.log_path, 'a', encoding='utf-8').close()
+                self.metadata = create_empty_metadata()
+                self.metadata["log_bytes"] = 0
+                self._write_metadata()
+            return
+
+        self.metadata = self._read_metadata()
+        # 元数据缺失或与日志长度不一致（例如写入中途退出）时，截掉残缺的尾行后从日志重建
+        if self.metadata is None or \
+                self.metadata.get("log_bytes") != os.path.getsize(self.log_path):
+            self._repair_tail()
+            self.rebuild_metadata()
+
+    def _repair_tail(self):
+        """
+        截掉日志末尾不完整的一行（写入中途崩溃留下的），
+        否则下一次追加会和它拼成一行，连同新记录一起损坏
+        """
+        size = os.path.getsize(self.log_path)
+        if size == 0:
+            return
+        with open(self.log_path, 'r+b') as f:
+            position = size
+            while position > 0:
+                step = min(4096, position)
+                f.seek(position - step)
+                chunk = f.read(step)
+                newline = chunk.rfind(b"\n")
+                if newline >= 0:
+                    position = position - step + newline + 1
+                    break
+                position -= step
+            if position != size:
+                f.truncate(position)
+                logger.warning("已截掉日志末尾不完整的 %d 字节: %s",
+                               size - position, self.log_path)
+
+    def sidecar_path(self, suffix):
+        """与数据集同目录、同名前缀的附属文件路径，例如检查点"""
+        return self.root + suffix
+
+    def _import_legacy(self):
+        """导入旧版 JSON 数据集中的 game_records"""
+        try:
+            with open(self.json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("导入旧版数据集失败: %s", e)
+            data = {}
+
+        records = data.get("game_records", [])
+        with open(self.log_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        metadata = create_empty_metadata()
+        metadata.update(data.get("metadata", {}))
+        self.metadata = metadata
+        # 旧版 metadata 可能与 game_records 不一致，以记录为准重新计数
+        self.rebuild_metadata()
+        logger.info("已导入旧版数据集 %s: %d 条记录", self.json_path, len(records))
+
+    def _read_metadata(self):
+        """读取元数据旁路文件"""
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write_metadata(self):
+        """原子地重写元数据旁路文件"""
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.metadata, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.meta_path)
+
+    def rebuild_metadata(self):
+        """扫描整个日志重新计算统计计数（仅在元数据缺失或损坏时需要）"""
+        metadata = self.metadata or create_empty_metadata()
+        metadata["total_games"] = 0
+        for counter in RESULT_COUNTERS.values():
+            metadata[counter] = 0
+
+        for record in self.iter_records():
+            metadata["total_games"] += 1
+            counter = RESULT_COUNTERS.get(record.get("result"))
+            if counter:
+                metadata[counter] += 1
+
+        metadata["log_bytes"] = os.path.getsize(self.log_path)
+        self.metadata = metadata
+        self._write_metadata()
+
+    def append(self, record):
+        """
+        追加一条对局记录
+
+        Args:
+            record (dict): 包含 user_choice, computer_choice, result, timestamp 的记录
+        """
+        self.append_many([record])
+
+    def append_many(self, records):
+        """
+        批量追加对局记录，只写一次日志和一次元数据
+
+        Args:
+            records (list): 对局记录列表
+        """
+        if not records:
+            return
+
+        # 上一次追加失败时（例如 fsync 或元数据写入出错）日志中可能留下了元数据之外的字节，
+        # 调用方会重试同一批记录，先截掉它们，避免记录重复或与残行拼在一起
+        self._discard_uncommitted()
+
+        # 先让列式历史与现有日志对齐，再与日志同步追加（日志仍是权威数据，列可随时从日志重建）
+        columns = self.columns()
+
+        lines = "".join(json.dumps(record, ensure_ascii=False) + "\n"
+                        for record in records)
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+            # 先让日志落盘，再更新元数据：元数据记录的 log_bytes 永远不超过已落盘的日志
+            f.flush()
+            os.fsync(f.fileno())
+            log_bytes = f.tell()
+
+        # 元数据旁路文件写入成功后才替换内存中的计数，失败时两者都保持追加前的状态
+        metadata = dict(self.metadata)
+        for record in records:
+            metadata["total_games"] += 1
+            counter = RESULT_COUNTERS.get(record.get("result"))
+            if counter:
+                metadata[counter] += 1
+        metadata["last_updated"] = datetime.now().isoformat()
+        metadata["log_bytes"] = log_bytes
+        previous, self.metadata = self.metadata, metadata
+        try:
+            self._write_metadata()
+        except BaseException:
+            self.metadata = previous
+            raise
+
+        # 到这里记录已经提交，列写入失败不能让调用方重试（否则日志中记录重复），
+        # 丢弃列对象，下次使用时从日志补齐
+        try:
+            columns.append_many(records)
+        except Exception as e:
+            logger.warning("列式历史追加失败，将从日志补齐: %s", e)
+            self._columns = None
+
+    def _discard_uncommitted(self):
+        """
+        截掉日志中超出已提交 log_bytes 的部分（未提交的追加）
+
+        以旁路文件中的元数据为准，而不是内存中的副本：同一日志的另一个存储对象
+        （例如同一玩家的新旧会话）提交的追加不算未提交，此时改为采用旁路文件中的元数据。
+        """
+        size = os.path.getsize(self.log_path)
+        committed = self.metadata.get("log_bytes")
+        if committed is None or size <= committed:
+            return
+        on_disk = self._read_metadata()
+        if on_disk is not None and on_disk.get("log_bytes", 0) > committed:
+            logger.warning("日志已被其他存储对象追加，重新读取元数据: %s",
+                           self.log_path)
+            self.metadata = on_disk
+            committed = on_disk["log_bytes"]
+            # 列式历史按新的局数从日志补齐
+            self._columns = None
+        if size > committed:
+            os.truncate(self.log_path, committed)
+            logger.warning("已截掉日志中未提交的 %d 字节: %s",
+                           size - committed, self.log_path)
+
+    def columns(self):
+        """
+        与日志同步的列式历史（./dataset/<name>.moves.u8、.times.i64 与 .modes.u8）
+
+        首次调用时检查列的长度，缺少的尾部（或整列）从日志补齐，此后随 append 增量写入。
+        旧版本写入的列没有模式列（或较短）时整体从日志重建一次。
+
+        Returns:
+            ColumnarHistory: 列式历史
+        """
+        if self._columns is None:
+            # 列式模块依赖 NumPy，只在需要时导入，统计等轻量用途不受影响
+            from src.control.columnar import ColumnarHistory
+
+            columns = ColumnarHistory(self.filename, base_dir=self.base_dir)
+            stored = len(columns)
+            total = self.metadata["total_games"]
+            if columns.mode_count() < stored:
+                columns._truncate(0)
+                stored = 0
+            if stored != total:
+                if stored > total:
+                    columns._truncate(0)
+                    stored = 0
+                chunk = []
+                for index, record in enumerate(self.iter_records()):
+                    if index < stored:
+                        continue
+                    chunk.append(record)
+                    if len(chunk) >= 100000:
+                        columns.append_many(chunk)
+                        chunk = []
+                columns.append_many(chunk)
+            self._columns = columns
+        return self._columns
+
+    def open_history(self):
+        """
+        以内存映射方式打开对局历史（只映射，不解析日志）
+
+        Returns:
+            MappedHistory: 只读视图，提供最近 K 局的零拷贝视图与按块解码
+        """
+        return self.columns().open()
+
+    def iter_records(self):
+        """逐条读取日志中的对局记录"""
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # 最后一行可能因中途退出而不完整，直接跳过
+                    continue
+
+    def load_records(self):
+        """读取全部对局记录"""
+        return list(self.iter_records())
+
+    def to_legacy(self):
+        """
+        导出为旧版 JSON 数据集结构
+
+        Returns:
+            dict: {"metadata": ..., "game_records": [...]}
+        """
+        metadata = {key: value for key, value in self.metadata.items()
+                    if key != "log_bytes"}
+        return {"metadata": metadata, "game_records": self.load_records()}
+
+
+class MemoryLogStore:
+    """
+    仅在内存中维护统计计数的存储（不保存对局记录）
+
+    用于无界面批量模拟等不需要落盘的场景，接口与 GameLogStore 一致。
+    """
+
+    def __init__(self):
+        self.filename = None
+        self.metadata = create_empty_metadata()
+
+    def append(self, record):
+        """追加一条对局记录（只更新计数）"""
+        self.append_many([record])
+
+    def append_many(self, records):
+        """批量追加对局记录（只更新计数）"""
+        for record in records:
+            self.metadata["total_games"] += 1
+            counter = RESULT_COUNTERS.get(record.get("result"))
+            if counter:
+                self.metadata[counter] += 1
+        if records:
+            self.metadata["last_updated"] = datetime.now().isoformat()
+
+    def iter_records(self):
+        """内存存储不保留记录"""
+        return iter(())
+
+    def load_records(self):
+        """内存存储不保留记录"""
+        return []
+
+    def to_legacy(self):
+        """导出为旧版 JSON 数据集结构（game_records 为空）"""
+        return {"metadata": dict(self.metadata), "game_records": []}
+
+
+class WriteBehindWriter:
+    """
+    后台批量写入（write-behind）
+
+    append 只把记录放入内存缓冲区并立即返回；后台线程在攒满 batch_size 条、
+    或最早一条记录等待超过 interval_ms 时，调用一次 store.append_many 写入。
+    写入失败的记录放回缓冲区等待下次重试。flush() 同步写完缓冲区，
+    close() 写完后停止后台线程；程序退出前必须调用 close()，否则缓冲区中的记录会丢失。
+    """
+
+    def __init__(self, store, batch_size=50, interval_ms=500, on_flush=None,
+                 name="rps-writer"):
+        """
+        Args:
+            store: GameLogStore 或 MemoryLogStore
+            batch_size (int): 攒满多少条记录立即写入
+            interval_ms (float): 记录在缓冲区中最多等待的时间（毫秒）
+            on_flush (callable): 每次成功写入后以写入的记录为参数调用（例如更新已落盘的统计
+                并保存检查点）；在写入锁内调用，因此各次调用的顺序与记录写入日志的顺序一致
+            name (str): 后台线程名称
+        """
+        self.store = store
+        self.batch_size = max(1, batch_size)
+        self.interval = interval_ms / 1000
+        self.on_flush = on_flush
+
+        self.buffer = []
+        self.first_time = None  # 缓冲区中最早一条记录的入队时间
+        self.condition = threading.Condition()
+        # 保证批次按入队顺序写入（后台线程与 flush() 可能同时写）
+        self.write_lock = threading.Lock()
+        self.closed = False
+        self.stats = {"flushes": 0, "records": 0, "errors": 0}
+
+        self.thread = threading.Thread(target=self._loop, name=name,
+                                       daemon=True)
+        self.thread.start()
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def append(self, record):
+        """把一条记录放入缓冲区"""
+        self.append_many([record])
+
+    def append_many(self, records):
+        """把多条记录放入缓冲区"""
+        if not records:
+            return
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("写入线程已关闭")
+            was_empty = not self.buffer
+            if was_empty:
+                self.first_time = time.monotonic()
+            self.buffer.extend(records)
+            # 缓冲区由空变非空时唤醒写入线程开始计时，攒满一批时唤醒它立即写入
+            if was_empty or len(self.buffer) >= self.batch_size:
+                self.condition.notify()
+
+    def _wait(self):
+        """等待到需要写入（或关闭）为止，返回是否继续运行"""
+        with self.condition:
+            while not self.closed:
+                if self.buffer:
+                    remaining = self.first_time + self.interval - time.monotonic()
+                    if len(self.buffer) >= self.batch_size or remaining <= 0:
+                        return True
+                    self.condition.wait(remaining)
+                else:
+                    self.condition.wait()
+            return False
+
+    def _write(self):
+        """取出缓冲区中的全部记录并写入"""
+        with self.write_lock:
+            with self.condition:
+                records, self.buffer = self.buffer, []
+                self.first_time = None
+            if not records:
+                return True
+
+            try:
+                self.store.append_many(records)
+            except Exception as e:
+                logger.error("保存数据集失败: %s", e)
+                with self.condition:
+                    self.buffer[:0] = records
+                    self.first_time = time.monotonic()
+                self.stats["errors"] += 1
+                return False
+
+            self.stats["flushes"] += 1
+            self.stats["records"] += len(records)
+            if self.on_flush is not None:
+                try:
+                    self.on_flush(records)
+                except Exception:
+                    # 记录已经写入，回调失败不影响写入线程继续运行
+                    logger.exception("写入后回调失败")
+        return True
+
+    def _loop(self):
+        while self._wait():
+            if not self._write():
+                # 写入失败（例如磁盘已满）时稍后重试，避免忙等
+                time.sleep(self.interval)
+
+    def flush(self):
+        """
+        同步写完缓冲区中的记录
+
+        Returns:
+            bool: 写入是否成功
+        """
+        return self._write()
+
+    def close(self):
+        """停止后台线程并写完剩余记录"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+        return self.flush()
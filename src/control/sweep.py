@@ -0,0 +1,417 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from src.control.logs import configure_logging
+from src.control.opponents import OPPONENTS
+from src.solve.config import PredictorConfig
+from src.solve.registry import (
+    accepted_options, available_modes, load_predictor_class)
+
+
+# 默认扫描的超参数：PredictorConfig 的字段（用于接受 config 的神经网络与集成模式）
+# 或预测器构造函数的选项，只用于接受该选项的模式。
+# 不含 epochs：单元格不落盘、只做在线学习，epochs 只在完整重训练时使用，
+# 需要扫描时与 full_retrain_every 一起给出，例如 full_retrain_every=100 epochs=50,100
+DEFAULT_GRID = {
+    "window": [5, 10, 20],
+    "hidden_size": [16, 32, 64],
+    "lr": [0.001, 0.01],
+    "kernel_size": [3, 5],
+}
+
+# 工作进程的计算线程数：进程数已经等于 CPU 核数，torch / BLAS 再各自开多线程只会互相争抢
+WORKER_THREAD_VARIABLES = ("OMP_NUM_THREADS", "MKL_NUM_THREADS",
+                           "OPENBLAS_NUM_THREADS")
+
+# 由扫描本身决定、不能作为网格参数的预测器选项（config 由 PredictorConfig 的字段合成）
+RUNNER_OPTIONS = {"data_filename", "verbose", "background", "base_dir",
+                  "config"}
+
+
+def parse_grid(items):
+    """
+    解析命令行中的超参数网格
+
+    Args:
+        items (list): 形如 "window=5,10,20" 的字符串
+
+    Returns:
+        dict: 参数名 → 取值列表（数字按 JSON 解析，其余保留为字符串）
+    """
+    grid = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        if not name or not values:
+            raise ValueError(f"无效的网格参数: {item}，应为 name=v1,v2")
+        parsed = []
+        for value in values.split(","):
+            try:
+                parsed.append(json.loads(value))
+            except ValueError:
+                parsed.append(value)
+        grid[name] = parsed
+    return grid
+
+
+def config_key(cell):
+    """单元格的规范键：模式、对手、局数、种子与预测器选项共同决定"""
+    return json.dumps({"mode": cell["mode"], "opponent": cell["opponent"],
+                       "rounds": cell["rounds"], "seed": cell["seed"],
+                       "options": cell["options"]}, sort_keys=True)
+
+
+def grid_options(mode):
+    """
+    模式接受的网格参数：构造函数选项（除 RUNNER_OPTIONS 外），接受 config 时加上它的 config_fields
+
+    Returns:
+        set: 参数名
+    """
+    predictor_class = load_predictor_class(mode)
+    accepted = accepted_options(predictor_class)
+    if "config" in accepted:
+        accepted |= set(getattr(predictor_class, "config_fields",
+                                PredictorConfig.FIELDS))
+    return accepted - RUNNER_OPTIONS
+
+
+def validate_sweep(modes, opponents, grid=None):
+    """
+    在启动工作进程之前检查模式、对手与网格参数
+
+    Args:
+        modes (list): 预测器模式
+        opponents (list): 对手策略名称
+        grid (dict): 显式给出的网格，None 表示使用默认网格（只展开各模式接受的参数）
+
+    Raises:
+        ValueError: 未知的模式或对手，网格参数不被任何选中的模式接受，
+            或 PredictorConfig 字段的取值不合法
+    """
+    unknown = [mode for mode in modes if mode not in available_modes()]
+    if unknown:
+        raise ValueError(f"未知的模式: {', '.join(unknown)}。"
+                         f"可选: {', '.join(available_modes())}")
+    unknown = [name for name in opponents if name not in OPPONENTS]
+    if unknown:
+        raise ValueError(f"未知的对手策略: {', '.join(unknown)}。"
+                         f"可选: {', '.join(OPPONENTS)}")
+    if not grid:
+        return
+
+    accepted = set()
+    for mode in modes:
+        accepted |= grid_options(mode)
+    unknown = sorted(set(grid) - accepted)
+    if unknown:
+        raise ValueError(f"选中的模式都不接受网格参数: {', '.join(unknown)}。"
+                         f"可选: {', '.join(sorted(accepted))}")
+    # PredictorConfig 的字段在这里就能发现不合法的取值（例如 window=0）
+    for name, values in grid.items():
+        if name in PredictorConfig.FIELDS:
+            for value in values:
+                try:
+                    PredictorConfig.from_dict({name: value})
+                except (TypeError, ValueError) as e:
+                    raise ValueError(
+                        f"网格参数 {name}={value!r} 不合法: {e}") from None
+
+
+def build_cells(modes, opponents, grid, rounds, seed):
+    """
+    展开扫描网格
+
+    每个模式只对它接受的参数做笛卡尔积，例如 n-gram 不会因 window 的取值而重复运行。
+    PredictorConfig 的字段对接受 config 的模式有效（只展开该模式的 config_fields），
+    运行时合并为一个配置。
+
+    Returns:
+        list: 单元格（mode, opponent, rounds, seed, options）
+    """
+    cells = []
+    for mode in modes:
+        accepted = grid_options(mode)
+        names = sorted(name for name in grid if name in accepted)
+        for values in itertools.product(*(grid[name] for name in names)):
+            options = dict(zip(names, values))
+            cells.extend({"mode": mode, "opponent": opponent,
+                          "rounds": rounds, "seed": seed, "options": options}
+                         for opponent in opponents)
+    return cells
+
+
+def load_results(path):
+    """
+    读取已有的结果文件（JSON 行），用于续跑
+
+    Returns:
+        dict: 规范键 → 结果（失败的单元格不计入，续跑时会重新运行）
+    """
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                result = json.loads(line)
+            except ValueError:
+                # 中断时写了一半的最后一行
+                continue
+            if "error" not in result:
+                results[result["key"]] = result
+    return results
+
+
+def predictor_options(options):
+    """单元格选项 → 预测器选项：PredictorConfig 的字段合并为 config"""
+    config = {name: value for name, value in options.items()
+              if name in PredictorConfig.FIELDS}
+    others = {name: value for name, value in options.items()
+              if name not in PredictorConfig.FIELDS}
+    if config:
+        others["config"] = PredictorConfig.from_dict(config)
+    return others
+
+
+def _init_worker(log_level):
+    """
+    工作进程初始化：torch 只用一个计算线程
+
+    BLAS 的线程数在导入 NumPy 时就已确定（本模块导入时即导入 NumPy），
+    因此由 run_sweep 在创建进程之前通过环境变量设置，见 WORKER_THREAD_VARIABLES。
+    """
+    try:
+        import torch
+        torch.set_num_threads(1)
+        torch.set_num_interop_threads(1)
+    except (ImportError, RuntimeError):
+        pass
+    configure_logging(console_level=log_level)
+
+
+def run_cell(cell):
+    """
+    在工作进程中运行一个单元格（不落盘、同步训练，结果可复现）
+
+    Returns:
+        dict: 单元格、胜率、吞吐量与预测/更新延迟
+    """
+    from src.control.simulate import simulate
+
+    seed = cell["seed"]
+    random.seed(seed)
+    np.random.seed(seed)
+    try:
+        import torch
+        torch.manual_seed(seed)
+    except ImportError:
+        pass
+
+    result = dict(cell, key=config_key(cell))
+    try:
+        outcome = simulate(mode=cell["mode"], opponent=cell["opponent"],
+                           rounds=cell["rounds"], seed=seed,
+                           predictor_options=predictor_options(cell["options"]),
+                           instrument=True)
+    except Exception as e:
+        result["error"] = f"{e.__class__.__name__}: {e}"
+        return result
+
+    stages = outcome.pop("stages")
+    result.update({key: outcome[key] for key in (
+        "processor_type", "startup_seconds", "elapsed_seconds",
+        "rounds_per_sec", "computer_win_rate", "user_win_rate", "draw_rate")})
+    for stage in ("predict", "update"):
+        if stage in stages:
+            result[f"{stage}_mean_us"] = stages[stage]["mean_us"]
+            result[f"{stage}_p99_us"] = stages[stage]["p99_us"]
+    return result
+
+
+def run_sweep(cells, output, workers=None, log_level="WARNING"):
+    """
+    并行运行全部单元格，跳过结果文件中已完成的单元格
+
+    每个单元格完成后立即追加到结果文件，中断后重新运行同一命令即可续跑。
+
+    Args:
+        cells (list): build_cells 的结果
+        output (str): 结果文件路径（JSON 行）
+        workers (int): 进程数，None 表示 CPU 核数
+        log_level (str): 工作进程的终端日志级别
+
+    Returns:
+        list: 全部单元格的结果（含此前已完成的）
+    """
+    done = load_results(output)
+    pending = [cell for cell in cells if config_key(cell) not in done]
+    results = [done[config_key(cell)] for cell in cells
+               if config_key(cell) in done]
+    print(f"共 {len(cells)} 个单元格，已完成 {len(results)} 个，"
+          f"待运行 {len(pending)} 个")
+    if not pending:
+        return results
+
+    output_dir = os.path.dirname(output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    # spawn：工作进程不继承父进程中已初始化的 torch 线程池
+    context = multiprocessing.get_context("spawn")
+    # 工作进程从父进程继承环境变量，在它导入 NumPy 之前就限定 BLAS 线程数
+    saved = {name: os.environ.get(name) for name in WORKER_THREAD_VARIABLES}
+    os.environ.update(dict.fromkeys(WORKER_THREAD_VARIABLES, "1"))
+    try:
+        _run_pending(pending, output, results, context,
+                     min(workers, len(pending)), log_level)
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    return results
+
+
+def _run_pending(pending, output, results, context, workers, log_level):
+    """在进程池中运行待运行的单元格，每完成一个立即追加到结果文件"""
+    with open(output, 'a', encoding='utf-8') as f, ProcessPoolExecutor(
+            max_workers=workers, mp_context=context,
+            initializer=_init_worker, initargs=(log_level,)) as pool:
+        futures = [pool.submit(run_cell, cell) for cell in pending]
+        for index, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+            f.flush()
+            results.append(result)
+            status = result.get("error") or \
+                f"电脑胜率={result['computer_win_rate']:.2f}%"
+            print(f"[{index}/{len(pending)}] 模式{result['mode']} "
+                  f"{result['opponent']:<10} {_describe_options(result['options'])} "
+                  f"{status}")
+
+
+def _describe_options(options):
+    return " ".join(f"{name}={value}" for name, value in
+                    sorted(options.items())) or "默认"
+
+
+def aggregate(results):
+    """
+    按（模式, 预测器选项）汇总
+
+    Returns:
+        list: 每种配置一行：各对手的电脑胜率、平均胜率与平均延迟，按平均胜率降序
+    """
+    rows = {}
+    for result in results:
+        if "error" in result:
+            continue
+        label = (result["mode"], _describe_options(result["options"]))
+        row = rows.setdefault(label, {"mode": label[0], "options": label[1],
+                                      "win_rates": {}, "samples": []})
+        row["win_rates"][result["opponent"]] = result["computer_win_rate"]
+        row["samples"].append(result)
+
+    table = []
+    for row in rows.values():
+        samples = row.pop("samples")
+        row["mean_win_rate"] = round(float(np.mean(
+            list(row["win_rates"].values()))), 2)
+        for metric in ("predict_mean_us", "predict_p99_us",
+                       "update_mean_us", "rounds_per_sec"):
+            values = [sample[metric] for sample in samples
+                      if sample.get(metric) is not None]
+            row[metric] = round(float(np.mean(values)), 2) if values else None
+        table.append(row)
+    table.sort(key=lambda row: row["mean_win_rate"], reverse=True)
+    return table
+
+
+def print_tables(table, opponents):
+    """打印胜率表与延迟表"""
+    print("\n电脑胜率（%）:")
+    print(f"{'模式':<4} {'选项':<48} " +
+          " ".join(f"{name:>9}" for name in opponents) + f" {'平均':>8}")
+    for row in table:
+        rates = " ".join(f"{row['win_rates'][name]:9.2f}"
+                         if name in row["win_rates"] else f"{'-':>9}"
+                         for name in opponents)
+        print(f"{row['mode']:<4} {row['options']:<48} {rates} "
+              f"{row['mean_win_rate']:8.2f}")
+
+    print("\n延迟（微秒，各对手平均）:")
+    print(f"{'模式':<4} {'选项':<48} {'预测均值':>10} {'预测p99':>10} "
+          f"{'更新均值':>10} {'局/秒':>10}")
+
+    def cell(value):
+        return f"{value:10.1f}" if value is not None else f"{'-':>10}"
+
+    for row in table:
+        print(f"{row['mode']:<4} {row['options']:<48} "
+              f"{cell(row['predict_mean_us'])} {cell(row['predict_p99_us'])} "
+              f"{cell(row['update_mean_us'])} {cell(row['rounds_per_sec'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="预测器超参数扫描：多进程并行对战脚本化对手，汇总胜率与延迟")
+    parser.add_argument("--modes", nargs="+", default=["1", "2"],
+                        help=f"预测器模式: {', '.join(available_modes())}")
+    parser.add_argument("--opponents", nargs="+", default=list(OPPONENTS),
+                        help=f"对手策略: {', '.join(OPPONENTS)}")
+    parser.add_argument("--grid", nargs="*", default=None,
+                        help="超参数网格，例如 window=5,10,20 hidden_size=16,32；"
+                             "默认 " + " ".join(
+                                 f"{name}={','.join(map(str, values))}"
+                                 for name, values in DEFAULT_GRID.items()))
+    parser.add_argument("--rounds", type=int, default=500, help="每个单元格的局数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="进程数，默认 CPU 核数")
+    parser.add_argument("--output", default="./dataset/sweep/results.jsonl",
+                        help="结果文件（JSON 行），已完成的单元格在续跑时跳过")
+    parser.add_argument("--summary", default=None,
+                        help="把汇总表写入该 JSON 文件")
+    parser.add_argument("--log-level", default="WARNING",
+                        help="工作进程的终端日志级别")
+    args = parser.parse_args(argv)
+
+    # 参数错误在启动工作进程之前报告，而不是让每个单元格各自失败
+    try:
+        grid = None if args.grid is None else parse_grid(args.grid)
+        validate_sweep(args.modes, args.opponents, grid)
+    except ValueError as e:
+        parser.error(str(e))
+    if grid is None:
+        grid = DEFAULT_GRID
+    cells = build_cells(args.modes, args.opponents, grid, args.rounds,
+                        args.seed)
+    results = run_sweep(cells, args.output, workers=args.workers,
+                        log_level=args.log_level)
+
+    failed = [result for result in results if "error" in result]
+    for result in failed:
+        print(f"失败: 模式{result['mode']} {result['opponent']} "
+              f"{_describe_options(result['options'])}: {result['error']}")
+
+    table = aggregate(results)
+    print_tables(table, args.opponents)
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            json.dump(table, f, ensure_ascii=False, indent=2)
+        print(f"\n汇总已写入: {args.summary}")
+
+
+if __name__ == "__main__":
+    main()
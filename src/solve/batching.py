@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    跨会话的微批推理调度器
+
+    多个线程各自提交单个预测请求，调度线程收集第一个请求到达后 window_ms 内
+    （或攒满 max_batch 个）的全部请求，调用一次 predict_batch 批量计算，再把结果分发回去。
+    窗口越长、批越大，吞吐越高；窗口越短，单个请求的等待越少（p99 延迟越低）。
+    """
+
+    def __init__(self, predict_batch, window_ms=2.0, max_batch=64,
+                 name="rps-batcher", latency_samples=10000):
+        """
+        Args:
+            predict_batch (callable): 接收请求列表、返回等长结果序列的批量预测函数
+            window_ms (float): 批处理窗口（毫秒）
+            max_batch (int): 每批最多的请求数
+            name (str): 调度线程名称
+            latency_samples (int): 保留用于计算延迟分位数的最近请求数
+        """
+        self.predict_batch = predict_batch
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+
+        self.stats = {"requests": 0, "batches": 0, "largest_batch": 0}
+        self.latencies = deque(maxlen=latency_samples)
+
+        self.thread = threading.Thread(target=self._loop, name=name,
+                                       daemon=True)
+        self.thread.start()
+
+    def submit(self, item):
+        """
+        提交一个预测请求
+
+        Returns:
+            concurrent.futures.Future: 预测结果（可用 asyncio.wrap_future 在协程中等待）
+        """
+        future = Future()
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("批处理调度器已关闭")
+            self.queue.append((item, future, time.perf_counter()))
+            self.condition.notify()
+        return future
+
+    def predict(self, item):
+        """提交请求并阻塞等待结果"""
+        return self.submit(item).result()
+
+    def _next_batch(self):
+        """等待并取出下一批请求，调度器关闭且队列为空时返回 None"""
+        with self.condition:
+            while not self.queue and not self.closed:
+                self.condition.wait()
+            if not self.queue:
+                return None
+
+            # 从第一个请求到达起最多等待一个窗口
+            deadline = self.queue[0][2] + self.window
+            while len(self.queue) < self.max_batch and not self.closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+
+            size = min(self.max_batch, len(self.queue))
+            return [self.queue.popleft() for _ in range(size)]
+
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            try:
+                results = self.predict_batch([item for item, _, _ in batch])
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+
+            now = time.perf_counter()
+            # 统计在 condition 内更新，get_stats 在其他线程中读取
+            with self.condition:
+                self.latencies.extend(now - queued for _, _, queued in batch)
+                self.stats["requests"] += len(batch)
+                self.stats["batches"] += 1
+                self.stats["largest_batch"] = max(
+                    self.stats["largest_batch"], len(batch))
+
+    def get_stats(self):
+        """
+        获取批处理统计
+
+        Returns:
+            dict: 请求数、批数、平均批大小与延迟分位数（毫秒）
+        """
+        # 在 condition 内复制，调度线程不会在迭代途中修改
+        with self.condition:
+            stats = dict(self.stats)
+            latencies = np.array(self.latencies, dtype=np.float64)
+        stats["window_ms"] = self.window * 1000
+        stats["max_batch"] = self.max_batch
+        stats["mean_batch"] = round(stats["requests"] / stats["batches"], 2) \
+            if stats["batches"] else None
+        if len(latencies):
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1000
+            stats.update({"p50_ms": round(float(p50), 3),
+                          "p90_ms": round(float(p90), 3),
+                          "p99_ms": round(float(p99), 3)})
+        return stats
+
+    def close(self):
+        """处理完已提交的请求后停止调度线程"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+
@@ -0,0 +1,76 @@
+import hashlib
+import os
+
+import torch
+
+from src.control.logs import get_logger
+
+
+logger = get_logger("checkpoint")
+
+# 检查点格式版本，格式变化时递增以使旧检查点失效
+# 2: 一维卷积网络改为按时间步重塑输入，旧权重的通道含义不同
+CHECKPOINT_VERSION = 2
+
+
+def model_signature(model, **config):
+    """
+    计算模型结构签名
+
+    由模型类名、各参数的名称与形状以及额外配置共同决定，
+    网络结构或配置变化后签名随之改变，旧检查点即被视为无效。
+
+    Args:
+        model (nn.Module): 模型
+        **config: 影响训练/推理的额外配置（例如窗口长度）
+
+    Returns:
+        str: 签名字符串
+    """
+    parts = [f"v{CHECKPOINT_VERSION}", model.__class__.__name__]
+    parts.extend(f"{name}:{tuple(tensor.shape)}"
+                 for name, tensor in model.state_dict().items())
+    parts.extend(f"{key}={config[key]}" for key in sorted(config))
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def save_checkpoint(path, model, optimizer, signature, history_offset):
+    """
+    原子地保存检查点（先写临时文件再替换）
+
+    Args:
+        path (str): 检查点路径
+        model (nn.Module): 模型
+        optimizer (Optimizer): 优化器
+        signature (str): 模型结构签名
+        history_offset (int): 已训练到的历史位置（总局数）
+    """
+    payload = {
+        "signature": signature,
+        "model": model.state_dict(),
+        "optimizer": optimizer.state_dict(),
+        "history_offset": history_offset
+    }
+    tmp_path = path + ".tmp"
+    torch.save(payload, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path, signature, device="cpu"):
+    """
+    读取检查点，签名不一致或文件损坏时返回 None
+
+    Returns:
+        dict: {"model", "optimizer", "history_offset", ...} 或 None
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        payload = torch.load(path, map_location=device)
+    except Exception as e:
+        logger.warning("读取检查点失败: %s", e)
+        return None
+    if payload.get("signature") != signature:
+        logger.warning("检查点与当前模型结构不一致，已忽略")
+        return None
+    return payload
@@ -0,0 +1,155 @@
+import json
+
+from src.control.logs import get_logger
+
+
+logger = get_logger("config")
+
+
+class PredictorConfig:
+    """
+    神经网络预测器配置
+
+    窗口长度、网络大小、训练参数与设备集中在这里，网络的各个形状都由它推导：
+    输入维度 = window * 3，推理上下文与训练样本都是最近 window 个动作。
+    可以从 JSON 文件或命令行加载，不同部署使用不同的配置而无需改代码，
+    例如延迟敏感的服务用短窗口，离线分析用长窗口。
+
+    文件格式（省略的字段取默认值）:
+        {"window": 5, "hidden_size": 16, "epochs": 50, "lr": 0.001, "device": "cpu"}
+    """
+
+    # 字段 → (类型, 默认值, 说明)
+    FIELDS = {
+        "window": (int, 10, "窗口长度：用最近多少个动作预测下一个动作"),
+        "hidden_size": (int, 32, "隐藏层大小"),
+        "epochs": (int, 100, "完整训练的轮数"),
+        "lr": (float, 0.001, "Adam 学习率"),
+        "device": (str, "auto", "训练与推理设备：auto、cpu、cuda 或 cuda:N"),
+        "kernel_size": (int, 5, "一维卷积的卷积核大小（只用于模式2）"),
+    }
+
+    def __init__(self, window=10, hidden_size=32, epochs=100, lr=0.001,
+                 device="auto", kernel_size=5):
+        """
+        Args:
+            window (int): 窗口长度
+            hidden_size (int): 隐藏层大小
+            epochs (int): 完整训练的轮数
+            lr (float): Adam 学习率
+            device (str): "auto" 表示有 CUDA 时使用 CUDA，否则使用 CPU
+            kernel_size (int): 一维卷积的卷积核大小
+
+        Raises:
+            ValueError: 取值不合法
+        """
+        self.window = int(window)
+        self.hidden_size = int(hidden_size)
+        self.epochs = int(epochs)
+        self.lr = float(lr)
+        self.device = str(device)
+        self.kernel_size = int(kernel_size)
+
+        for name in ("window", "hidden_size", "kernel_size"):
+            if getattr(self, name) < 1:
+                raise ValueError(f"{name} 必须大于 0: {getattr(self, name)}")
+        if self.epochs < 0:
+            raise ValueError(f"epochs 不能为负数: {self.epochs}")
+        if self.lr <= 0:
+            raise ValueError(f"lr 必须大于 0: {self.lr}")
+
+    @property
+    def input_size(self):
+        """输入维度：window 个动作的 one-hot 拼接"""
+        return self.window * 3
+
+    def resolve_device(self):
+        """
+        解析设备（导入 torch）
+
+        指定了 CUDA 但不可用时记录警告并退回 CPU。
+
+        Returns:
+            torch.device: 设备
+        """
+        import torch
+
+        if self.device == "auto":
+            return torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        device = torch.device(self.device)
+        if device.type == "cuda" and not torch.cuda.is_available():
+            logger.warning("CUDA 不可用，设备 %s 退回 CPU", self.device)
+            return torch.device("cpu")
+        return device
+
+    def replace(self, **changes):
+        """返回修改了部分字段的新配置"""
+        values = self.to_dict()
+        values.update(changes)
+        return PredictorConfig(**values)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Raises:
+            ValueError: 包含未知字段或取值不合法
+        """
+        unknown = set(data) - set(cls.FIELDS)
+        if unknown:
+            raise ValueError(f"未知的预测器配置字段: {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+    @classmethod
+    def coerce(cls, config):
+        """把 None、dict 或 PredictorConfig 统一为 PredictorConfig"""
+        if config is None:
+            return cls()
+        if isinstance(config, cls):
+            return config
+        return cls.from_dict(config)
+
+    @classmethod
+    def load(cls, path):
+        """从 JSON 文件加载配置"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def add_arguments(cls, parser):
+        """
+        向 argparse 解析器添加 --predictor-config 与各字段的命令行参数
+
+        命令行参数默认为 None，只有显式给出时才覆盖配置文件中的值。
+        """
+        group = parser.add_argument_group("预测器配置")
+        group.add_argument("--predictor-config", default=None,
+                           help="预测器配置 JSON 文件")
+        for name, (kind, default, description) in cls.FIELDS.items():
+            group.add_argument("--" + name.replace("_", "-"), dest=name,
+                               type=kind, default=None,
+                               help=f"{description}（默认 {default}）")
+
+    @classmethod
+    def from_args(cls, args):
+        """由 add_arguments 解析出的参数构建配置：先读配置文件，再应用命令行覆盖"""
+        config = cls.load(args.predictor_config) \
+            if args.predictor_config else cls()
+        overrides = {name: getattr(args, name) for name in cls.FIELDS
+                     if getattr(args, name) is not None}
+        return config.replace(**overrides) if overrides else config
+
+    def __eq__(self, other):
+        return isinstance(other, PredictorConfig) and \
+            self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={value!r}"
+                           for name, value in self.to_dict().items())
+        return f"PredictorConfig({fields})"
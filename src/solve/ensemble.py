@@ -0,0 +1,388 @@
+import random
+import time
+from collections import deque
+
+import numpy as np
+
+from src.control.logs import get_logger
+from src.control.storage import GameLogStore
+from src.solve.registry import create_predictor, describe_mode
+
+
+logger = get_logger("ensemble")
+
+
+# 预测用户动作为 p 时，三种“二次猜测”旋转下电脑的出拳：
+# (p+2)%3 直接赢 p；(p+1)%3 假设用户料到这一步；p 再多猜一层
+ROTATIONS = np.array([2, 1, 0])
+
+# 以 (电脑动作 - 用户动作) % 3 为下标的电脑得分：平 0，负 -1，胜 +1
+OUTCOME = np.array([0.0, -1.0, 1.0])
+
+
+class SequenceTables:
+    """
+    同时维护若干条动作序列（例如用户动作、电脑动作）的预测表
+
+    每条序列包含三类策略，全部用数组运算一次求出：
+    - 频率：若干衰减系数下的动作计数，预测出现最多的动作
+    - n-gram：长度 0..order 的上下文之后各动作的计数
+    - 模式匹配：长度 0..order 的上下文最近一次出现后紧跟的动作
+    上下文按 3 进制编码，长度 L 的上下文 c 在计数表中位于 bases[L] + c*3。
+    """
+
+    def __init__(self, streams, order=5, decays=(1.0, 0.9, 0.6)):
+        """
+        Args:
+            streams (int): 序列条数
+            order (int): 最长上下文长度
+            decays (tuple): 频率策略的衰减系数
+        """
+        self.streams = streams
+        self.order = order
+        self.powers = 3 ** np.arange(order + 1)
+        self.bases = 3 * (self.powers - 1) // 2
+        size = int(self.bases[-1] + 3 * self.powers[-1])
+
+        self.counts = np.zeros((streams, size))
+        self.last = np.full((streams, size // 3), -1, dtype=np.int64)
+        self.decays = np.asarray(decays, dtype=np.float64)
+        self.frequency = np.zeros((streams, len(decays), 3))
+        self.contexts = np.zeros((streams, order + 1), dtype=np.int64)
+        self.seen = 0
+
+        self._rows = np.arange(streams)[:, None]
+        self._lengths = np.arange(order + 1)
+
+    @property
+    def width(self):
+        """每条序列的策略数"""
+        return len(self.decays) + 2 * (self.order + 1)
+
+    def names(self, prefix):
+        """策略名称（与 predict 的列顺序一致）"""
+        return ([f"{prefix}-freq-{decay:g}" for decay in self.decays]
+                + [f"{prefix}-ngram-{length}" for length in self._lengths]
+                + [f"{prefix}-match-{length}" for length in self._lengths])
+
+    def predict(self):
+        """
+        Returns:
+            np.ndarray: (streams, width) 各策略预测的下一个动作编码，无数据时为 -1
+        """
+        frequency = self.frequency.argmax(axis=2)
+        frequency[self.frequency.sum(axis=2) <= 0] = -1
+
+        index = self.bases + self.contexts * 3
+        counts = self.counts[self._rows[:, :, None],
+                             index[:, :, None] + np.arange(3)]
+        ngram = counts.argmax(axis=2)
+        usable = (counts.sum(axis=2) > 0) & (self._lengths <= self.seen)
+        ngram[~usable] = -1
+
+        match = self.last[self._rows, index // 3]
+        match[:, self._lengths > self.seen] = -1
+        return np.concatenate([frequency, ngram, match], axis=1)
+
+    def update(self, codes):
+        """
+        记录每条序列的下一个动作（每条 O(order)）
+
+        Args:
+            codes (np.ndarray): (streams,) 动作编码
+        """
+        lengths = self._lengths[self._lengths <= self.seen]
+        index = self.bases[lengths] + self.contexts[:, lengths] * 3
+        self.counts[self._rows, index + codes[:, None]] += 1
+        self.last[self._rows, index // 3] = codes[:, None]
+
+        self.frequency *= self.decays[:, None]
+        self.frequency[np.arange(self.streams), :, codes] += 1
+
+        self.contexts = (self.contexts * 3 + codes[:, None]) % self.powers
+        self.seen += 1
+
+    def fit(self, codes):
+        """
+        从空状态批量加载历史序列（向量化）
+
+        Args:
+            codes (np.ndarray): (streams, N) 动作编码
+        """
+        codes = np.asarray(codes, dtype=np.int64)
+        n = codes.shape[1]
+        if n == 0:
+            return
+
+        ages = np.arange(n - 1, -1, -1, dtype=np.float64)
+        for slot, decay in enumerate(self.decays):
+            weights = np.power(decay, ages)
+            for stream in range(self.streams):
+                self.frequency[stream, slot] = np.bincount(
+                    codes[stream], weights=weights, minlength=3)
+
+        context = np.zeros_like(codes)
+        positions = np.arange(n)
+        for length in self._lengths:
+            if length > 0:
+                # 长度 L 的上下文 = 长度 L-1 的上下文左移一位再拼上前一个动作
+                shifted = np.zeros_like(context)
+                shifted[:, 1:] = context[:, :-1] * 3 + codes[:, :-1]
+                context = shifted
+            valid = positions >= length
+            index = self.bases[length] + context[:, valid] * 3
+            targets = codes[:, valid]
+            for stream in range(self.streams):
+                np.add.at(self.counts[stream],
+                          index[stream] + targets[stream], 1)
+                # 同一上下文只保留最后一次出现后的动作
+                slots, first = np.unique(index[stream][::-1] // 3,
+                                         return_index=True)
+                self.last[stream, slots] = targets[stream][::-1][first]
+
+        tail = codes[:, -self.order:] if self.order else codes[:, :0]
+        contexts = np.zeros_like(self.contexts)
+        for length in range(1, self.order + 1):
+            for code in tail[:, -length:].T:
+                contexts[:, length] = contexts[:, length] * 3 + code
+        self.contexts = contexts
+        self.seen = n
+
+    # 以 NumPy 数组保存的字段
+    ARRAY_FIELDS = ("counts", "last", "frequency", "contexts")
+
+    def get_state(self):
+        state = {name: getattr(self, name).copy() for name in self.ARRAY_FIELDS}
+        state["seen"] = self.seen
+        return state
+
+    def set_state(self, state):
+        """
+        Raises:
+            ValueError: 状态与当前序列条数、order 或衰减系数不一致
+        """
+        for name in self.ARRAY_FIELDS:
+            value = np.asarray(state[name])
+            if value.shape != getattr(self, name).shape:
+                raise ValueError(f"序列表状态 {name} 的形状不一致")
+            setattr(self, name, value.astype(getattr(self, name).dtype))
+        self.seen = int(state["seen"])
+
+
+class EnsembleRPSPredictor:
+    """
+    集成元策略预测器
+
+    每局同时运行一组基础策略：用户动作序列与电脑自身动作序列上的频率、
+    n-gram 与模式匹配，以及可选的神经网络预测器（模式 1、2）。
+    每个基础预测再展开为三种“二次猜测”旋转，构成候选策略矩阵。
+    候选策略按衰减窗口内的假想战绩增量计分，每局选当前得分最高者出拳。
+    """
+
+    def __init__(self, data_filename="rps_dataset.json", order=5,
+                 frequency_decays=(1.0, 0.9, 0.6), score_decay=0.99,
+                 members=("1", "2"), verbose=True, background=False,
+                 member_options=None, config=None, base_dir="./dataset"):
+        """
+        Args:
+            data_filename (str): 数据集文件名称，None 表示不加载历史数据
+            order (int): n-gram 与模式匹配的最长上下文长度
+            frequency_decays (tuple): 频率策略的衰减系数
+            score_decay (float): 候选策略得分的每局衰减系数
+            members (tuple): 作为成员加入的其他预测器模式（例如神经网络 "1"、"2"）
+            verbose (bool): 是否输出每局的选择信息（DEBUG 级日志）
+            background (bool): 成员预测器是否在后台线程中训练
+            member_options (dict): 传给成员预测器的额外选项
+            config (PredictorConfig | dict): 神经网络成员的配置，None 表示默认配置
+            base_dir (str): 数据集根目录（成员预测器使用同一目录）
+        """
+        self.data_filename = data_filename
+        self.base_dir = base_dir
+        self.score_decay = score_decay
+        self.verbose = verbose
+        self.actions = ["rock", "scissors", "paper"]
+        self.action_to_idx = {action: idx for idx,
+                              action in enumerate(self.actions)}
+        self.recent_actions = deque(maxlen=10)
+
+        # 两条序列：0 为用户动作，1 为电脑动作
+        self.tables = SequenceTables(2, order, frequency_decays)
+        self.members = []
+        member_options = dict(member_options or {})
+        if config is not None:
+            member_options["config"] = config
+        for mode in members:
+            try:
+                self.members.append((mode, create_predictor(
+                    mode, data_filename, verbose=False, background=background,
+                    base_dir=base_dir, **member_options)))
+            except ImportError as e:
+                logger.warning("成员预测器 %s 不可用，已跳过: %s",
+                               describe_mode(mode), e)
+
+        base_names = (self.tables.names("user")
+                      + self.tables.names("self")
+                      + [f"mode{mode}" for mode, _ in self.members])
+        self.strategy_names = [f"{name}/r{rotation}" for name in base_names
+                               for rotation in range(len(ROTATIONS))]
+        self.scores = np.zeros((len(base_names), len(ROTATIONS)))
+        self.predictions = np.empty(len(base_names), dtype=np.int64)
+        self.last_strategy = None
+
+        self.stats = {"rounds": 0, "ensemble_ms": 0.0}
+        self._load_historical_data()
+
+    def _load_historical_data(self):
+        """批量加载历史对局中的用户与电脑动作"""
+        if self.data_filename is None:
+            return
+
+        try:
+            history = GameLogStore(self.data_filename,
+                                  base_dir=self.base_dir).open_history()
+            users = history.user_codes()
+            if len(users):
+                self.tables.fit(np.stack([users, history.computer_codes()]))
+                self.recent_actions.extend(
+                    self.actions[code] for code in users[-10:].tolist())
+            if self.verbose:
+                logger.info("加载了 %d 条历史对局", len(users))
+        except Exception as e:
+            logger.warning("加载历史数据失败: %s", e)
+
+    def _predict_codes(self, user_choice):
+        """
+        所有基础策略对用户本局动作的预测
+
+        成员预测器按自身协议先预测再记录 user_choice，不会提前看到本局动作。
+        """
+        predictions = self.predictions
+        table = self.tables.predict()
+        width = self.tables.width
+        predictions[:width] = table[0]
+
+        # 电脑序列的预测 q 视为“用户以为电脑会出 q”，用户会出能赢 q 的 (q+2)%3
+        own = table[1]
+        predictions[width:2 * width] = np.where(own >= 0, (own + 2) % 3, -1)
+
+        for slot, (_, member) in enumerate(self.members, start=2 * width):
+            # 成员返回能赢其预测的动作 m，其预测即 (m+1)%3
+            computer_choice = member.compute_choice(user_choice)
+            predictions[slot] = (self.action_to_idx[computer_choice] + 1) % 3
+        return predictions
+
+    def compute_choice(self, user_choice):
+        """
+        用当前得分最高的候选策略出拳，再按本局结果更新全部候选策略的得分
+
+        Args:
+            user_choice (str): 用户当前的选择
+
+        Returns:
+            str: 电脑的选择
+        """
+        start = time.perf_counter()
+        code = self.action_to_idx[user_choice]
+        predictions = self._predict_codes(user_choice)
+        valid = (predictions >= 0)[:, None]
+        moves = (predictions[:, None] + ROTATIONS) % 3
+
+        ranked = np.where(valid, self.scores, -np.inf)
+        best = int(ranked.argmax())
+        if ranked.flat[best] > 0:
+            computer_code = int(moves.flat[best])
+            self.last_strategy = self.strategy_names[best]
+        else:
+            computer_code = random.randrange(3)
+            self.last_strategy = None
+
+        # 所有候选策略的假想战绩一次性增量更新
+        self.scores *= self.score_decay
+        self.scores += OUTCOME[(moves - code) % 3] * valid
+        self.tables.update(np.array([code, computer_code]))
+
+        self.recent_actions.append(user_choice)
+        self.stats["rounds"] += 1
+        self.stats["ensemble_ms"] += (time.perf_counter() - start) * 1000
+
+        computer_choice = self.actions[computer_code]
+        if self.verbose:
+            if self.last_strategy is None:
+                logger.debug("暂无得分为正的策略，随机选择: %s", computer_choice)
+            else:
+                logger.debug("集成策略选择 %s（得分 %.2f），出 %s",
+                             self.last_strategy, ranked.flat[best],
+                             computer_choice)
+        return computer_choice
+
+    def update_with_new_data(self):
+        """表格策略已在 compute_choice 中更新，这里只转发给成员预测器"""
+        for _, member in self.members:
+            member.update_with_new_data()
+
+    def close(self):
+        """关闭成员预测器"""
+        for _, member in self.members:
+            close = getattr(member, "close", None)
+            if close is not None:
+                close()
+
+    def get_state(self):
+        """
+        可序列化的预测器状态（只含 NumPy 数组与 JSON 值，会话淘汰时保存）
+
+        Returns:
+            dict: 序列表、候选策略得分、最近动作与各成员预测器的状态
+        """
+        return {
+            "tables": self.tables.get_state(),
+            "scores": self.scores.copy(),
+            "last_strategy": self.last_strategy,
+            "recent_actions": list(self.recent_actions),
+            "stats": dict(self.stats),
+            "members": [{"mode": mode, "state": member.get_state()}
+                        for mode, member in self.members]
+        }
+
+    def set_state(self, state):
+        """
+        恢复 get_state 保存的状态
+
+        Raises:
+            ValueError: 状态与当前的成员或策略数不一致
+        """
+        members = state["members"]
+        if [entry["mode"] for entry in members] != \
+                [mode for mode, _ in self.members]:
+            raise ValueError("集成预测器的成员与保存的状态不一致")
+        scores = np.asarray(state["scores"], dtype=np.float64)
+        if scores.shape != self.scores.shape:
+            raise ValueError("候选策略数与保存的状态不一致")
+
+        self.tables.set_state(state["tables"])
+        for entry, (_, member) in zip(members, self.members):
+            member.set_state(entry["state"])
+        self.scores = scores
+        self.last_strategy = state["last_strategy"]
+        self.recent_actions.clear()
+        self.recent_actions.extend(state["recent_actions"])
+        self.stats.update(state["stats"])
+
+    def get_model_info(self):
+        """获取模型信息"""
+        rounds = self.stats["rounds"]
+        best = int(self.scores.argmax())
+        return {
+            "model_type": self.__class__.__name__,
+            "strategies": self.scores.size,
+            "members": [mode for mode, _ in self.members],
+            "best_strategy": self.strategy_names[best],
+            "best_score": round(float(self.scores.flat[best]), 3),
+            "last_strategy": self.last_strategy,
+            "ensemble_ms_per_round": (self.stats["ensemble_ms"] / rounds
+                                      if rounds else None)
+        }
+
+    def get_recent_sequence(self):
+        """获取最近的动作序列"""
+        return list(self.recent_actions)
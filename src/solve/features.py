@@ -0,0 +1,50 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# 动作编码：与各预测器中 self.actions 的顺序一致
+ACTIONS = ["rock", "scissors", "paper"]
+ACTION_TO_CODE = {action: idx for idx, action in enumerate(ACTIONS)}
+
+# one-hot 查表：ONE_HOT[code] 即该动作的 one-hot 编码
+ONE_HOT = np.eye(3, dtype=np.float32)
+
+
+def window_one_hot(codes, window=10):
+    """
+    一次性生成所有滑动窗口的 one-hot 张量
+
+    Args:
+        codes (np.ndarray): 整数编码的动作序列
+        window (int): 窗口长度
+
+    Returns:
+        np.ndarray: (N, window, 3) float32，N = len(codes) - window + 1
+    """
+    codes = np.asarray(codes)
+    if len(codes) < window:
+        return np.empty((0, window, 3), dtype=np.float32)
+    windows = sliding_window_view(codes, window)
+    return ONE_HOT[windows]
+
+
+def build_training_data(codes, window=10):
+    """
+    构建 window->1 的训练样本
+
+    Args:
+        codes (np.ndarray): 整数编码的动作序列
+        window (int): 窗口长度
+
+    Returns:
+        tuple: X (N, window*3) float32 为前 window 个动作的 one-hot 拼接，
+               y (N,) int64 为紧随其后的动作编码，N = len(codes) - window
+    """
+    codes = np.asarray(codes)
+    if len(codes) <= window:
+        return (np.empty((0, window * 3), dtype=np.float32),
+                np.empty(0, dtype=np.int64))
+    X = window_one_hot(codes[:-1], window).reshape(-1, window * 3)
+    y = codes[window:].astype(np.int64)
+    return X, y
+
@@ -0,0 +1,105 @@
+import numpy as np
+
+
+class ActionHistory:
+    """
+    紧凑的动作历史存储
+
+    以 int8 编码（每局 1 字节）保存用户动作，容量按需倍增。
+    设置 max_len 时只保留最近 max_len 个动作，超出部分在扩容时整体丢弃，
+    追加操作均摊 O(1)。
+    """
+
+    def __init__(self, max_len=None, initial_capacity=1024):
+        """
+        Args:
+            max_len (int): 最多保留的动作数，None 表示不限制
+            initial_capacity (int): 初始缓冲区容量
+        """
+        self.max_len = max_len
+        capacity = initial_capacity
+        if max_len is not None:
+            capacity = max(1, min(capacity, 2 * max_len))
+        self._buffer = np.empty(capacity, dtype=np.int8)
+        self._start = 0
+        self._end = 0
+        self.total = 0  # 累计追加的动作数（含已丢弃的旧动作）
+
+    def __len__(self):
+        return self._end - self._start
+
+    def _reserve(self, extra):
+        """保证尾部还能写入 extra 个元素"""
+        if self._end + extra <= len(self._buffer):
+            return
+
+        live = self._buffer[self._start:self._end]
+        if self.max_len is not None:
+            # 只保留最近的 max_len 个（新数据会覆盖更多旧数据时再截断）
+            live = live[-self.max_len:]
+        needed = len(live) + extra
+        capacity = len(self._buffer)
+        while capacity < needed:
+            capacity *= 2
+        if self.max_len is not None:
+            capacity = max(min(capacity, 2 * self.max_len), needed)
+
+        buffer = np.empty(capacity, dtype=np.int8) \
+            if capacity != len(self._buffer) else self._buffer
+        buffer[:len(live)] = live
+        self._buffer = buffer
+        self._start = 0
+        self._end = len(live)
+
+    def append(self, code):
+        """追加一个动作编码"""
+        self._reserve(1)
+        self._buffer[self._end] = code
+        self._end += 1
+        self.total += 1
+        self._trim()
+
+    def extend(self, codes):
+        """批量追加动作编码"""
+        codes = np.asarray(codes, dtype=np.int8)
+        self.total += len(codes)
+        if self.max_len is not None:
+            codes = codes[-self.max_len:]
+        self._reserve(len(codes))
+        self._buffer[self._end:self._end + len(codes)] = codes
+        self._end += len(codes)
+        self._trim()
+
+    def skip(self, count):
+        """记录 count 个未载入的更早动作（只计入 total，例如有界历史只加载尾部时）"""
+        self.total += count
+
+    def _trim(self):
+        """超出 max_len 时前移起点（不搬移数据）"""
+        if self.max_len is not None and len(self) > self.max_len:
+            self._start = self._end - self.max_len
+
+    def view(self):
+        """全部保留动作的只读视图（不复制）"""
+        view = self._buffer[self._start:self._end]
+        view.flags.writeable = False
+        return view
+
+    def since(self, offset, context=0):
+        """
+        从累计位置 offset 开始的动作视图，并向前多带 context 个动作作为上下文
+
+        Args:
+            offset (int): 累计位置（与 total 同一计数）
+            context (int): 额外包含的前序动作数
+        """
+        first = self.total - len(self)
+        return self.view()[max(0, offset - first - context):]
+
+    def tail(self, k):
+        """最近 k 个动作的视图"""
+        return self.view()[-k:] if k > 0 else self.view()[:0]
+
+    def nbytes(self):
+        """缓冲区占用的字节数"""
+        return self._buffer.nbytes
@@ -0,0 +1,772 @@
+import copy
+import logging
+import random
+import threading
+import time
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from collections import deque
+
+from src.control.logs import get_logger
+from src.control.storage import GameLogStore
+from src.solve.checkpoint import (
+    load_checkpoint, model_signature, save_checkpoint)
+from src.solve.config import PredictorConfig
+from src.solve.features import ONE_HOT, build_training_data
+from src.solve.history import ActionHistory
+from src.solve.worker import TrainingWorker
+
+
+logger = get_logger("neural")
+
+
+class NeuralRPSPredictor:
+    """
+    神经网络预测器基类
+
+    负责历史数据、在线/完整训练、后台训练、检查点和耗时统计，
+    子类只需提供网络结构（_build_network），可选提供导出推理器（_export_inference）。
+    """
+
+    # 日志信息中的模型名称，例如 "一维卷积"
+    model_label = ""
+
+    # 网络用到的 PredictorConfig 字段（超参数扫描只展开这些字段）
+    config_fields = ("window", "hidden_size", "epochs", "lr", "device")
+
+    def __init__(self, data_filename="rps_dataset.json", max_history=None,
+                 verbose=True, online=True, online_steps=5, replay_size=256,
+                 replay_batch=16, full_retrain_every=0, background=False,
+                 checkpoint=True, checkpoint_every=100, config=None,
+                 base_dir="./dataset"):
+        """
+        Args:
+            data_filename (str): 数据集文件名称，None 表示不加载历史数据
+            max_history (int): 训练历史最多保留的局数，None 表示保留全部
+            verbose (bool): 是否输出每局的预测与训练信息（日志）
+            online (bool): 是否使用在线学习（每局只在最新窗口上走少量梯度步）
+            online_steps (int): 在线学习每局的梯度步数
+            replay_size (int): 在线学习回放缓冲区容量
+            replay_batch (int): 每次在线更新的批大小（最新样本 + 回放样本）
+            full_retrain_every (int): 每隔多少局做一次完整重训练，0 表示不自动重训练
+            background (bool): 是否在后台线程中训练（训练模型副本，完成后原子替换）
+            checkpoint (bool): 是否在数据集旁保存/加载模型检查点
+            checkpoint_every (int): 在线学习时每隔多少局保存一次检查点
+            config (PredictorConfig | dict): 窗口长度、网络大小、训练参数与设备，
+                None 表示默认配置，见 src/solve/config.py
+            base_dir (str): 数据集根目录
+        """
+        self.data_filename = data_filename
+        self.base_dir = base_dir
+        self.verbose = verbose
+        self.actions = ["rock", "scissors", "paper"]
+        self.action_to_idx = {action: idx for idx,
+                              action in enumerate(self.actions)}
+        self.idx_to_action = {idx: action for action,
+                              idx in self.action_to_idx.items()}
+
+        self.winning_actions = {
+            "rock": "paper",      # 布赢石头
+            "scissors": "rock",   # 石头赢剪刀
+            "paper": "scissors"   # 剪刀赢布
+        }
+
+        # 神经网络参数：所有形状都由配置推导
+        self.config = config = PredictorConfig.coerce(config)
+        self.window = config.window
+        self.input_size = config.input_size  # window 个动作 * 3个特征(one-hot)
+        self.hidden_size = config.hidden_size
+        self.output_size = 3  # 3个类别
+        self.lr = config.lr
+        self.epochs = config.epochs
+
+        # 数据存储
+        self.recent_actions = deque(maxlen=self.window)  # 推理上下文：最近 window 个动作
+        self.history = ActionHistory(max_history)  # 训练历史：每局1字节
+        self.total_games = 0
+
+        # 在线学习参数
+        self.online = online
+        self.online_steps = online_steps
+        self.replay_batch = replay_batch
+        self.full_retrain_every = full_retrain_every
+        self.replay_buffer = deque(maxlen=replay_size)  # (特征, 目标) 样本
+        self.pending_samples = deque(maxlen=replay_size)  # 尚未训练的新样本
+        self.rounds_since_retrain = 0
+        self.retrain_from = None  # 待重训练的起始位置（累计局数），None 表示无
+
+        # 检查点：保存在数据集旁，记录已训练到的历史位置
+        self.use_checkpoint = checkpoint
+        self.checkpoint_path = None
+        self.checkpoint_every = checkpoint_every
+        self.signature = None
+        self.trained_offset = 0
+        self.rounds_since_checkpoint = 0
+
+        # 推理上下文的 one-hot 环形缓冲区：每个动作同时写入前后两半，
+        # 因此最近 window 个动作的特征总是一段连续视图，无需拼接或复制
+        self.context_ring = np.zeros(2 * self.input_size, dtype=np.float32)
+        self.context_slot = 0
+
+        # 神经网络模型
+        self.model = None
+        self.optimizer = None
+        self.inference = None  # 已发布模型的导出推理器（可选）
+        self.criterion = nn.CrossEntropyLoss()
+
+        # 耗时与准确率统计，用于比较不同模型的“每 CPU 毫秒准确率”
+        self.stats = {
+            "predictions": 0,
+            "model_predictions": 0,
+            "correct_predictions": 0,
+            "predict_ms": 0.0,
+            "predict_cpu_ms": 0.0,
+            "train_jobs": 0,
+            "train_ms": 0.0,
+            "train_cpu_ms": 0.0
+        }
+
+        # 设备
+        self.device = config.resolve_device()
+
+        # 后台训练：lock 保护历史数据、待训练样本和已发布模型的替换
+        self.lock = threading.Lock()
+        # 同步训练原地更新已发布的模型：训练与 torch 推理在 model_lock 上串行，
+        # 多个线程共用一个模型时（例如会话共享模型）不会读到训练中途的权重
+        self.model_lock = threading.RLock()
+        self.worker = TrainingWorker(self._run_training) if background else None
+
+        # 加载历史数据
+        self._load_historical_data()
+
+    def _build_network(self):
+        """创建网络结构（子类实现）"""
+        raise NotImplementedError
+
+    def _export_inference(self, model):
+        """导出不经过 torch 的推理器，返回 None 表示使用 torch 推理"""
+        return None
+
+    def _load_historical_data(self):
+        """加载历史数据"""
+        if self.data_filename is None:
+            return
+
+        try:
+            store = GameLogStore(self.data_filename, base_dir=self.base_dir)
+            self.total_games = store.metadata["total_games"]
+            if self.use_checkpoint:
+                self.checkpoint_path = store.sidecar_path(
+                    f".{self.__class__.__name__}.pt")
+
+            # 内存映射读取用户选择历史：按块解码，有界历史只读取尾部
+            history = store.open_history()
+            start = 0
+            if self.history.max_len is not None:
+                start = max(0, len(history) - self.history.max_len)
+                self.history.skip(history.count_valid(0, start))
+            for codes in history.iter_user_codes(start):
+                self.history.extend(codes)
+            for code in self.history.tail(self.window).tolist():
+                self.recent_actions.append(self.actions[code])
+                self._push_context(code)
+
+            if self.verbose:
+                logger.info("加载了 %d 条历史用户选择", len(self.history))
+
+            # 优先从检查点恢复，只训练检查点之后新增的数据
+            start = self._load_checkpoint()
+
+            # 如果数据足够，训练模型（后台模式下不阻塞启动）
+            if self.history.total - start >= 1 and len(self.history) > self.window:
+                self.retrain(start)
+
+        except Exception as e:
+            logger.warning("加载历史数据失败: %s", e)
+
+    def _publish_model(self, model, optimizer):
+        """发布新模型，并刷新导出的推理权重"""
+        inference = self._export_inference(model)
+        self.model, self.optimizer = model, optimizer
+        self.inference = inference
+
+    def _create_model(self):
+        """创建新的模型与优化器"""
+        model = self._build_network()
+        model.to(self.device)
+        optimizer = optim.Adam(model.parameters(), lr=self.lr)
+        return model, optimizer
+
+    def _signature(self):
+        """当前模型结构签名"""
+        if self.signature is None:
+            self.signature = model_signature(self._build_network(),
+                                             window=self.window)
+        return self.signature
+
+    def _load_checkpoint(self):
+        """
+        加载检查点
+
+        Returns:
+            int: 检查点已训练到的历史位置，无有效检查点时为 0
+        """
+        payload = load_checkpoint(self.checkpoint_path, self._signature(),
+                                  self.device)
+        if payload is None:
+            return 0
+        offset = payload["history_offset"]
+        if offset > self.history.total:
+            # 数据集比检查点旧（例如被替换），检查点不可用
+            return 0
+
+        model, optimizer = self._create_model()
+        model.load_state_dict(payload["model"])
+        optimizer.load_state_dict(payload["optimizer"])
+        # 优化器状态会带回保存时的学习率，以当前配置为准
+        for group in optimizer.param_groups:
+            group["lr"] = self.lr
+        self._publish_model(model, optimizer)
+        self.trained_offset = offset
+        if self.verbose:
+            logger.info("已从检查点恢复%s模型（已训练 %d 局）",
+                        self.model_label, offset)
+        return offset
+
+    def _save_checkpoint(self, model, optimizer, offset):
+        """保存检查点（在训练线程中调用）"""
+        if self.checkpoint_path is None:
+            return
+        try:
+            save_checkpoint(self.checkpoint_path, model, optimizer,
+                            self._signature(), offset)
+            self.rounds_since_checkpoint = 0
+        except Exception as e:
+            logger.error("保存检查点失败: %s", e)
+
+    def _clone_model(self):
+        """复制当前模型与优化器状态，供后台训练使用"""
+        model = copy.deepcopy(self.model)
+        optimizer = optim.Adam(model.parameters(), lr=self.lr)
+        optimizer.load_state_dict(self.optimizer.state_dict())
+        return model, optimizer
+
+    def _prepare_training_data(self, codes=None):
+        """准备训练数据"""
+        if codes is None:
+            codes = self.history.view()
+        if len(codes) <= self.window:  # 需要至少 window+1 个数据来创建 window->1 的映射
+            return None, None
+
+        # 在训练历史上一次性向量化构建所有滑动窗口样本
+        return build_training_data(codes, self.window)
+
+    def _train_model(self, model=None, optimizer=None, codes=None):
+        """训练模型（默认训练当前模型）"""
+        if model is None:
+            model, optimizer = self.model, self.optimizer
+        X, y = self._prepare_training_data(codes)
+
+        if X is None or len(X) < 1:
+            if self.verbose:
+                logger.info("训练数据不足")
+            return
+
+        if self.verbose:
+            logger.info("开始训练%s模型，使用 %d 个样本...",
+                        self.model_label, len(X))
+
+        # 转换为张量
+        X_tensor = torch.from_numpy(X).to(self.device)
+        y_tensor = torch.from_numpy(y).to(self.device)
+
+        # 训练循环
+        model.train()
+        for epoch in range(self.epochs):
+            # 前向传播
+            outputs = model(X_tensor)
+            loss = self.criterion(outputs, y_tensor)
+
+            # 反向传播
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+
+            if epoch % 20 == 0:
+                if self.verbose and logger.isEnabledFor(logging.INFO):
+                    # loss.item() 会同步设备，只在确实输出时调用
+                    logger.info("训练轮次 %d, 损失: %.4f", epoch, loss.item())
+
+        if self.verbose:
+            logger.info("%s模型训练完成", self.model_label)
+
+    def compute_choice(self, user_choice):
+        """
+        基于前 window 个数据预测计算电脑的选择
+
+        Args:
+            user_choice (str): 用户当前的选择
+
+        Returns:
+            str: 电脑的选择
+        """
+        # 只用本局之前的 window 个动作预测用户本局动作，再记录本局选择
+        start, cpu_start = time.perf_counter(), time.thread_time()
+        computer_choice, predicted_idx = self._predict_choice()
+        stats = self.stats
+        stats["predict_ms"] += (time.perf_counter() - start) * 1000
+        stats["predict_cpu_ms"] += (time.thread_time() - cpu_start) * 1000
+
+        # 记录预测是否命中用户本局动作
+        code = self.action_to_idx[user_choice]
+        stats["predictions"] += 1
+        if predicted_idx is not None:
+            stats["model_predictions"] += 1
+            if predicted_idx == code:
+                stats["correct_predictions"] += 1
+
+        # 当前动作与之前 window 个动作构成一个新的训练样本
+        with self.lock:
+            if len(self.recent_actions) == self.window:
+                self.pending_samples.append(
+                    (self._context_features().copy(), code))
+
+            # 更新最近动作列表与训练历史
+            self.recent_actions.append(user_choice)
+            self.history.append(code)
+            self._push_context(code)
+        self.total_games += 1
+        return computer_choice
+
+    def _push_context(self, code):
+        """将一个动作的 one-hot 写入推理上下文环形缓冲区"""
+        width = self.input_size
+        offset = self.context_slot * 3
+        self.context_ring[offset:offset + 3] = ONE_HOT[code]
+        self.context_ring[offset + width:offset + width + 3] = ONE_HOT[code]
+        self.context_slot = (self.context_slot + 1) % self.window
+
+    def _context_features(self):
+        """最近 window 个动作（从旧到新）的 one-hot 拼接视图"""
+        offset = self.context_slot * 3
+        return self.context_ring[offset:offset + self.input_size]
+
+    def _predict_choice(self):
+        """
+        根据最近 window 个动作预测用户本局动作，返回能赢它的选择
+
+        Returns:
+            tuple: (电脑的选择, 预测的用户动作编码；未使用模型时为 None)
+        """
+        # 策略1: 数据不足 window 个时随机选择
+        if len(self.recent_actions) < self.window:
+            computer_choice = random.choice(self.actions)
+            if self.verbose:
+                logger.debug("数据不足 %d/%d，随机选择: %s",
+                             len(self.recent_actions), self.window,
+                             computer_choice)
+            return computer_choice, None
+
+        # 策略2: 使用模型预测
+        try:
+            # 输入特征：最近 window 个动作的one-hot拼接（环形缓冲区视图）
+            input_features = self._context_features()
+
+            logits = self._predict_logits(input_features)
+            if logits is not None:
+                predicted_idx = int(logits.argmax())
+                predicted_action = self.idx_to_action[predicted_idx]
+
+                # 选择能赢预测动作的动作
+                computer_choice = self.winning_actions[predicted_action]
+
+                if self.verbose and logger.isEnabledFor(logging.DEBUG):
+                    # 概率只在确实输出时计算
+                    exp = np.exp(logits - logits.max())
+                    probs = exp / exp.sum()
+                    prob_dict = {self.actions[i]: float(
+                        probs[i]) for i in range(3)}
+                    logger.debug("%s模型预测用户本局动作: %s，预测概率: %s，针对性选择: %s",
+                                 self.model_label, predicted_action, prob_dict,
+                                 computer_choice)
+                return computer_choice, predicted_idx
+
+        except Exception as e:
+            logger.warning("%s模型预测失败: %s", self.model_label, e)
+
+        # 备用策略: 随机选择
+        computer_choice = random.choice(self.actions)
+        if self.verbose:
+            logger.debug("备用随机选择: %s", computer_choice)
+        return computer_choice, None
+
+    def _predict_logits(self, features):
+        """
+        用最近发布的模型计算一组输入特征的 logits
+
+        后台训练不会修改已发布的模型；同步训练原地更新时，torch 推理等待 model_lock。
+
+        Returns:
+            np.ndarray: (output_size,) logits，模型尚未就绪时为 None
+        """
+        inference = self.inference
+        if inference is not None:
+            # 导出推理：预分配缓冲区上的 NumPy 运算
+            return inference.predict(features)
+
+        with self.model_lock:
+            model = self.model
+            if model is None:
+                return None
+            model.eval()
+            with torch.no_grad():
+                features_tensor = torch.from_numpy(
+                    features).unsqueeze(0).to(self.device)
+                return model(features_tensor)[0].cpu().numpy()
+
+    def _predict_logits_batch(self, features):
+        """
+        一次前向计算一批输入特征的 logits
+
+        每次调用分配新的输出数组，可以在多个线程中同时调用。
+
+        Args:
+            features (np.ndarray): (B, input_size) float32 输入特征
+
+        Returns:
+            np.ndarray: (B, output_size) logits，模型尚未就绪时为 None
+        """
+        inference = self.inference
+        if inference is not None and hasattr(inference, "predict_batch"):
+            return inference.predict_batch(features)
+
+        with self.model_lock:
+            model = self.model
+            if model is None:
+                return None
+            model.eval()
+            with torch.no_grad():
+                features_tensor = torch.from_numpy(features).to(self.device)
+                return model(features_tensor).cpu().numpy()
+
+    def predict_contexts(self, contexts):
+        """
+        批量预测多个会话的下一个动作（多个会话共享同一模型时使用，一次前向计算）
+
+        Args:
+            contexts (list): 每个会话最近的动作编码（bytes，从旧到新）
+
+        Returns:
+            np.ndarray: 预测的动作编码，上下文不足 window 个或模型未就绪时为 -1
+        """
+        predicted = np.full(len(contexts), -1, dtype=np.int64)
+        ready = [index for index, codes in enumerate(contexts)
+                 if len(codes) >= self.window]
+        if not ready:
+            return predicted
+
+        window = self.window
+        codes = np.array([list(contexts[index][-window:]) for index in ready])
+        features = ONE_HOT[codes].reshape(len(ready), -1)
+        logits = self._predict_logits_batch(features)
+        if logits is not None:
+            predicted[ready] = logits.argmax(axis=1)
+        return predicted
+
+    def predict_context(self, codes):
+        """
+        根据给定的最近 window 个动作预测下一个动作（单个会话）
+
+        Args:
+            codes (bytes): 会话最近的动作编码（从旧到新）
+
+        Returns:
+            int: 预测的动作编码，上下文不足 window 个或模型未就绪时为 -1
+        """
+        return int(self.predict_contexts([codes])[0])
+
+    def add_sample(self, codes, code):
+        """
+        把一个会话的训练样本（最近 window 个动作 → 本局动作）加入待训练队列
+
+        Args:
+            codes (bytes): 会话本局之前的动作编码（从旧到新）
+            code (int): 本局动作编码
+        """
+        if len(codes) < self.window:
+            return
+        features = ONE_HOT[list(codes[-self.window:])].reshape(-1)
+        with self.lock:
+            self.pending_samples.append((features, code))
+
+    def update_with_new_data(self):
+        """
+        当有新数据时更新模型
+
+        在线模式下每局只在最新样本（加少量回放样本）上走固定步数，
+        开销与历史数据量无关；设置 full_retrain_every 时每隔 K 局做一次完整重训练。
+        后台模式下只提交训练请求，立即返回。
+        """
+        self.rounds_since_retrain += 1
+        if not self.online or (
+                self.full_retrain_every and
+                self.rounds_since_retrain >= self.full_retrain_every):
+            self.retrain()
+        else:
+            self._request_training()
+
+    def retrain(self, start=0):
+        """
+        重训练模型（可按需调用）
+
+        Args:
+            start (int): 从哪个历史位置（累计局数）开始训练，0 表示完整重训练
+        """
+        self.rounds_since_retrain = 0
+        with self.lock:
+            if self.retrain_from is None or start < self.retrain_from:
+                self.retrain_from = start
+        self._request_training()
+
+    def _request_training(self):
+        """同步执行训练，或提交给后台线程（多次提交会被合并）"""
+        if self.worker is not None:
+            self.worker.submit()
+        else:
+            self._run_training()
+
+    def _run_training(self):
+        """
+        执行一次训练任务：完整重训练或在线更新
+
+        后台模式下训练的是模型副本，完成后再替换 self.model，
+        因此 compute_choice 始终使用一个完整的已发布模型。
+        同步模式下原地训练已发布的模型，整个任务持有 model_lock，
+        与其他线程的推理和训练串行。
+        """
+        if self.worker is not None:
+            self._training_job()
+        else:
+            with self.model_lock:
+                self._training_job()
+
+    def _training_job(self):
+        """取出待训练的数据，训练并发布模型"""
+        with self.lock:
+            start = self.retrain_from
+            self.retrain_from = None
+            samples = list(self.pending_samples)
+            self.pending_samples.clear()
+            offset = self.history.total
+            # 带上前 window 个动作作为第一个样本的上下文
+            codes = self.history.since(start, self.window).copy() \
+                if start is not None else None
+
+            if self.model is None:
+                model, optimizer = self._create_model()
+            elif self.worker is not None:
+                model, optimizer = self._clone_model()
+            else:
+                model, optimizer = self.model, self.optimizer
+
+        if start is None and not samples:
+            return
+
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        if start is not None:
+            if self.verbose:
+                logger.info("%s%s模型...", "重训练" if start else "完整重训练",
+                            self.model_label)
+            self._train_model(model, optimizer, codes)
+            self.replay_buffer.extend(samples)
+        else:
+            self._online_update(model, optimizer, samples)
+        self.stats["train_jobs"] += 1
+        self.stats["train_ms"] += (time.perf_counter() - wall_start) * 1000
+        self.stats["train_cpu_ms"] += (time.thread_time() - cpu_start) * 1000
+
+        # 发布新模型
+        with self.lock:
+            self._publish_model(model, optimizer)
+            self.trained_offset = offset
+            self.rounds_since_checkpoint += len(samples)
+            save = start is not None or \
+                self.rounds_since_checkpoint >= self.checkpoint_every
+        if save:
+            self._save_checkpoint(model, optimizer, offset)
+
+    def _online_update(self, model, optimizer, samples):
+        """在线学习：在最新样本和少量回放样本上走固定步数的梯度"""
+        # 最新样本总在批内，其余从回放缓冲区中随机抽取
+        batch = list(samples)
+        if self.replay_buffer and self.replay_batch > len(batch):
+            batch.extend(random.sample(
+                self.replay_buffer,
+                min(self.replay_batch - len(batch), len(self.replay_buffer))))
+        self.replay_buffer.extend(samples)
+
+        X_tensor = torch.from_numpy(
+            np.stack([x for x, _ in batch])).to(self.device)
+        y_tensor = torch.LongTensor([y for _, y in batch]).to(self.device)
+
+        model.train()
+        for _ in range(self.online_steps):
+            outputs = model(X_tensor)
+            loss = self.criterion(outputs, y_tensor)
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+
+    def wait_for_training(self, timeout=None):
+        """等待后台训练完成（同步模式下立即返回）"""
+        if self.worker is None:
+            return True
+        return self.worker.wait_idle(timeout)
+
+    def close(self):
+        """停止后台训练线程并保存检查点"""
+        if self.worker is not None:
+            self.worker.close()
+            self.worker = None
+        if self.model is not None and self.rounds_since_checkpoint:
+            self._save_checkpoint(self.model, self.optimizer,
+                                  self.trained_offset)
+
+    def _samples_to_arrays(self, samples):
+        """(特征, 目标) 样本 → (N, input_size) 特征数组与 (N,) 目标数组"""
+        if not samples:
+            return (np.empty((0, self.input_size), dtype=np.float32),
+                    np.empty(0, dtype=np.int64))
+        return (np.stack([x for x, _ in samples]),
+                np.array([y for _, y in samples], dtype=np.int64))
+
+    def get_state(self):
+        """
+        可序列化的预测器状态（只含 NumPy 数组与 JSON 值，会话淘汰时保存）
+
+        等待进行中的后台训练后，在锁内复制训练历史、推理上下文、回放样本，
+        以及已发布模型与优化器的张量。
+
+        Returns:
+            dict: 预测器状态
+        """
+        self.wait_for_training()
+        with self.model_lock, self.lock:
+            replay_x, replay_y = self._samples_to_arrays(list(self.replay_buffer))
+            pending_x, pending_y = self._samples_to_arrays(
+                list(self.pending_samples))
+            state = {
+                "window": self.window,
+                "history": self.history.view().copy(),
+                "history_total": self.history.total,
+                "recent_codes": [self.action_to_idx[action]
+                                 for action in self.recent_actions],
+                "context_ring": self.context_ring.copy(),
+                "context_slot": self.context_slot,
+                "total_games": self.total_games,
+                "trained_offset": self.trained_offset,
+                "rounds_since_retrain": self.rounds_since_retrain,
+                "replay_x": replay_x, "replay_y": replay_y,
+                "pending_x": pending_x, "pending_y": pending_y,
+                "stats": dict(self.stats),
+                "model": None,
+                "optimizer": None
+            }
+            if self.model is not None:
+                state["model"] = {name: tensor.detach().cpu().numpy().copy()
+                                  for name, tensor in
+                                  self.model.state_dict().items()}
+                optimizer = self.optimizer.state_dict()
+                state["optimizer"] = {
+                    "state": {str(index): {key: value.detach().cpu().numpy().copy()
+                                           if torch.is_tensor(value) else value
+                                           for key, value in entry.items()}
+                              for index, entry in optimizer["state"].items()},
+                    "param_groups": optimizer["param_groups"]
+                }
+        return state
+
+    def set_state(self, state):
+        """
+        恢复 get_state 保存的状态
+
+        Raises:
+            ValueError: 窗口长度与当前配置不一致
+            RuntimeError: 模型参数形状与当前网络不一致
+        """
+        if int(state["window"]) != self.window:
+            raise ValueError("保存的状态与当前窗口长度不一致")
+
+        model = optimizer = None
+        if state["model"] is not None:
+            model, optimizer = self._create_model()
+            model.load_state_dict({name: torch.from_numpy(np.asarray(value))
+                                   for name, value in state["model"].items()})
+            saved = state["optimizer"]
+            optimizer.load_state_dict({
+                "state": {int(index): {key: torch.from_numpy(np.asarray(value))
+                                       if isinstance(value, np.ndarray) else value
+                                       for key, value in entry.items()}
+                          for index, entry in saved["state"].items()},
+                "param_groups": saved["param_groups"]
+            })
+            # 优化器状态会带回保存时的学习率，以当前配置为准
+            for group in optimizer.param_groups:
+                group["lr"] = self.lr
+
+        with self.lock:
+            history = ActionHistory(self.history.max_len)
+            codes = np.asarray(state["history"], dtype=np.int8)
+            history.skip(int(state["history_total"]) - len(codes))
+            history.extend(codes)
+            self.history = history
+            self.recent_actions.clear()
+            self.recent_actions.extend(self.actions[code]
+                                       for code in state["recent_codes"])
+            self.context_ring[:] = state["context_ring"]
+            self.context_slot = int(state["context_slot"])
+            self.total_games = int(state["total_games"])
+            self.trained_offset = int(state["trained_offset"])
+            self.rounds_since_retrain = int(state["rounds_since_retrain"])
+            self.replay_buffer.clear()
+            self.replay_buffer.extend(zip(state["replay_x"],
+                                          state["replay_y"].tolist()))
+            self.pending_samples.clear()
+            self.pending_samples.extend(zip(state["pending_x"],
+                                            state["pending_y"].tolist()))
+            self.stats.update(state["stats"])
+            if model is not None:
+                self._publish_model(model, optimizer)
+
+    def get_model_info(self):
+        """
+        获取模型信息与耗时/准确率统计
+
+        Returns:
+            dict: 模型信息
+        """
+        stats = dict(self.stats)
+        model_predictions = stats["model_predictions"]
+        cpu_ms = stats["predict_cpu_ms"] + stats["train_cpu_ms"]
+        stats.update({
+            "model_type": self.__class__.__name__,
+            "parameters": sum(p.numel() for p in self.model.parameters())
+            if self.model is not None else 0,
+            "history_length": len(self.history),
+            "trained_offset": self.trained_offset,
+            "background_training": self.worker is not None,
+            "exported_inference": self.inference is not None,
+            "accuracy": round(stats["correct_predictions"] / model_predictions, 4)
+            if model_predictions else None,
+            "predict_ms_per_round": round(stats["predict_ms"] / stats["predictions"], 4)
+            if stats["predictions"] else None,
+            "correct_per_cpu_ms": round(stats["correct_predictions"] / cpu_ms, 4)
+            if cpu_ms else None
+        })
+        return stats
+
+    def get_recent_sequence(self):
+        """获取最近的动作序列"""
+        return list(self.recent_actions)
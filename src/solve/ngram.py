@@ -0,0 +1,330 @@
+import random
+from array import array
+
+import numpy as np
+
+from src.control.logs import get_logger
+from src.control.storage import GameLogStore
+from src.solve.features import ACTION_TO_CODE, ACTIONS
+
+
+logger = get_logger("ngram")
+
+
+class NGramRPSPredictor:
+    """
+    n-gram（马尔可夫链）预测器
+
+    对长度 0..order 的上下文分别计数“上下文之后出现的动作”，
+    上下文按 3 进制编码为整数，所有计数放在一张预先分配的表中：
+    长度 L 的上下文 c 之后动作 a 的计数位于 bases[L] + c*3 + a。
+    每局预测和更新都是 O(order)；预测时优先使用有数据的最长上下文。
+    decay < 1 时旧计数按局指数衰减，可以跟上改变策略的用户。
+    """
+
+    # 动作表为类属性，所有实例共享，会话状态只包含计数与上下文
+    actions = ACTIONS
+    action_to_idx = ACTION_TO_CODE
+
+    # 能赢某动作编码的动作
+    winning_actions = ["paper", "rock", "scissors"]
+
+    # 触发整表缩放的增量上限（衰减通过增大每局增量实现）
+    RESCALE_LIMIT = 1e200
+
+    def __init__(self, data_filename="rps_dataset.json", order=4, decay=1.0,
+                 verbose=True, base_dir="./dataset"):
+        """
+        Args:
+            data_filename (str): 数据集文件名称，None 表示不加载历史数据
+            order (int): 最长上下文长度 k
+            decay (float): 每局计数衰减系数，1.0 表示不衰减
+            verbose (bool): 是否输出每局的预测信息（DEBUG 级日志）
+            base_dir (str): 数据集根目录
+        """
+        self.data_filename = data_filename
+        self.base_dir = base_dir
+        self.order = order
+        self.decay = decay
+        self.verbose = verbose
+
+        # 计数表：长度 L 的上下文共 3^L 个，每个上下文 3 个计数
+        self.powers = tuple(3 ** length for length in range(order + 1))
+        self.bases = tuple(3 * (power - 1) // 2 for power in self.powers)
+        size = self.bases[order] + 3 * self.powers[order]
+        self.table = array('d', bytes(8 * size))
+        self.increment = 1.0
+
+        # 各长度上下文的当前编码，以及已见过的局数
+        self.contexts = [0] * (order + 1)
+        self.recent_codes = []  # 最近 order 个动作编码
+        self.seen = 0
+
+        self._load_historical_data()
+
+    def _load_historical_data(self):
+        """加载历史数据并一次性批量计数"""
+        if self.data_filename is None:
+            return
+
+        try:
+            history = GameLogStore(self.data_filename,
+                                  base_dir=self.base_dir).open_history()
+            loaded = 0
+            for codes in history.iter_user_codes():
+                self.fit(codes)
+                loaded += len(codes)
+            if self.verbose:
+                logger.info("加载了 %d 条历史用户选择", loaded)
+        except Exception as e:
+            logger.warning("加载历史数据失败: %s", e)
+
+    def _counts(self):
+        """计数表的 NumPy 视图（与 self.table 共享内存）"""
+        return np.frombuffer(self.table, dtype=np.float64)
+
+    def _context_keys(self, codes):
+        """
+        计算批量序列中每个位置、每个长度的上下文起始下标
+
+        Returns:
+            tuple: (keys, valid)，keys[L][t] 为位置 t 长度 L 上下文在计数表中的起始下标，
+                   valid[L][t] 表示该位置之前是否已有至少 L 个动作
+        """
+        prefix = np.asarray(self.recent_codes, dtype=np.int64)
+        ext = np.concatenate([prefix, np.asarray(codes, dtype=np.int64)])
+        offset = len(prefix)
+        n = len(codes)
+
+        keys, valid = [], []
+        context = np.zeros(len(ext), dtype=np.int64)
+        positions = np.arange(n) + offset
+        for length in range(self.order + 1):
+            if length > 0:
+                # c_L[p] = c_{L-1}[p-1] * 3 + ext[p-1]
+                shifted = np.zeros(len(ext), dtype=np.int64)
+                shifted[1:] = context[:-1] * 3 + ext[:-1]
+                context = shifted
+            keys.append(self.bases[length] + context[positions] * 3)
+            valid.append(positions >= length)
+        return keys, valid
+
+    def fit(self, codes):
+        """
+        批量计数一段动作序列（向量化），并更新当前上下文
+
+        Args:
+            codes (np.ndarray): 整数编码的动作序列
+        """
+        codes = np.asarray(codes, dtype=np.int64)
+        if len(codes) == 0:
+            return
+
+        keys, valid = self._context_keys(codes)
+        counts = self._counts()
+        if self.decay < 1.0:
+            # 先把计数缩放到“下一局增量为 1”，已有计数再衰减 n 局；
+            # 这一段中越早的局权重越小，最后一局为 decay，与逐局 _record 一致，
+            # 因此可以分块连续调用
+            counts *= np.power(self.decay, len(codes)) / self.increment
+            self.increment = 1.0
+            ages = np.arange(len(codes) - 1, -1, -1, dtype=np.float64)
+            weights = np.power(self.decay, ages + 1)
+        else:
+            weights = np.full(len(codes), self.increment)
+        for length in range(self.order + 1):
+            mask = valid[length]
+            np.add.at(counts, keys[length][mask] + codes[mask], weights[mask])
+
+        self._advance(codes)
+
+    def _advance(self, codes):
+        """用一段已计数的动作序列推进上下文编码"""
+        tail = list(self.recent_codes) + [int(code) for code in
+                                          codes[-self.order:]]
+        self.recent_codes = tail[-self.order:] if self.order else []
+        self.seen += len(codes)
+        for length in range(1, self.order + 1):
+            context = 0
+            for code in self.recent_codes[-length:]:
+                context = context * 3 + code
+            self.contexts[length] = context
+
+    def batch_predict(self, codes):
+        """
+        对一段已知的用户动作序列逐局预测并计数（向量化，仅支持 decay == 1）
+
+        结果与逐局调用 compute_choice 相同（平局时取编码最小的动作），
+        用于无界面模拟中每秒数百万局的场景。
+
+        Args:
+            codes (np.ndarray): 整数编码的用户动作序列
+
+        Returns:
+            np.ndarray: 每局预测的用户动作编码，无数据可用时为 -1
+        """
+        if self.decay < 1.0:
+            return np.array([self._predict_code(record=int(code))
+                             for code in codes], dtype=np.int64)
+
+        codes = np.asarray(codes, dtype=np.int64)
+        n = len(codes)
+        predicted = np.full(n, -1, dtype=np.int64)
+        if n == 0:
+            return predicted
+
+        keys, valid = self._context_keys(codes)
+        counts = self._counts()
+        one_hot = np.eye(3, dtype=np.float64)[codes]
+        undecided = np.ones(n, dtype=bool)
+        # 下标范围较小时用 int16 排序键，NumPy 对其使用 O(n) 的基数排序
+        key_type = np.int16 if len(self.table) < 2 ** 15 else np.int32
+
+        for length in range(self.order, -1, -1):
+            key = keys[length]
+
+            # 同一上下文内按时间顺序累计批内之前出现的次数（不含本局），
+            # 再在每组开头加上批处理前计数表中的已有计数；
+            # 上下文不足 L 个动作的位置不参与计数
+            ranks = np.argsort(key.astype(key_type), kind="stable")
+            sorted_key = key[ranks]
+            sorted_hot = one_hot[ranks] * valid[length][ranks, None]
+            running = np.cumsum(sorted_hot, axis=0)
+            running -= sorted_hot
+            starts = np.flatnonzero(
+                np.r_[True, sorted_key[1:] != sorted_key[:-1]])
+            sizes = np.diff(np.r_[starts, n])
+            shift = counts[sorted_key[starts][:, None] + np.arange(3)] \
+                - running[starts]
+            running += np.repeat(shift, sizes, axis=0)
+            totals = np.empty_like(running)
+            totals[ranks] = running
+
+            usable = undecided & valid[length] & (totals.sum(axis=1) > 0)
+            predicted[usable] = totals[usable].argmax(axis=1)
+            undecided &= ~usable
+
+        for length in range(self.order + 1):
+            mask = valid[length]
+            np.add.at(counts, keys[length][mask] + codes[mask], 1.0)
+        self._advance(codes)
+        return predicted
+
+    def _predict_code(self, record=None):
+        """
+        用有数据的最长上下文预测用户本局动作编码
+
+        Args:
+            record (int): 若给出，预测后立即计数该动作并推进上下文
+
+        Returns:
+            int: 预测的动作编码，没有任何数据时为 -1
+        """
+        table = self.table
+        predicted = -1
+        for length in range(min(self.seen, self.order), -1, -1):
+            base = self.bases[length] + self.contexts[length] * 3
+            a, b, c = table[base], table[base + 1], table[base + 2]
+            if a + b + c > 0:
+                predicted = 0 if a >= b and a >= c else (1 if b >= c else 2)
+                break
+
+        if record is not None:
+            self._record(record)
+        return predicted
+
+    def _record(self, code):
+        """计数一个动作并推进上下文（O(order)）"""
+        table = self.table
+        increment = self.increment
+        contexts = self.contexts
+        for length in range(min(self.seen, self.order) + 1):
+            table[self.bases[length] + contexts[length] * 3 + code] += increment
+        for length in range(1, self.order + 1):
+            contexts[length] = (contexts[length] * 3 + code) % self.powers[length]
+
+        if self.order:
+            self.recent_codes.append(code)
+            if len(self.recent_codes) > self.order:
+                del self.recent_codes[0]
+        self.seen += 1
+
+        if self.decay < 1.0:
+            # 衰减等价于让之后的增量变大；增量过大时整表缩放回来
+            self.increment = increment / self.decay
+            if self.increment > self.RESCALE_LIMIT:
+                counts = self._counts()
+                counts /= self.increment
+                self.increment = 1.0
+
+    def compute_choice(self, user_choice):
+        """
+        根据最近的动作序列预测用户本局动作，返回能赢它的选择，并记录本局动作
+
+        Args:
+            user_choice (str): 用户当前的选择
+
+        Returns:
+            str: 电脑的选择
+        """
+        predicted = self._predict_code(record=self.action_to_idx[user_choice])
+        if predicted < 0:
+            computer_choice = random.choice(self.actions)
+            if self.verbose:
+                logger.debug("n-gram 无可用数据，随机选择: %s", computer_choice)
+            return computer_choice
+
+        computer_choice = self.winning_actions[predicted]
+        if self.verbose:
+            logger.debug("n-gram 预测用户本局动作: %s，针对性选择: %s",
+                         self.actions[predicted], computer_choice)
+        return computer_choice
+
+    def update_with_new_data(self):
+        """计数已在 compute_choice 中以 O(order) 完成，这里无需额外训练"""
+
+    def get_state(self):
+        """
+        可序列化的预测器状态（只含 NumPy 数组与 JSON 值，会话淘汰时保存）
+
+        Returns:
+            dict: 计数表、增量、上下文与已见局数
+        """
+        return {
+            "table": self._counts().copy(),
+            "increment": self.increment,
+            "contexts": list(self.contexts),
+            "recent_codes": list(self.recent_codes),
+            "seen": self.seen
+        }
+
+    def set_state(self, state):
+        """
+        恢复 get_state 保存的状态
+
+        Raises:
+            ValueError: 状态与当前 order 不一致
+        """
+        table = np.asarray(state["table"], dtype=np.float64)
+        if len(table) != len(self.table) or \
+                len(state["contexts"]) != self.order + 1:
+            raise ValueError("n-gram 状态与当前 order 不一致")
+        self.table = array('d', table.tobytes())
+        self.increment = float(state["increment"])
+        self.contexts = [int(context) for context in state["contexts"]]
+        self.recent_codes = [int(code) for code in state["recent_codes"]]
+        self.seen = int(state["seen"])
+
+    def get_model_info(self):
+        """获取模型信息"""
+        return {
+            "model_type": self.__class__.__name__,
+            "order": self.order,
+            "decay": self.decay,
+            "rounds_seen": self.seen,
+            "table_bytes": self.table.itemsize * len(self.table)
+        }
+
+    def get_recent_sequence(self):
+        """获取最近的动作序列"""
+        return [self.actions[code] for code in self.recent_codes]
@@ -0,0 +1,28 @@
+import random
+
+from src.control.logs import get_logger
+
+
+logger = get_logger("random")
+
+
+class RandomPredictor:
+    """随机策略预测器（模式3）"""
+
+    def __init__(self, data_filename=None, verbose=True):
+        self.actions = ["rock", "scissors", "paper"]
+        self.verbose = verbose
+
+    def compute_choice(self, user_choice):
+        """随机选择"""
+        choice = random.choice(self.actions)
+        if self.verbose:
+            logger.debug("随机策略选择: %s", choice)
+        return choice
+
+    def get_state(self):
+        """随机策略没有需要保存的状态"""
+        return {}
+
+    def set_state(self, state):
+        """随机策略没有需要恢复的状态"""
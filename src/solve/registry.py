@@ -0,0 +1,81 @@
+import importlib
+import inspect
+
+
+# 模式 → (模块, 类名, 描述)
+# 模块只在选中该模式时才导入，避免不需要的依赖（例如 torch）拖慢启动
+PREDICTORS = {
+    "1": ("src.solve.solve1", "SimpleRPSPredictor", "简化版神经网络预测器"),
+    "2": ("src.solve.solve2", "Conv1DRPSPredictor", "一维卷积神经网络预测器"),
+    "3": ("src.solve.random_predictor", "RandomPredictor", "随机策略预测器"),
+    "4": ("src.solve.ngram", "NGramRPSPredictor", "n-gram 马尔可夫链预测器"),
+    "5": ("src.solve.ensemble", "EnsembleRPSPredictor", "集成元策略预测器"),
+    "6": ("src.solve.suffix", "SuffixMatchPredictor", "后缀索引历史匹配预测器"),
+}
+
+
+def available_modes():
+    """已注册的模式列表"""
+    return list(PREDICTORS)
+
+
+def describe_mode(mode):
+    """模式的描述文字（不导入对应模块）"""
+    entry = PREDICTORS.get(mode)
+    return entry[2] if entry else "未知模式"
+
+
+def load_predictor_class(mode):
+    """
+    导入并返回模式对应的预测器类
+
+    Raises:
+        ImportError: 模式未注册或模块导入失败
+    """
+    if mode not in PREDICTORS:
+        raise ImportError("模式不存在")
+    module_name, class_name, _ = PREDICTORS[mode]
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)
+
+
+def create_predictor(mode, data_filename, **options):
+    """
+    创建模式对应的预测器实例
+
+    只传入预测器构造函数支持的选项，例如随机策略会忽略 background。
+
+    Args:
+        mode (str): 模式
+        data_filename (str): 数据集文件名称
+        **options: 预测器选项
+
+    Returns:
+        object: 预测器实例
+    """
+    predictor_class = load_predictor_class(mode)
+    accepted = {key: value for key, value in options.items()
+                if key in accepted_options(predictor_class)}
+    return predictor_class(data_filename, **accepted)
+
+
+def accepted_options(predictor_class):
+    """
+    预测器构造函数接受的选项名称
+
+    构造函数带 **options 时沿继承链继续收集父类构造函数的参数，
+    例如一维卷积预测器同时接受 kernel_size 与基类的 window。
+    """
+    names = set()
+    for cls in predictor_class.__mro__:
+        if "__init__" not in vars(cls):
+            continue
+        parameters = inspect.signature(cls.__init__).parameters
+        names.update(name for name, parameter in parameters.items()
+                     if parameter.kind not in (inspect.Parameter.VAR_KEYWORD,
+                                               inspect.Parameter.VAR_POSITIONAL))
+        if not any(parameter.kind == inspect.Parameter.VAR_KEYWORD
+                   for parameter in parameters.values()):
+            break
+    names.discard("self")
+    return names
@@ -1,11 +1,7 @@
-import json
-import random
 import numpy as np
-import torch
 import torch.nn as nn
-import torch.optim as optim
-from collections import deque
-import os
+
+from src.solve.neural import NeuralRPSPredictor
 
 
 class SimpleNeuralNetwork(nn.Module):
@@ -23,216 +19,76 @@ class SimpleNeuralNetwork(nn.Module):
         return self.network(x)
 
 
-class SimpleRPSPredictor:
-    def __init__(self, data_filename="rps_dataset.json"):
-        """
-        简化版石头剪刀布预测器
-        只使用前10个数据做循环预测
-
-        Args:
-            data_filename (str): 数据集文件名称
-        """
-        self.data_filename = data_filename
-        self.actions = ["rock", "scissors", "paper"]
-        self.action_to_idx = {action: idx for idx,
-                              action in enumerate(self.actions)}
-        self.idx_to_action = {idx: action for action,
-                              idx in self.action_to_idx.items()}
-
-        self.winning_actions = {
-            "rock": "paper",      # 布赢石头
-            "scissors": "rock",   # 石头赢剪刀
-            "paper": "scissors"   # 剪刀赢布
-        }
-
-        # 神经网络参数
-        self.input_size = 10  # 使用前10个动作的one-hot编码
-        self.hidden_size = 32
-        self.output_size = 3  # 3个类别
-
-        # 数据存储
-        self.recent_actions = deque(maxlen=10)  # 只保留最近10个动作
-        self.total_games = 0
-
-        # 神经网络模型
-        self.model = None
-        self.optimizer = None
-        self.criterion = nn.CrossEntropyLoss()
-
-        # 设备
-        self.device = torch.device(
-            "cuda" if torch.cuda.is_available() else "cpu")
-
-        # 加载历史数据
-        self._load_historical_data()
-
-    def _load_historical_data(self):
-        """加载历史数据"""
-        if not os.path.exists(self.data_filename):
-            print("数据集文件不存在，等待数据积累")
-            return
-
-        try:
-            with open("./dataset"+self.data_filename, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            game_records = data.get("game_records", [])
-            self.total_games = len(game_records)
-
-            # 提取用户选择历史
-            for record in game_records:
-                user_choice = record.get("user_choice")
-                if user_choice in self.actions:
-                    self.recent_actions.append(user_choice)
-
-            print(f"加载了 {len(self.recent_actions)} 条历史用户选择")
-
-            # 如果数据足够，初始化模型
-            if len(self.recent_actions) >= 10:
-                self._initialize_model()
-                self._train_model()
-
-        except Exception as e:
-            print(f"加载历史数据失败: {e}")
-
-    def _initialize_model(self):
-        """初始化神经网络模型"""
-        self.model = SimpleNeuralNetwork(
-            self.input_size, self.hidden_size, self.output_size)
-        self.model.to(self.device)
-        self.optimizer = optim.Adam(self.model.parameters(), lr=0.001)
-
-    def _action_to_one_hot(self, action):
-        """将动作转换为one-hot编码"""
-        one_hot = [0, 0, 0]
-        one_hot[self.action_to_idx[action]] = 1
-        return one_hot
-
-    def _prepare_training_data(self):
-        """准备训练数据"""
-        if len(self.recent_actions) < 11:  # 需要至少11个数据来创建10->1的映射
-            return [], []
-
-        X = []  # 输入：前10个动作的one-hot拼接
-        y = []  # 输出：第11个动作的索引
-
-        # 使用滑动窗口创建训练数据
-        actions_list = list(self.recent_actions)
-        for i in range(10, len(actions_list)):
-            # 取前10个动作作为输入
-            input_sequence = actions_list[i-10:i]
-            # 第11个动作作为目标
-            target_action = actions_list[i]
-
-            # 将输入序列转换为one-hot编码
-            input_features = []
-            for action in input_sequence:
-                input_features.extend(self._action_to_one_hot(action))
-
-            X.append(input_features)
-            y.append(self.action_to_idx[target_action])
-
-        return X, y
-
-    def _train_model(self):
-        """训练模型"""
-        X, y = self._prepare_training_data()
+class NumpyMLPInference:
+    """
+    SimpleNeuralNetwork 的纯 NumPy 推理器
 
-        if len(X) < 1:
-            print("训练数据不足")
-            return
+    将训练好的权重复制到预先分配的数组中，推理只做两次矩阵乘法，
+    每次调用都写入同一组缓冲区，不分配新数组，也没有框架调用开销。
+    """
 
-        print(f"开始训练模型，使用 {len(X)} 个样本...")
+    def __init__(self, model):
+        first, last = model.network[0], model.network[2]
+        self.w1 = np.ascontiguousarray(
+            first.weight.detach().cpu().numpy().T, dtype=np.float32)
+        self.b1 = first.bias.detach().cpu().numpy().astype(np.float32)
+        self.w2 = np.ascontiguousarray(
+            last.weight.detach().cpu().numpy().T, dtype=np.float32)
+        self.b2 = last.bias.detach().cpu().numpy().astype(np.float32)
+        self.hidden = np.empty(self.w1.shape[1], dtype=np.float32)
+        self.logits = np.empty(self.w2.shape[1], dtype=np.float32)
 
-        # 转换为张量
-        X_tensor = torch.FloatTensor(X).to(self.device)
-        y_tensor = torch.LongTensor(y).to(self.device)
-
-        # 训练循环
-        self.model.train()
-        for epoch in range(100):
-            # 前向传播
-            outputs = self.model(X_tensor)
-            loss = self.criterion(outputs, y_tensor)
+    def predict(self, features):
+        """
+        Args:
+            features (np.ndarray): (input_size,) float32 输入特征
 
-            # 反向传播
-            self.optimizer.zero_grad()
-            loss.backward()
-            self.optimizer.step()
+        Returns:
+            np.ndarray: (output_size,) logits（内部缓冲区，下次调用会被覆盖）
+        """
+        np.dot(features, self.w1, out=self.hidden)
+        np.add(self.hidden, self.b1, out=self.hidden)
+        np.maximum(self.hidden, 0, out=self.hidden)
+        np.dot(self.hidden, self.w2, out=self.logits)
+        np.add(self.logits, self.b2, out=self.logits)
+        return self.logits
+
+    def predict_batch(self, features):
+        """
+        Args:
+            features (np.ndarray): (B, input_size) float32 输入特征
 
-            if epoch % 20 == 0:
-                print(f"训练轮次 {epoch}, 损失: {loss.item():.4f}")
+        Returns:
+            np.ndarray: (B, output_size) logits（新分配的数组，可多线程调用）
+        """
+        hidden = features @ self.w1
+        hidden += self.b1
+        np.maximum(hidden, 0, out=hidden)
+        logits = hidden @ self.w2
+        logits += self.b2
+        return logits
 
-        print("模型训练完成")
 
-    def compute_choice(self, user_choice):
+class SimpleRPSPredictor(NeuralRPSPredictor):
+    def __init__(self, data_filename="rps_dataset.json", numpy_inference=True,
+                 **options):
         """
-        基于前10个数据预测计算电脑的选择
+        简化版石头剪刀布预测器
+        只使用前 window 个数据做循环预测
 
         Args:
-            user_choice (str): 用户当前的选择
-
-        Returns:
-            str: 电脑的选择
+            data_filename (str): 数据集文件名称，None 表示不加载历史数据
+            numpy_inference (bool): 是否使用导出到 NumPy 的权重推理（不经过 torch）
+            **options: 配置、训练、后台训练与检查点选项，见 NeuralRPSPredictor
         """
-        # 更新最近动作列表
-        self.recent_actions.append(user_choice)
-        self.total_games += 1
-
-        # 策略1: 数据不足10个时随机选择
-        if len(self.recent_actions) < 10:
-            computer_choice = random.choice(self.actions)
-            print(f"数据不足 {len(self.recent_actions)}/10，随机选择: {computer_choice}")
-            return computer_choice
-
-        # 策略2: 使用模型预测
-        try:
-            # 获取最近10个动作
-            recent_10 = list(self.recent_actions)[-10:]
-
-            # 准备输入特征
-            input_features = []
-            for action in recent_10:
-                input_features.extend(self._action_to_one_hot(action))
-
-            # 使用模型预测
-            if self.model is not None:
-                self.model.eval()
-                with torch.no_grad():
-                    features_tensor = torch.FloatTensor(
-                        input_features).unsqueeze(0).to(self.device)
-                    outputs = self.model(features_tensor)
-                    probabilities = torch.softmax(outputs, dim=1)
-                    predicted_idx = torch.argmax(outputs, dim=1).item()
-                    predicted_action = self.idx_to_action[predicted_idx]
-
-                # 获取预测概率
-                probs = probabilities[0].cpu().numpy()
-                prob_dict = {self.actions[i]: float(
-                    probs[i]) for i in range(3)}
-
-                print(f"模型预测用户下一动作: {predicted_action}")
-                print(f"预测概率: {prob_dict}")
-
-                # 选择能赢预测动作的动作
-                computer_choice = self.winning_actions[predicted_action]
-                print(f"针对性选择: {computer_choice}")
-                return computer_choice
-
-        except Exception as e:
-            print(f"模型预测失败: {e}")
-
-        # 备用策略: 随机选择
-        computer_choice = random.choice(self.actions)
-        print(f"备用随机选择: {computer_choice}")
-        return computer_choice
-
-    def update_with_new_data(self):
-        """当有新数据时重新训练模型"""
-        if len(self.recent_actions) >= 11:  # 有足够数据时才训练
-            print("检测到新数据，重新训练模型...")
-            self._train_model()
-
-    def get_recent_sequence(self):
-        """获取最近的动作序列"""
-        return list(self.recent_actions)
+        self.numpy_inference = numpy_inference
+        super().__init__(data_filename, **options)
+
+    def _build_network(self):
+        """创建全连接网络"""
+        return SimpleNeuralNetwork(
+            self.input_size, self.hidden_size, self.output_size)
+
+    def _export_inference(self, model):
+        """导出 NumPy 推理器"""
+        return NumpyMLPInference(model) if self.numpy_inference else None
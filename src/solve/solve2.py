@@ -1,23 +1,19 @@
-import json
-import random
-import numpy as np
-import torch
 import torch.nn as nn
-import torch.optim as optim
-from collections import deque
-import os
+
+from src.solve.neural import NeuralRPSPredictor
 
 
 class Conv1DNeuralNetwork(nn.Module):
     """一维卷积神经网络分类器"""
 
-    def __init__(self, input_size, hidden_size, output_size):
+    def __init__(self, input_size, hidden_size, output_size, kernel_size=5):
         super(Conv1DNeuralNetwork, self).__init__()
+        self.window = input_size // 3  # 序列长度（动作个数）
         self.conv1d = nn.Conv1d(
             in_channels=3,  # 每个时间步有3个特征(one-hot编码)
             out_channels=16,
-            kernel_size=5,  # 卷积核大小为5
-            padding=2  # 保持序列长度不变
+            kernel_size=kernel_size,
+            padding=kernel_size // 2  # 奇数卷积核时保持序列长度不变
         )
         self.pool = nn.AdaptiveAvgPool1d(1)  # 全局平均池化
         self.fc1 = nn.Linear(16, hidden_size)
@@ -25,8 +21,9 @@ class Conv1DNeuralNetwork(nn.Module):
         self.relu = nn.ReLU()
 
     def forward(self, x):
-        # x shape: (batch_size, 30) -> 重塑为 (batch_size, 3, 10)
-        x = x.view(-1, 3, 10)
+        # x shape: (batch_size, window*3)，按时间步依次拼接每个动作的 one-hot
+        # -> (batch_size, window, 3) -> 转置为通道在前的 (batch_size, 3, window)
+        x = x.view(-1, self.window, 3).transpose(1, 2)
         # 一维卷积
         x = self.relu(self.conv1d(x))
         # 全局平均池化
@@ -37,216 +34,17 @@ class Conv1DNeuralNetwork(nn.Module):
         return x
 
 
-class Conv1DRPSPredictor:
-    def __init__(self, data_filename="rps_dataset.json"):
-        """
-        基于一维卷积网络的石头剪刀布预测器
-        使用前10个数据做循环预测，使用1D CNN提取特征
-
-        Args:
-            data_filename (str): 数据集文件名称
-        """
-        self.data_filename = data_filename
-        self.actions = ["rock", "scissors", "paper"]
-        self.action_to_idx = {action: idx for idx,
-                              action in enumerate(self.actions)}
-        self.idx_to_action = {idx: action for action,
-                              idx in self.action_to_idx.items()}
-
-        self.winning_actions = {
-            "rock": "paper",      # 布赢石头
-            "scissors": "rock",   # 石头赢剪刀
-            "paper": "scissors"   # 剪刀赢布
-        }
-
-        # 神经网络参数
-        self.input_size = 30  # 10个动作 * 3个特征(one-hot)
-        self.hidden_size = 32
-        self.output_size = 3  # 3个类别
-
-        # 数据存储
-        self.recent_actions = deque(maxlen=10)  # 只保留最近10个动作
-        self.total_games = 0
-
-        # 神经网络模型
-        self.model = None
-        self.optimizer = None
-        self.criterion = nn.CrossEntropyLoss()
-
-        # 设备
-        self.device = torch.device(
-            "cuda" if torch.cuda.is_available() else "cpu")
-
-        # 加载历史数据
-        self._load_historical_data()
-
-    def _load_historical_data(self):
-        """加载历史数据"""
-        if not os.path.exists(self.data_filename):
-            print("数据集文件不存在，等待数据积累")
-            return
-
-        try:
-            with open("./dataset"+self.data_filename, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            game_records = data.get("game_records", [])
-            self.total_games = len(game_records)
-
-            # 提取用户选择历史
-            for record in game_records:
-                user_choice = record.get("user_choice")
-                if user_choice in self.actions:
-                    self.recent_actions.append(user_choice)
-
-            print(f"加载了 {len(self.recent_actions)} 条历史用户选择")
-
-            # 如果数据足够，初始化模型
-            if len(self.recent_actions) >= 10:
-                self._initialize_model()
-                self._train_model()
-
-        except Exception as e:
-            print(f"加载历史数据失败: {e}")
-
-    def _initialize_model(self):
-        """初始化一维卷积神经网络模型"""
-        self.model = Conv1DNeuralNetwork(
-            self.input_size, self.hidden_size, self.output_size)
-        self.model.to(self.device)
-        self.optimizer = optim.Adam(self.model.parameters(), lr=0.001)
-
-    def _action_to_one_hot(self, action):
-        """将动作转换为one-hot编码"""
-        one_hot = [0, 0, 0]
-        one_hot[self.action_to_idx[action]] = 1
-        return one_hot
-
-    def _prepare_training_data(self):
-        """准备训练数据"""
-        if len(self.recent_actions) < 11:  # 需要至少11个数据来创建10->1的映射
-            return [], []
-
-        X = []  # 输入：前10个动作的one-hot拼接
-        y = []  # 输出：第11个动作的索引
-
-        # 使用滑动窗口创建训练数据
-        actions_list = list(self.recent_actions)
-        for i in range(10, len(actions_list)):
-            # 取前10个动作作为输入
-            input_sequence = actions_list[i-10:i]
-            # 第11个动作作为目标
-            target_action = actions_list[i]
-
-            # 将输入序列转换为one-hot编码并拼接
-            input_features = []
-            for action in input_sequence:
-                input_features.extend(self._action_to_one_hot(action))
-
-            X.append(input_features)
-            y.append(self.action_to_idx[target_action])
-
-        return X, y
-
-    def _train_model(self):
-        """训练模型"""
-        X, y = self._prepare_training_data()
-
-        if len(X) < 1:
-            print("训练数据不足")
-            return
-
-        print(f"开始训练一维卷积模型，使用 {len(X)} 个样本...")
-
-        # 转换为张量
-        X_tensor = torch.FloatTensor(X).to(self.device)
-        y_tensor = torch.LongTensor(y).to(self.device)
-
-        # 训练循环
-        self.model.train()
-        for epoch in range(100):
-            # 前向传播
-            outputs = self.model(X_tensor)
-            loss = self.criterion(outputs, y_tensor)
-
-            # 反向传播
-            self.optimizer.zero_grad()
-            loss.backward()
-            self.optimizer.step()
-
-            if epoch % 20 == 0:
-                print(f"训练轮次 {epoch}, 损失: {loss.item():.4f}")
-
-        print("一维卷积模型训练完成")
-
-    def compute_choice(self, user_choice):
-        """
-        基于前10个数据使用一维卷积网络预测计算电脑的选择
-
-        Args:
-            user_choice (str): 用户当前的选择
-
-        Returns:
-            str: 电脑的选择
-        """
-        # 更新最近动作列表
-        self.recent_actions.append(user_choice)
-        self.total_games += 1
-
-        # 策略1: 数据不足10个时随机选择
-        if len(self.recent_actions) < 10:
-            computer_choice = random.choice(self.actions)
-            print(f"数据不足 {len(self.recent_actions)}/10，随机选择: {computer_choice}")
-            return computer_choice
-
-        # 策略2: 使用一维卷积模型预测
-        try:
-            # 获取最近10个动作
-            recent_10 = list(self.recent_actions)[-10:]
-
-            # 准备输入特征
-            input_features = []
-            for action in recent_10:
-                input_features.extend(self._action_to_one_hot(action))
-
-            # 使用模型预测
-            if self.model is not None:
-                self.model.eval()
-                with torch.no_grad():
-                    features_tensor = torch.FloatTensor(
-                        input_features).unsqueeze(0).to(self.device)
-                    outputs = self.model(features_tensor)
-                    probabilities = torch.softmax(outputs, dim=1)
-                    predicted_idx = torch.argmax(outputs, dim=1).item()
-                    predicted_action = self.idx_to_action[predicted_idx]
-
-                # 获取预测概率
-                probs = probabilities[0].cpu().numpy()
-                prob_dict = {self.actions[i]: float(
-                    probs[i]) for i in range(3)}
-
-                print(f"一维卷积模型预测用户下一动作: {predicted_action}")
-                print(f"预测概率: {prob_dict}")
-
-                # 选择能赢预测动作的动作
-                computer_choice = self.winning_actions[predicted_action]
-                print(f"针对性选择: {computer_choice}")
-                return computer_choice
-
-        except Exception as e:
-            print(f"一维卷积模型预测失败: {e}")
-
-        # 备用策略: 随机选择
-        computer_choice = random.choice(self.actions)
-        print(f"备用随机选择: {computer_choice}")
-        return computer_choice
+class Conv1DRPSPredictor(NeuralRPSPredictor):
+    """
+    基于一维卷积网络的石头剪刀布预测器
+    使用前 window 个数据做循环预测，使用1D CNN提取特征
+    """
 
-    def update_with_new_data(self):
-        """当有新数据时重新训练一维卷积模型"""
-        if len(self.recent_actions) >= 11:  # 有足够数据时才训练
-            print("检测到新数据，重新训练一维卷积模型...")
-            self._train_model()
+    model_label = "一维卷积"
+    config_fields = NeuralRPSPredictor.config_fields + ("kernel_size",)
 
-    def get_recent_sequence(self):
-        """获取最近的动作序列"""
-        return list(self.recent_actions)
+    def _build_network(self):
+        """创建一维卷积神经网络（卷积核大小取自配置）"""
+        return Conv1DNeuralNetwork(
+            self.input_size, self.hidden_size, self.output_size,
+            kernel_size=self.config.kernel_size)
@@ -0,0 +1,275 @@
+import random
+from array import array
+from collections import deque
+
+import numpy as np
+
+from src.control.logs import get_logger
+from src.control.storage import GameLogStore
+from src.solve.features import ACTION_TO_CODE, ACTIONS
+
+
+logger = get_logger("suffix")
+
+
+class SuffixAutomaton:
+    """
+    动作序列的在线后缀自动机
+
+    每追加一个动作均摊 O(1)。追加后，最后一个状态的后缀链接指向
+    “当前序列中在更早位置也出现过的最长后缀”所在的状态，
+    因此最长历史匹配的长度及其一次更早出现之后的动作可以 O(1) 取得。
+    匹配长度是精确的；匹配位置是该后缀的一次更早出现，但不一定是最近的一次
+    （见 end 的说明）。所有字段保存在 array 中（每状态 28 字节），不创建 Python 对象。
+    """
+
+    def __init__(self):
+        self.length = array('i')   # 状态中最长串的长度
+        self.link = array('i')     # 后缀链接
+        # 该状态的串的一次结束位置：创建时的位置（克隆状态沿用被克隆状态的），
+        # 此后每次它作为最长更早匹配时更新为当前位置。该串作为更长匹配的一部分
+        # 出现时不更新（那需要沿后缀链接逐个更新祖先，周期序列下每步 O(n)），
+        # 因此可能早于该串最近的一次出现
+        self.end = array('i')
+        self.next = array('i')     # 转移表，state*3 + code，-1 表示无
+        self.codes = array('b')    # 已追加的动作序列
+        self.last = self._new_state(0, -1, -1)
+
+        # 最近一次追加后的最长更早匹配：长度与结束位置
+        self.match_length = 0
+        self.match_end = -1
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def states(self):
+        return len(self.length)
+
+    def _new_state(self, length, link, end, transitions=(-1, -1, -1)):
+        self.length.append(length)
+        self.link.append(link)
+        self.end.append(end)
+        self.next.extend(transitions)
+        return len(self.length) - 1
+
+    def extend(self, code):
+        """追加一个动作编码（标准后缀自动机构造）"""
+        position = len(self.codes)
+        self.codes.append(code)
+        length, link, nxt = self.length, self.link, self.next
+
+        current = self._new_state(length[self.last] + 1, -1, position)
+        state = self.last
+        while state != -1 and nxt[state * 3 + code] == -1:
+            nxt[state * 3 + code] = current
+            state = link[state]
+
+        if state == -1:
+            link[current] = 0
+        else:
+            target = nxt[state * 3 + code]
+            if length[state] + 1 == length[target]:
+                link[current] = target
+            else:
+                clone = self._new_state(
+                    length[state] + 1, link[target], self.end[target],
+                    nxt[target * 3:target * 3 + 3])
+                while state != -1 and nxt[state * 3 + code] == target:
+                    nxt[state * 3 + code] = clone
+                    state = link[state]
+                link[target] = clone
+                link[current] = clone
+        self.last = current
+
+        # 后缀链接状态即最长的更早出现过的后缀；记下它记录的一次更早结束位置后，
+        # 把本次出现登记到该状态，下次匹配到它时取到本次的位置
+        matched = link[current]
+        self.match_length = length[matched]
+        self.match_end = self.end[matched]
+        self.end[matched] = position
+
+    def predict(self):
+        """
+        Returns:
+            int: 最长历史匹配（match_end 处的那次更早出现）之后紧跟的动作编码，
+                 无匹配时为 -1
+        """
+        if self.match_length == 0:
+            return -1
+        return self.codes[self.match_end + 1]
+
+    # 以 NumPy 数组保存的字段
+    ARRAY_FIELDS = ("length", "link", "end", "next", "codes")
+
+    def get_state(self):
+        """全部数组与当前匹配（见 SuffixMatchPredictor.get_state）"""
+        state = {name: np.frombuffer(getattr(self, name),
+                                     dtype=f"i{getattr(self, name).itemsize}").copy()
+                 for name in self.ARRAY_FIELDS}
+        state.update({"last": self.last, "match_length": self.match_length,
+                      "match_end": self.match_end})
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        automaton = cls()
+        for name in cls.ARRAY_FIELDS:
+            values = getattr(automaton, name)
+            del values[:]
+            values.frombytes(np.asarray(
+                state[name], dtype=f"i{values.itemsize}").tobytes())
+        automaton.last = int(state["last"])
+        automaton.match_length = int(state["match_length"])
+        automaton.match_end = int(state["match_end"])
+        return automaton
+
+    def nbytes(self):
+        """占用的数组字节数"""
+        return sum(part.itemsize * len(part) for part in
+                   (self.length, self.link, self.end, self.next, self.codes))
+
+
+class SuffixMatchPredictor:
+    """
+    后缀索引历史匹配预测器
+
+    在完整的用户动作历史上增量维护后缀自动机，找到与当前结尾相同的
+    最长更早片段，预测用户会重复当时紧随其后的动作。
+    设置 max_history 时，历史达到 2*max_history 后只用最近 max_history 个动作重建，
+    内存有界，重建成本均摊到每局仍为 O(1)。
+    """
+
+    # 动作表为类属性，所有实例共享，会话状态只包含索引
+    actions = ACTIONS
+    action_to_idx = ACTION_TO_CODE
+
+    # 能赢某动作编码的动作
+    winning_actions = ["paper", "rock", "scissors"]
+
+    def __init__(self, data_filename="rps_dataset.json", max_history=None,
+                 verbose=True, base_dir="./dataset"):
+        """
+        Args:
+            data_filename (str): 数据集文件名称，None 表示不加载历史数据
+            max_history (int): 有界内存模式下保留的动作数，None 表示保留全部历史
+            verbose (bool): 是否输出每局的预测信息（DEBUG 级日志）
+            base_dir (str): 数据集根目录
+        """
+        self.data_filename = data_filename
+        self.base_dir = base_dir
+        self.max_history = max_history
+        self.verbose = verbose
+
+        self.automaton = SuffixAutomaton()
+        self.recent_actions = deque(maxlen=10)
+        self.total_games = 0
+        self.rebuilds = 0
+
+        self._load_historical_data()
+
+    def _load_historical_data(self):
+        """加载历史用户动作并建立索引"""
+        if self.data_filename is None:
+            return
+
+        try:
+            history = GameLogStore(self.data_filename,
+                                  base_dir=self.base_dir).open_history()
+            start = 0
+            if self.max_history is not None:
+                start = max(0, len(history) - self.max_history)
+            codes = history.user_codes(start).tolist()
+            for code in codes:
+                self.automaton.extend(code)
+            self.recent_actions.extend(self.actions[code] for code in codes[-10:])
+            self.total_games = len(history)
+            if self.verbose:
+                logger.info("加载了 %d 条历史用户选择，后缀自动机共 %d 个状态",
+                            len(codes), self.automaton.states)
+        except Exception as e:
+            logger.warning("加载历史数据失败: %s", e)
+
+    def _record(self, code):
+        """追加本局动作，超出有界内存上限时用最近的历史重建索引"""
+        automaton = self.automaton
+        automaton.extend(code)
+        if (self.max_history is not None
+                and len(automaton) >= 2 * self.max_history):
+            rebuilt = SuffixAutomaton()
+            for kept in automaton.codes[-self.max_history:]:
+                rebuilt.extend(kept)
+            self.automaton = rebuilt
+            self.rebuilds += 1
+
+    def compute_choice(self, user_choice):
+        """
+        用最长历史匹配预测用户本局动作，返回能赢它的选择，并记录本局动作
+
+        Args:
+            user_choice (str): 用户当前的选择
+
+        Returns:
+            str: 电脑的选择
+        """
+        predicted = self.automaton.predict()
+        match_length = self.automaton.match_length
+        self._record(self.action_to_idx[user_choice])
+        self.recent_actions.append(user_choice)
+        self.total_games += 1
+
+        if predicted < 0:
+            computer_choice = random.choice(self.actions)
+            if self.verbose:
+                logger.debug("没有历史匹配，随机选择: %s", computer_choice)
+            return computer_choice
+
+        computer_choice = self.winning_actions[predicted]
+        if self.verbose:
+            logger.debug("最长历史匹配 %d 步，预测用户本局动作: %s，针对性选择: %s",
+                         match_length, self.actions[predicted], computer_choice)
+        return computer_choice
+
+    def update_with_new_data(self):
+        """索引已在 compute_choice 中增量更新，这里无需额外训练"""
+
+    def get_state(self):
+        """
+        可序列化的预测器状态（只含 NumPy 数组与 JSON 值，会话淘汰时保存）
+
+        Returns:
+            dict: 后缀自动机、最近动作与计数
+        """
+        return {
+            "automaton": self.automaton.get_state(),
+            "recent_codes": [self.action_to_idx[action]
+                             for action in self.recent_actions],
+            "total_games": self.total_games,
+            "rebuilds": self.rebuilds
+        }
+
+    def set_state(self, state):
+        """恢复 get_state 保存的状态"""
+        self.automaton = SuffixAutomaton.from_state(state["automaton"])
+        self.recent_actions.clear()
+        self.recent_actions.extend(self.actions[code]
+                                   for code in state["recent_codes"])
+        self.total_games = int(state["total_games"])
+        self.rebuilds = int(state["rebuilds"])
+
+    def get_model_info(self):
+        """获取模型信息"""
+        automaton = self.automaton
+        return {
+            "model_type": self.__class__.__name__,
+            "history_length": len(automaton),
+            "states": automaton.states,
+            "match_length": automaton.match_length,
+            "index_bytes": automaton.nbytes(),
+            "max_history": self.max_history,
+            "rebuilds": self.rebuilds
+        }
+
+    def get_recent_sequence(self):
+        """获取最近的动作序列"""
+        return list(self.recent_actions)
@@ -0,0 +1,83 @@
+import threading
+
+from src.control.logs import get_logger
+
+
+logger = get_logger("worker")
+
+
+class TrainingWorker:
+    """
+    后台训练线程
+
+    submit() 只登记一次训练请求并立即返回；线程空闲时执行 job()。
+    训练期间重复提交的请求会被合并为一次，因此积压的旧任务不会排队执行。
+    """
+
+    def __init__(self, job, name="rps-trainer"):
+        """
+        Args:
+            job (callable): 训练任务，无参数，在后台线程中执行
+            name (str): 线程名称
+        """
+        self.job = job
+        self.completed_jobs = 0
+        self.coalesced_jobs = 0
+
+        self._cond = threading.Condition()
+        self._pending = False
+        self._busy = False
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name=name,
+                                        daemon=True)
+        self._thread.start()
+
+    def submit(self):
+        """登记一次训练请求（与尚未开始的请求合并）"""
+        with self._cond:
+            if self._closed:
+                return
+            if self._pending:
+                self.coalesced_jobs += 1
+            self._pending = True
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._pending:
+                    return
+                self._pending = False
+                self._busy = True
+
+            try:
+                self.job()
+            except Exception as e:
+                logger.error("后台训练失败: %s", e)
+
+            with self._cond:
+                self._busy = False
+                self.completed_jobs += 1
+                self._cond.notify_all()
+
+    def wait_idle(self, timeout=None):
+        """
+        等待所有已提交的训练完成
+
+        Returns:
+            bool: 超时前是否已空闲
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._busy and not self._pending, timeout)
+
+    def close(self, wait=True):
+        """停止后台线程；wait 为 True 时先完成已提交的训练"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            self._thread.join()
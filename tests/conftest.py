@@ -0,0 +1,23 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import pytest
+
+from src.control.logs import configure_logging
+
+
+@pytest.fixture(autouse=True)
+def quiet_logs():
+    """测试中只输出警告及以上的日志"""
+    configure_logging(console_level="WARNING")
+    yield
+
+
+@pytest.fixture
+def base_dir(tmp_path):
+    """临时数据集根目录（与 "./dataset" 一样按 base_dir + filename 拼接）"""
+    return str(tmp_path / "base")
@@ -0,0 +1,63 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.solve.batching import MicroBatcher
+
+
+def double_all(items):
+    return [item * 2 for item in items]
+
+
+def test_results_and_stats():
+    batcher = MicroBatcher(double_all, window_ms=5, max_batch=8)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(batcher.predict, range(200)))
+    batcher.close()
+
+    assert results == [item * 2 for item in range(200)]
+    stats = batcher.get_stats()
+    assert stats["requests"] == 200
+    assert 1 <= stats["largest_batch"] <= 8
+    assert stats["batches"] >= 200 / 8
+    assert stats["p50_ms"] <= stats["p99_ms"]
+
+
+def test_get_stats_while_batches_complete():
+    # 统计由调度线程持续更新时并发读取，不应抛出 "deque mutated during iteration"
+    batcher = MicroBatcher(double_all, window_ms=0, max_batch=64,
+                           latency_samples=200000)
+    # 迭代一个较长的延迟样本队列，使读取与调度线程的追加有机会交错
+    batcher.latencies.extend([0.0] * 200000)
+    stop = threading.Event()
+    errors = []
+
+    def read_stats():
+        while not stop.is_set():
+            try:
+                batcher.get_stats()
+            except Exception as e:
+                errors.append(e)
+                return
+
+    reader = threading.Thread(target=read_stats)
+    reader.start()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(batcher.predict, range(20000)))
+    stop.set()
+    reader.join()
+    batcher.close()
+    assert errors == []
+
+
+def test_predict_error_is_delivered_and_closed_batcher_rejects():
+    def fail(items):
+        raise RuntimeError("boom")
+
+    batcher = MicroBatcher(fail, window_ms=0)
+    with pytest.raises(RuntimeError, match="boom"):
+        batcher.predict(1)
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit(1)
@@ -0,0 +1,74 @@
+import json
+import os
+
+from src.control.columnar import (
+    ColumnarHistory, convert_to_columnar, convert_to_json)
+from src.control.storage import GameLogStore
+
+
+FILENAME = "/columnar/game.json"
+
+RECORDS = [
+    {"user_choice": "rock", "computer_choice": "paper",
+     "result": "computer_win", "timestamp": "2024-03-01T12:00:00", "mode": "1"},
+    {"user_choice": "paper", "computer_choice": "rock",
+     "result": "user_win", "timestamp": "2024-03-01T12:00:01.250000",
+     "mode": "4"},
+    {"user_choice": "scissors", "computer_choice": "scissors",
+     "result": "draw", "timestamp": "2024-03-01T12:00:02.000001"},
+    {"user_choice": "rock", "computer_choice": "scissors",
+     "result": "user_win", "timestamp": None, "mode": "6"},
+]
+
+
+def test_jsonl_columnar_json_round_trip(base_dir, tmp_path):
+    store = GameLogStore(FILENAME, base_dir=base_dir)
+    store.append_many(RECORDS)
+
+    history = convert_to_columnar(FILENAME, base_dir=base_dir)
+    assert len(history) == len(RECORDS)
+    assert history.to_records() == RECORDS
+
+    path = convert_to_json(FILENAME, str(tmp_path / "out.json"),
+                           base_dir=base_dir)
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    assert data["game_records"] == RECORDS
+    metadata = data["metadata"]
+    assert (metadata["total_games"], metadata["user_wins"],
+            metadata["computer_wins"], metadata["draws"]) == (4, 2, 1, 1)
+    assert metadata["created_date"] == store.metadata["created_date"]
+
+    # 导出的旧版数据集再导入为日志，记录不变
+    legacy_dir = str(tmp_path / "legacy")
+    os.makedirs(legacy_dir + "/columnar")
+    os.replace(path, legacy_dir + FILENAME)
+    imported = GameLogStore(FILENAME, base_dir=legacy_dir)
+    assert list(imported.iter_records()) == RECORDS
+
+
+def test_tail_records_keep_modes(base_dir):
+    store = GameLogStore(FILENAME, base_dir=base_dir)
+    store.append_many(RECORDS)
+    assert store.open_history().tail_records(2) == RECORDS[-2:]
+
+
+def test_columns_without_mode_column_are_rebuilt_from_log(base_dir):
+    store = GameLogStore(FILENAME, base_dir=base_dir)
+    store.append_many(RECORDS)
+    history = ColumnarHistory(FILENAME, base_dir=base_dir)
+    # 旧版本写入的列没有模式列
+    os.remove(history.modes_path)
+    assert [record.get("mode") for record in history.to_records()] == \
+        [None] * len(RECORDS)
+
+    reopened = GameLogStore(FILENAME, base_dir=base_dir)
+    reopened.append_many(RECORDS[:1])
+    assert history.to_records() == RECORDS + RECORDS[:1]
+
+
+def test_unsupported_mode_is_reported(base_dir, caplog):
+    history = ColumnarHistory(FILENAME, base_dir=base_dir)
+    history.append_many([dict(RECORDS[0], mode="custom")])
+    assert "mode" not in history.to_records()[0]
+    assert any("custom" in record.getMessage() for record in caplog.records)
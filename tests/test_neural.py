@@ -0,0 +1,66 @@
+import threading
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+
+from src.solve.solve2 import Conv1DRPSPredictor
+
+
+MOVES = ["rock", "paper", "scissors", "rock"]
+
+
+def make_predictor():
+    predictor = Conv1DRPSPredictor(None, verbose=False,
+                                   config={"window": 3, "epochs": 5})
+    for index in range(8):
+        predictor.compute_choice(MOVES[index % 4])
+        predictor.update_with_new_data()
+    return predictor
+
+
+def test_sync_training_is_serialized_across_threads(monkeypatch):
+    predictor = make_predictor()
+    active, peak = [0], [0]
+    guard = threading.Lock()
+    online_update = predictor._online_update
+
+    def tracked(*args):
+        with guard:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        try:
+            online_update(*args)
+        finally:
+            with guard:
+                active[0] -= 1
+
+    monkeypatch.setattr(predictor, "_online_update", tracked)
+
+    def worker():
+        for _ in range(20):
+            predictor.add_sample(bytes([0, 1, 2]), 0)
+            predictor.update_with_new_data()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 1
+
+
+def test_prediction_waits_for_in_place_training():
+    predictor = make_predictor()
+    results = []
+    with predictor.model_lock:
+        thread = threading.Thread(target=lambda: results.append(
+            predictor.predict_contexts([bytes([0, 1, 2])])))
+        thread.start()
+        thread.join(0.2)
+        # 训练（持有 model_lock）期间推理不会读取正在更新的权重
+        assert thread.is_alive()
+    thread.join()
+    assert results and results[0].shape == (1,)
+    assert np.all(results[0] >= 0)
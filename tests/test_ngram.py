@@ -0,0 +1,52 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.solve import ngram
+from src.solve.ngram import NGramRPSPredictor
+
+
+def sequence(kind, rng, length):
+    generators = {
+        "random": lambda i: rng.randrange(3),
+        "biased": lambda i: 0 if rng.random() < 0.6 else rng.randrange(3),
+        "cyclic": lambda i: i % 3 if rng.random() < 0.9 else rng.randrange(3),
+        "constant": lambda i: 2,
+    }
+    return [generators[kind](i) for i in range(length)]
+
+
+def per_round_predictions(predictor, codes):
+    """逐局调用 compute_choice，把电脑的选择还原为预测的用户动作编码"""
+    predicted = []
+    for code in codes:
+        choice = predictor.compute_choice(predictor.actions[code])
+        predicted.append(-1 if choice is None
+                         else predictor.winning_actions.index(choice))
+    return predicted
+
+
+@pytest.mark.parametrize("kind", ["random", "biased", "cyclic", "constant"])
+@pytest.mark.parametrize("order", [0, 1, 4])
+@pytest.mark.parametrize("decay", [1.0, 0.9])
+def test_batch_predict_matches_per_round_compute_choice(monkeypatch, kind,
+                                                        order, decay):
+    # 没有数据时 compute_choice 随机选择，这里让它返回 None 以便识别
+    monkeypatch.setattr(ngram.random, "choice", lambda actions: None)
+    rng = random.Random(f"{kind}-{order}-{decay}")
+    history = sequence(kind, rng, 50)
+    codes = sequence(kind, rng, 400)
+
+    batched = NGramRPSPredictor(None, order=order, decay=decay, verbose=False)
+    rounds = NGramRPSPredictor(None, order=order, decay=decay, verbose=False)
+    # 第一段从空表开始，第二段接在已计数的历史之后
+    for chunk in (codes[:20], history, codes[20:]):
+        expected = per_round_predictions(rounds, chunk)
+        assert batched.batch_predict(np.array(chunk)).tolist() == expected
+
+    assert batched.recent_codes == rounds.recent_codes
+    assert batched.seen == rounds.seen
+    np.testing.assert_allclose(
+        batched._counts() / batched.increment,
+        rounds._counts() / rounds.increment)
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+from src.control.server import GameServer
+from src.control.sessions import SessionManager
+
+
+async def exchange(port, lines):
+    """在同一个连接上依次发送多行请求，返回每行的响应"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    responses = []
+    try:
+        for line in lines:
+            writer.write(line.encode("utf-8") + b"\n")
+            await writer.drain()
+            responses.append(json.loads(await reader.readline()))
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return responses
+
+
+def run_server(base_dir, lines, manager_hook=None):
+    async def main():
+        manager = SessionManager(mode="4", base_dir=base_dir,
+                                 save_batch_size=1)
+        if manager_hook is not None:
+            manager_hook(manager)
+        server = GameServer(manager, workers=2)
+        port = await server.start(port=0)
+        try:
+            return await exchange(port, lines)
+        finally:
+            await server.close()
+
+    return asyncio.run(main())
+
+
+def test_invalid_requests_return_errors_and_keep_connection(base_dir):
+    responses = run_server(base_dir, [
+        "[1]",
+        "{not json",
+        '"play"',
+        json.dumps({"op": "dance", "id": 7}),
+        json.dumps({"op": "play", "id": 8}),
+        json.dumps({"op": "play", "player": "../x", "choice": "rock"}),
+        json.dumps({"op": "play", "player": "p1", "choice": "lizard"}),
+        json.dumps({"op": "play", "player": "p1", "choice": "rock",
+                    "id": "last"}),
+    ])
+
+    assert [response["ok"] for response in responses] == [False] * 7 + [True]
+    assert all(response["error"] for response in responses[:-1])
+    assert responses[3]["id"] == 7
+    assert "player" in responses[4]["error"]
+    assert responses[-1]["id"] == "last"
+    assert responses[-1]["result"]["user_choice"] == "rock"
+
+
+def test_server_side_errors_are_reported_and_logged(base_dir, caplog):
+    def failing_play(player_id, user_choice):
+        raise OSError(28, "No space left on device")
+
+    def hook(manager):
+        manager.play = failing_play
+
+    responses = run_server(base_dir, [
+        json.dumps({"op": "play", "player": "p1", "choice": "rock", "id": 1}),
+        json.dumps({"op": "ping", "id": 2}),
+    ], manager_hook=hook)
+
+    assert responses[0]["ok"] is False
+    assert responses[0]["id"] == 1
+    assert "OSError" in responses[0]["error"]
+    assert responses[1] == {"ok": True, "result": "pong", "id": 2}
+    assert any("处理请求失败" in record.getMessage()
+               for record in caplog.records)
@@ -0,0 +1,186 @@
+import os
+import pickle
+import random
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from src.control.sessions import SESSION_STATE_SUFFIX, SessionManager
+from src.control.storage import GameLogStore
+
+
+MOVES = ["rock", "paper", "scissors", "rock", "rock"]
+
+
+def play_all(manager, player, moves):
+    return [manager.play(player, move) for move in moves]
+
+
+def test_predictor_reads_history_from_base_dir(base_dir, tmp_path,
+                                               monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = SessionManager(mode="4", base_dir=base_dir, save_batch_size=1)
+    play_all(manager, "alice", MOVES)
+    manager.close()
+
+    # 不写入默认的 ./dataset，会话的全部文件都在 base_dir 下
+    assert os.listdir(tmp_path) == ["base"]
+    assert os.path.exists(os.path.join(base_dir, "sessions", "alice.jsonl"))
+
+    # 删除状态文件后从日志重建，预测器读到的是 base_dir 下的历史
+    for name in os.listdir(os.path.join(base_dir, "sessions")):
+        if name.startswith("alice.session"):
+            os.remove(os.path.join(base_dir, "sessions", name))
+    manager = SessionManager(mode="4", base_dir=base_dir)
+    predictor = manager.get_session("alice").predictor
+    assert predictor.seen == len(MOVES)
+    manager.close()
+
+
+def play_with_eviction(base_dir, mode, moves, evict, options=None):
+    """逐局对战；evict 为 True 时每局之后都淘汰会话（保存并恢复状态）"""
+    random.seed(0)
+    torch_seed()
+    manager = SessionManager(mode=mode, base_dir=base_dir, save_batch_size=3,
+                             background_training=False,
+                             predictor_options=options)
+    choices = []
+    for move in moves:
+        choices.append(manager.play("alice", move)["computer_choice"])
+        if evict:
+            manager.evict("alice")
+    stats = dict(manager.stats)
+    manager.close()
+    return choices, stats
+
+
+def torch_seed():
+    if "torch" in sys.modules:
+        sys.modules["torch"].manual_seed(0)
+
+
+@pytest.mark.parametrize("mode, options", [
+    ("3", None),
+    ("4", {"decay": 0.9}),
+    ("5", {"members": ()}),
+    ("5", {"members": ("1",), "config": {"window": 3, "epochs": 5}}),
+    ("6", None),
+])
+def test_eviction_round_trip_keeps_predictor_state(tmp_path, mode, options):
+    moves = [MOVES[index % 4] for index in range(24)]
+    kept, _ = play_with_eviction(str(tmp_path / "kept"), mode, moves, False,
+                                 options)
+    evicted, stats = play_with_eviction(str(tmp_path / "evicted"), mode,
+                                        moves, True, options)
+
+    assert stats["restored"] == len(moves) - 1
+    assert stats["rebuilt"] == 0
+    if mode != "3":
+        assert evicted == kept
+    sessions = tmp_path / "evicted" / "sessions"
+    assert not [name for name in os.listdir(sessions)
+                if name.endswith(".tmp")]
+
+
+def test_unsaveable_state_removes_tmp_file(base_dir, monkeypatch):
+    manager = SessionManager(mode="4", base_dir=base_dir)
+    manager.play("alice", "rock")
+    predictor = manager.get_session("alice").predictor
+    monkeypatch.setattr(predictor, "get_state",
+                        lambda: {"lock": threading.Lock()})
+    manager.evict("alice")
+
+    sessions = os.path.join(base_dir, "sessions")
+    assert sorted(os.listdir(sessions)) == [
+        "alice.jsonl", "alice.meta.json", "alice.modes.u8", "alice.moves.u8",
+        "alice.times.i64"]
+
+    # 没有状态文件时从日志重建，历史不丢失
+    assert manager.get_session("alice").predictor.seen == 1
+    manager.close()
+
+
+def test_state_file_is_loaded_without_pickle(base_dir):
+    manager = SessionManager(mode="6", base_dir=base_dir)
+    play_all(manager, "alice", MOVES)
+    manager.evict("alice")
+
+    path = os.path.join(base_dir, "sessions", "alice" + SESSION_STATE_SUFFIX)
+    with np.load(path, allow_pickle=False) as data:
+        assert all(data[name].dtype != object for name in data.files)
+
+    # 被替换为 pickle 文件时只记录警告并从日志重建，不执行其中的代码
+    with open(path, 'wb') as f:
+        pickle.dump({"state": object()}, f)
+    predictor = manager.get_session("alice").predictor
+    assert predictor.total_games == len(MOVES)
+    assert len(predictor.automaton) == len(MOVES)
+    assert manager.stats["rebuilt"] == 1
+    manager.close()
+
+
+def test_player_waits_while_its_session_is_being_spilled(base_dir):
+    manager = SessionManager(mode="4", base_dir=base_dir, max_sessions=1,
+                             save_batch_size=100)
+    play_all(manager, "alice", MOVES)
+
+    # 让 alice 的淘汰停在写入剩余记录之前
+    spilling, release = threading.Event(), threading.Event()
+    spill = manager._spill
+
+    def slow_spill(session):
+        if session.player_id == "alice":
+            spilling.set()
+            release.wait(5)
+        spill(session)
+
+    manager._spill = slow_spill
+    evictor = threading.Thread(target=manager.play, args=("bob", "rock"))
+    evictor.start()
+    assert spilling.wait(5)
+
+    # 同一玩家的请求等淘汰完成后再打开会话，而不是读取尚未更新的日志
+    player = threading.Thread(target=manager.play, args=("alice", "paper"))
+    player.start()
+    player.join(0.2)
+    assert player.is_alive()
+    release.set()
+    evictor.join(5)
+    player.join(5)
+    manager.close()
+
+    store = GameLogStore("/sessions/alice.json", base_dir=base_dir)
+    assert [record["user_choice"] for record in store.iter_records()] == \
+        MOVES + ["paper"]
+
+
+def test_shared_model_survives_restart(base_dir):
+    pytest.importorskip("torch")
+    options = {"config": {"window": 3, "epochs": 5}}
+    manager = SessionManager(mode="1", base_dir=base_dir,
+                             background_training=False,
+                             predictor_options=options)
+    for player in ("alice", "bob"):
+        play_all(manager, player, MOVES * 3)
+    manager.close()
+    saved = manager.shared_model.get_state()
+    assert saved["model"] is not None
+    assert os.path.exists(manager.shared_state_path)
+
+    restarted = SessionManager(mode="1", base_dir=base_dir,
+                               background_training=False,
+                               predictor_options=options)
+    restored = restarted.shared_model.get_state()
+    for name, value in saved["model"].items():
+        np.testing.assert_array_equal(restored["model"][name], value)
+    np.testing.assert_array_equal(restored["replay_x"], saved["replay_x"])
+    restarted.close()
+
+    # 配置改变（网络形状不同）时忽略保存的状态，从头学习
+    changed = SessionManager(mode="1", base_dir=base_dir,
+                             background_training=False,
+                             predictor_options={"config": {"window": 4}})
+    assert changed.shared_model.model is None
+    changed.close()
@@ -0,0 +1,107 @@
+import itertools
+import json
+import random
+
+import pytest
+
+from src.control.RPSController import RPSController
+from src.control.statistics import GameStatistics
+from src.control.storage import GameLogStore
+
+
+FILENAME = "/stats/game.json"
+CHOICES = ["rock", "paper", "scissors"]
+
+
+@pytest.fixture
+def dataset_dir(tmp_path, monkeypatch):
+    """控制器按 "./dataset" + filename 打开数据集，切换到临时目录"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / "dataset"
+
+
+def play(controller, rounds, seed=0, save=True):
+    rng = random.Random(seed)
+    for _ in range(rounds):
+        controller.method1_process_game(rng.choice(CHOICES))
+        if save:
+            controller.method2_save_to_dataset()
+
+
+def read_checkpoint(controller):
+    with open(controller.stats_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def rebuilt_from_log(limit=None):
+    """不使用检查点，从日志（的前 limit 条记录）重建的统计"""
+    stats = GameStatistics()
+    stats.record_all(itertools.islice(GameLogStore(FILENAME).iter_records(),
+                                      limit))
+    return stats.to_dict()
+
+
+@pytest.mark.parametrize("writer_options", [
+    {"save_batch_size": 7},
+    {"save_batch_size": 4, "flush_interval_ms": 5},
+], ids=["batched", "write-behind"])
+def test_checkpoint_matches_log_with_unsaved_and_pending_rounds(
+        dataset_dir, writer_options):
+    controller = RPSController(FILENAME, mode="4", verbose=False,
+                               checkpoint_interval=5, **writer_options)
+    play(controller, 22)
+    # 最后一局只处理、不保存：不计入统计，也不妨碍检查点
+    play(controller, 1, seed=1, save=False)
+
+    assert controller.method3_get_statistics()["total_games"] == 22
+    controller.flush()
+    # 对局过程中已经保存过检查点，内容与它覆盖的日志前缀一致
+    checkpoint = read_checkpoint(controller)
+    assert 0 < checkpoint["total"] <= 22
+    assert checkpoint == rebuilt_from_log(limit=checkpoint["total"])
+    controller.close()
+
+    checkpoint = read_checkpoint(controller)
+    assert checkpoint["total"] == 22
+    assert checkpoint == rebuilt_from_log()
+
+
+def test_restore_uses_checkpoint_without_replaying_log(dataset_dir,
+                                                       monkeypatch):
+    controller = RPSController(FILENAME, mode="4", verbose=False,
+                               save_batch_size=3)
+    play(controller, 10)
+    controller.close()
+    expected = controller.statistics.to_dict()
+
+    def fail(self):
+        raise AssertionError("检查点与日志一致时不应重放日志")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(GameLogStore, "iter_records", fail)
+        controller = RPSController(FILENAME, mode="4", verbose=False)
+    assert controller.statistics.to_dict() == expected
+    assert controller.persisted_statistics.to_dict() == expected
+
+    # 恢复后继续对局，两份统计各自更新
+    play(controller, 5, seed=2)
+    controller.close()
+    assert read_checkpoint(controller)["total"] == 15
+    assert read_checkpoint(controller) == rebuilt_from_log()
+
+
+def test_stale_checkpoint_is_caught_up_from_log(dataset_dir):
+    controller = RPSController(FILENAME, mode="4", verbose=False,
+                               checkpoint_interval=1000)
+    play(controller, 4)
+    controller.close()
+    # 检查点之后其他进程追加了记录
+    store = GameLogStore(FILENAME)
+    store.append_many([{"user_choice": "rock", "computer_choice": "paper",
+                        "result": "computer_win",
+                        "timestamp": "2024-01-01T00:00:00", "mode": "4"}])
+
+    controller = RPSController(FILENAME, mode="4", verbose=False)
+    assert controller.statistics.total == 5
+    assert controller.statistics.to_dict() == rebuilt_from_log()
+    controller.close()
@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.control import storage
+from src.control.storage import GameLogStore, WriteBehindWriter
+
+
+FILENAME = "/writer/game.json"
+START = datetime(2024, 1, 1)
+
+
+def make_records(start, count):
+    return [{"user_choice": "rock", "computer_choice": "paper",
+             "result": "computer_win",
+             "timestamp": (START + timedelta(seconds=i)).isoformat(),
+             "mode": "4", "index": i} for i in range(start, start + count)]
+
+
+def logged_indexes(base_dir):
+    return [record["index"] for record in
+            GameLogStore(FILENAME, base_dir=base_dir).iter_records()]
+
+
+def fail_once(monkeypatch, target, name, error=OSError(28, "磁盘已满")):
+    """让 target.name 第一次调用时抛出异常，之后恢复原实现"""
+    original = getattr(target, name)
+    calls = []
+
+    def wrapper(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise error
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(target, name, wrapper)
+    return calls
+
+
+def test_writer_retries_failed_batch_in_order(base_dir, monkeypatch):
+    store = GameLogStore(FILENAME, base_dir=base_dir)
+    fail_once(monkeypatch, store, "append_many")
+    written = []
+    writer = WriteBehindWriter(store, batch_size=1000, interval_ms=10000,
+                               on_flush=written.extend)
+
+    writer.append_many(make_records(0, 5))
+    assert writer.flush() is False
+    assert len(writer) == 5
+    assert writer.stats["errors"] == 1
+
+    # 失败的记录排在之后追加的记录前面
+    writer.append_many(make_records(5, 3))
+    assert writer.flush() is True
+    writer.close()
+
+    assert [record["index"] for record in written] == list(range(8))
+    assert logged_indexes(base_dir) == list(range(8))
+    assert store.metadata["total_games"] == 8
+
+
+@pytest.mark.parametrize("target, name", [
+    (storage.os, "fsync"),
+    (GameLogStore, "_write_metadata"),
+], ids=["fsync", "metadata"])
+def test_retry_after_partial_append_does_not_duplicate(base_dir, monkeypatch,
+                                                       target, name):
+    store = GameLogStore(FILENAME, base_dir=base_dir)
+    store.append_many(make_records(0, 2))
+    fail_once(monkeypatch, target, name)
+
+    with pytest.raises(OSError):
+        store.append_many(make_records(2, 3))
+    assert store.metadata["total_games"] == 2
+
+    store.append_many(make_records(2, 3))
+    assert store.metadata["total_games"] == 5
+    assert logged_indexes(base_dir) == list(range(5))
+    assert store.open_history().count == 5
+
+    # 重新打开时元数据与日志一致，不需要修复
+    reopened = GameLogStore(FILENAME, base_dir=base_dir)
+    assert reopened.metadata["log_bytes"] == os.path.getsize(store.log_path)
+    assert reopened.metadata["total_games"] == 5
+
+
+def test_column_failure_commits_records_and_realigns(base_dir, monkeypatch):
+    from src.control.columnar import ColumnarHistory
+
+    store = GameLogStore(FILENAME, base_dir=base_dir)
+    store.append_many(make_records(0, 2))
+    fail_once(monkeypatch, ColumnarHistory, "append_arrays")
+
+    # 日志与元数据已提交，列的失败不抛给调用方（否则重试会重复写入）
+    store.append_many(make_records(2, 3))
+    store.append_many(make_records(5, 1))
+    assert logged_indexes(base_dir) == list(range(6))
+    assert store.open_history().count == 6
+
+
+def test_background_and_explicit_flushes_keep_append_order(base_dir):
+    store = GameLogStore(FILENAME, base_dir=base_dir)
+    batches = []
+    writer = WriteBehindWriter(store, batch_size=7, interval_ms=1,
+                               on_flush=batches.append)
+    stop = threading.Event()
+
+    def flusher():
+        while not stop.is_set():
+            writer.flush()
+
+    thread = threading.Thread(target=flusher)
+    thread.start()
+    try:
+        for start in range(0, 300, 3):
+            writer.append_many(make_records(start, 3))
+            if start % 30 == 0:
+                time.sleep(0.002)
+    finally:
+        stop.set()
+        thread.join()
+    assert writer.close() is True
+
+    assert [record["index"] for batch in batches for record in batch] == \
+        list(range(300))
+    assert logged_indexes(base_dir) == list(range(300))
+
+
+def test_close_flushes_and_rejects_new_records(base_dir):
+    store = GameLogStore(FILENAME, base_dir=base_dir)
+    writer = WriteBehindWriter(store, batch_size=1000, interval_ms=10000)
+    writer.append_many(make_records(0, 4))
+    assert writer.close() is True
+    assert not writer.thread.is_alive()
+    assert logged_indexes(base_dir) == list(range(4))
+    with pytest.raises(RuntimeError):
+        writer.append(make_records(4, 1)[0])
+
+
+def test_failing_on_flush_does_not_stop_writer(base_dir):
+    store = GameLogStore(FILENAME, base_dir=base_dir)
+
+    def on_flush(records):
+        raise ValueError("回调出错")
+
+    writer = WriteBehindWriter(store, batch_size=2, interval_ms=1,
+                               on_flush=on_flush)
+    writer.append_many(make_records(0, 2))
+    deadline = time.monotonic() + 5
+    while store.metadata["total_games"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    writer.append_many(make_records(2, 2))
+    assert writer.close() is True
+    assert logged_indexes(base_dir) == list(range(4))
+    assert writer.stats["errors"] == 0
+
+
+def test_stale_store_adopts_appends_committed_by_another_store(base_dir):
+    first = GameLogStore(FILENAME, base_dir=base_dir)
+    first.append_many(make_records(0, 2))
+    # 另一个存储对象（例如同一玩家的新会话）在此之后追加
+    second = GameLogStore(FILENAME, base_dir=base_dir)
+    second.append_many(make_records(2, 3))
+
+    first.append_many(make_records(5, 1))
+    assert logged_indexes(base_dir) == list(range(6))
+    assert first.metadata["total_games"] == 6
+    assert first.open_history().count == 6
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from src.control.storage import GameLogStore
+from src.solve.features import ACTIONS
+from src.solve.suffix import SuffixAutomaton, SuffixMatchPredictor
+
+
+def longest_earlier_suffix(codes):
+    """暴力求解：以最后一个位置结尾、在更早位置也出现过的最长后缀的长度"""
+    position = len(codes) - 1
+    best = 0
+    for end in range(position):
+        length = 0
+        while length <= end and codes[end - length] == codes[position - length]:
+            length += 1
+        best = max(best, length)
+    return best
+
+
+@pytest.mark.parametrize("kind", ["random", "biased", "cyclic", "constant"])
+def test_match_length_and_position_agree_with_brute_force(kind):
+    rng = random.Random(kind)
+    generators = {
+        "random": lambda i: rng.randrange(3),
+        "biased": lambda i: 0 if rng.random() < 0.6 else rng.randrange(3),
+        "cyclic": lambda i: i % 3 if rng.random() < 0.9 else rng.randrange(3),
+        "constant": lambda i: 1,
+    }
+    codes = [generators[kind](i) for i in range(300)]
+
+    automaton = SuffixAutomaton()
+    for position, code in enumerate(codes):
+        automaton.extend(code)
+        length = longest_earlier_suffix(codes[:position + 1])
+        assert automaton.match_length == length
+        if length == 0:
+            assert automaton.predict() == -1
+            continue
+        # 匹配位置是该后缀的一次更早出现
+        end = automaton.match_end
+        assert length - 1 <= end < position
+        assert codes[end - length + 1:end + 1] == \
+            codes[position - length + 1:position + 1]
+        assert automaton.predict() == codes[end + 1]
+
+
+def test_state_round_trip_keeps_matching():
+    rng = random.Random(0)
+    automaton = SuffixAutomaton()
+    for _ in range(200):
+        automaton.extend(rng.randrange(3))
+    restored = SuffixAutomaton.from_state(automaton.get_state())
+    for _ in range(100):
+        code = rng.randrange(3)
+        automaton.extend(code)
+        restored.extend(code)
+        assert (restored.match_length, restored.match_end) == \
+            (automaton.match_length, automaton.match_end)
+
+
+def test_predictor_counts_loaded_history(base_dir):
+    store = GameLogStore("/suffix/game.json", base_dir=base_dir)
+    store.append_many([{"user_choice": ACTIONS[index % 3],
+                        "computer_choice": "rock", "result": "draw",
+                        "timestamp": "2024-01-01T00:00:00"}
+                       for index in range(30)])
+
+    predictor = SuffixMatchPredictor("/suffix/game.json", verbose=False,
+                                     base_dir=base_dir)
+    assert predictor.total_games == 30
+    assert len(predictor.automaton) == 30
+    # 循环序列 rock, scissors, paper, ... 以 paper 结尾，预测下一个动作为 rock
+    assert predictor.compute_choice("rock") == "paper"
+    assert predictor.total_games == 31
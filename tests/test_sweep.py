@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from src.control import sweep
+
+
+@pytest.fixture
+def no_run(monkeypatch):
+    """参数错误时不应启动任何单元格"""
+    def run_sweep(*args, **kwargs):
+        raise AssertionError("参数校验失败时不应运行扫描")
+
+    monkeypatch.setattr(sweep, "run_sweep", run_sweep)
+
+
+@pytest.mark.parametrize("argv, message", [
+    (["--modes", "9"], "未知的模式"),
+    (["--opponents", "random", "rondom"], "未知的对手策略"),
+    (["--modes", "4", "--grid", "window=5"], "window"),
+    (["--grid", "windw=5,10"], "windw"),
+    (["--grid", "verbose=true"], "verbose"),
+    (["--grid", "window=0"], "window=0"),
+    (["--grid", "window"], "无效的网格参数"),
+])
+def test_main_rejects_bad_arguments_before_running(no_run, capsys, argv,
+                                                   message):
+    with pytest.raises(SystemExit) as exit_info:
+        sweep.main(argv)
+    assert exit_info.value.code == 2
+    assert message in capsys.readouterr().err
+
+
+def test_validate_accepts_options_of_any_selected_mode():
+    # window 只被神经网络模式接受，decay 只被 n-gram 接受，组合起来都合法
+    sweep.validate_sweep(["1", "4"], ["random"],
+                         {"window": [5], "decay": [0.9]})
+    # 默认网格只展开各模式接受的参数，不要求每个参数都被接受
+    sweep.validate_sweep(["4"], ["random"], None)
+
+    cells = sweep.build_cells(["1", "4"], ["random"],
+                              {"window": [5, 10], "decay": [0.9]}, 10, 0)
+    assert sorted((cell["mode"], tuple(cell["options"].items()))
+                  for cell in cells) == [
+        ("1", (("window", 5),)), ("1", (("window", 10),)),
+        ("4", (("decay", 0.9),))]
+
+
+def test_run_sweep_restores_environment_and_resumes(tmp_path, monkeypatch):
+    monkeypatch.setenv("OMP_NUM_THREADS", "4")
+    monkeypatch.delenv("OPENBLAS_NUM_THREADS", raising=False)
+    output = str(tmp_path / "results.jsonl")
+    cells = sweep.build_cells(["4"], ["cyclic"], {"decay": [0.9]}, 20, 0)
+
+    results = sweep.run_sweep(cells, output, workers=1)
+    assert len(results) == 1 and "error" not in results[0]
+    # 父进程的环境变量只在创建工作进程期间被修改
+    assert os.environ["OMP_NUM_THREADS"] == "4"
+    assert "OPENBLAS_NUM_THREADS" not in os.environ
+
+    # 续跑时已完成的单元格不再运行
+    assert sweep.run_sweep(cells, output, workers=1) == results